@@ -0,0 +1,30 @@
+"""trending buckets checkpoint table
+
+Revision ID: 0002_trending_buckets
+Revises: 0001_initial
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# Revision identifiers, used by Alembic.
+revision = "0002_trending_buckets"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "trending_buckets",
+        sa.Column("bucket_start", sa.DateTime(), primary_key=True),
+        sa.Column("track_id", sa.Integer(), sa.ForeignKey("tracks.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("plays", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("trending_buckets")
@@ -0,0 +1,59 @@
+"""playlist track positions and summary totals
+
+Revision ID: 0003_playlist_positions
+Revises: 0002_trending_buckets
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# Revision identifiers, used by Alembic.
+revision = "0003_playlist_positions"
+down_revision = "0002_trending_buckets"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("playlist_tracks") as batch:
+        batch.add_column(sa.Column("position", sa.Integer(), nullable=False, server_default="0"))
+    with op.batch_alter_table("playlists") as batch:
+        batch.add_column(sa.Column("track_count", sa.Integer(), nullable=False, server_default="0"))
+        batch.add_column(sa.Column("total_duration", sa.Float(), nullable=False, server_default="0"))
+
+    # Backfill positions in existing link order (by track id, the best order available)
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT playlist_id, track_id FROM playlist_tracks ORDER BY playlist_id, track_id")).all()
+    updates = []
+    current, pos = None, 0
+    for playlist_id, track_id in rows:
+        if playlist_id != current:
+            current, pos = playlist_id, 0
+        updates.append({"p": playlist_id, "t": track_id, "pos": pos})
+        pos += 1
+    if updates:
+        bind.execute(
+            sa.text("UPDATE playlist_tracks SET position = :pos WHERE playlist_id = :p AND track_id = :t"),
+            updates,
+        )
+    bind.execute(
+        sa.text(
+            "UPDATE playlists SET "
+            "track_count = (SELECT COUNT(*) FROM playlist_tracks pt WHERE pt.playlist_id = playlists.id), "
+            "total_duration = (SELECT COALESCE(SUM(t.duration), 0) FROM playlist_tracks pt "
+            "JOIN tracks t ON t.id = pt.track_id WHERE pt.playlist_id = playlists.id)"
+        )
+    )
+    op.create_index("ix_playlist_tracks_playlist_position", "playlist_tracks", ["playlist_id", "position"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_playlist_tracks_playlist_position", table_name="playlist_tracks")
+    with op.batch_alter_table("playlists") as batch:
+        batch.drop_column("total_duration")
+        batch.drop_column("track_count")
+    with op.batch_alter_table("playlist_tracks") as batch:
+        batch.drop_column("position")
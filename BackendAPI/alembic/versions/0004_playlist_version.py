@@ -0,0 +1,27 @@
+"""playlist version counter
+
+Revision ID: 0004_playlist_version
+Revises: 0003_playlist_positions
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# Revision identifiers, used by Alembic.
+revision = "0004_playlist_version"
+down_revision = "0003_playlist_positions"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("playlists") as batch:
+        batch.add_column(sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("playlists") as batch:
+        batch.drop_column("version")
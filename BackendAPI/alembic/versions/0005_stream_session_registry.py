@@ -0,0 +1,38 @@
+"""stream session heartbeats and id blocks
+
+Revision ID: 0005_stream_session_registry
+Revises: 0004_playlist_version
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# Revision identifiers, used by Alembic.
+revision = "0005_stream_session_registry"
+down_revision = "0004_playlist_version"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("stream_sessions") as batch:
+        batch.add_column(sa.Column("last_heartbeat_at", sa.DateTime(), nullable=True))
+    op.create_table(
+        "id_blocks",
+        sa.Column("name", sa.String(length=64), primary_key=True),
+        sa.Column("next_value", sa.Integer(), nullable=False),
+    )
+    # Seed the stream session counter past existing ids
+    op.execute(
+        "INSERT INTO id_blocks (name, next_value) "
+        "SELECT 'stream_sessions', COALESCE(MAX(id), 0) + 1 FROM stream_sessions"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("id_blocks")
+    with op.batch_alter_table("stream_sessions") as batch:
+        batch.drop_column("last_heartbeat_at")
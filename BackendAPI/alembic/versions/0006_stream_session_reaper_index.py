@@ -0,0 +1,24 @@
+"""index for the stream session reaper
+
+Revision ID: 0006_stream_session_reaper_index
+Revises: 0005_stream_session_registry
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+
+# Revision identifiers, used by Alembic.
+revision = "0006_stream_session_reaper_index"
+down_revision = "0005_stream_session_registry"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_stream_sessions_ended_started", "stream_sessions", ["ended_at", "started_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_stream_sessions_ended_started", table_name="stream_sessions")
@@ -0,0 +1,33 @@
+"""audio file metadata on tracks
+
+Revision ID: 0007_track_audio_metadata
+Revises: 0006_stream_session_reaper_index
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# Revision identifiers, used by Alembic.
+revision = "0007_track_audio_metadata"
+down_revision = "0006_stream_session_reaper_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("tracks") as batch:
+        batch.add_column(sa.Column("bitrate", sa.Integer(), nullable=True))
+        batch.add_column(sa.Column("sample_rate", sa.Integer(), nullable=True))
+        batch.add_column(sa.Column("file_size", sa.BigInteger(), nullable=True))
+        batch.add_column(sa.Column("file_mtime", sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("tracks") as batch:
+        batch.drop_column("file_mtime")
+        batch.drop_column("file_size")
+        batch.drop_column("sample_rate")
+        batch.drop_column("bitrate")
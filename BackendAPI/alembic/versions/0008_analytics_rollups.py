@@ -0,0 +1,52 @@
+"""analytics rollup tables
+
+Revision ID: 0008_analytics_rollups
+Revises: 0007_track_audio_metadata
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# Revision identifiers, used by Alembic.
+revision = "0008_analytics_rollups"
+down_revision = "0007_track_audio_metadata"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_track_stats",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("track_id", sa.Integer(), primary_key=True),
+        sa.Column("plays", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("events", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index("ix_daily_track_stats_track_day", "daily_track_stats", ["track_id", "day"], unique=False)
+    op.create_table(
+        "daily_user_stats",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), primary_key=True),
+        sa.Column("sessions", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("listen_seconds", sa.Float(), nullable=False, server_default="0"),
+    )
+    op.create_table(
+        "rollup_watermarks",
+        sa.Column("name", sa.String(length=64), primary_key=True),
+        sa.Column("position", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_stream_sessions_started_at", "stream_sessions", ["started_at"], unique=False)
+    op.create_index("ix_recommendation_events_created_at", "recommendation_events", ["created_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_recommendation_events_created_at", table_name="recommendation_events")
+    op.drop_index("ix_stream_sessions_started_at", table_name="stream_sessions")
+    op.drop_table("rollup_watermarks")
+    op.drop_table("daily_user_stats")
+    op.drop_index("ix_daily_track_stats_track_day", table_name="daily_track_stats")
+    op.drop_table("daily_track_stats")
@@ -0,0 +1,110 @@
+"""monthly partitions for stream_sessions and recommendation_events (Postgres)
+
+Revision ID: 0009_partition_event_tables
+Revises: 0008_analytics_rollups
+Create Date: 2026-10-19 00:00:00.000000
+
+On PostgreSQL both tables become range-partitioned by month on their timestamp
+(stream_sessions.started_at, recommendation_events.created_at), so the retention job can
+drop a whole archived month instead of deleting its rows. Existing rows are copied into
+monthly partitions; a DEFAULT partition catches rows outside the prepared months. The
+primary key becomes (id, timestamp), as Postgres requires the partition key in it.
+
+SQLite has no partitioning; there the retention job deletes archived rows in batches
+through the timestamp indexes, and this revision does nothing.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+# Revision identifiers, used by Alembic.
+revision = "0009_partition_event_tables"
+down_revision = "0008_analytics_rollups"
+branch_labels = None
+depends_on = None
+
+# table -> (partition key, indexes other than the primary key)
+TABLES = {
+    "stream_sessions": (
+        "started_at",
+        {
+            "ix_stream_sessions_id": ["id"],
+            "ix_stream_sessions_ended_started": ["ended_at", "started_at"],
+            "ix_stream_sessions_started_at": ["started_at"],
+        },
+    ),
+    "recommendation_events": (
+        "created_at",
+        {
+            "ix_recommendation_events_id": ["id"],
+            "ix_recommendation_events_created_at": ["created_at"],
+        },
+    ),
+}
+MONTHS_AHEAD = 3
+
+
+def _month_start(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + (month.month == 12), month.month % 12 + 1, 1)
+
+
+def _add_foreign_keys(table: str) -> None:
+    op.create_foreign_key(f"{table}_user_id_fkey", table, "users", ["user_id"], ["id"], ondelete="CASCADE")
+    op.create_foreign_key(f"{table}_track_id_fkey", table, "tracks", ["track_id"], ["id"], ondelete="SET NULL")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    today = _month_start(datetime.utcnow())
+    for table, (key, indexes) in TABLES.items():
+        old = f"{table}_unpartitioned"
+        oldest = bind.execute(sa.text(f"SELECT min({key}) FROM {table}")).scalar()
+        op.execute(f"ALTER TABLE {table} RENAME TO {old}")
+        # Keep the id sequence alive when the old table is dropped
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+        op.execute(f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS) PARTITION BY RANGE ({key})")
+        month = _month_start(oldest) if oldest is not None else today
+        last = today
+        for _ in range(MONTHS_AHEAD):
+            last = _next_month(last)
+        while month <= last:
+            op.execute(
+                f"CREATE TABLE {table}_p{month:%Y_%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+            )
+            month = _next_month(month)
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+        op.execute(f"INSERT INTO {table} SELECT * FROM {old}")
+        op.execute(f"DROP TABLE {old}")
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+        op.create_primary_key(f"{table}_pkey", table, ["id", key])
+        _add_foreign_keys(table)
+        for name, columns in indexes.items():
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table, (key, indexes) in TABLES.items():
+        plain = f"{table}_plain"
+        op.execute(f"CREATE TABLE {plain} (LIKE {table} INCLUDING DEFAULTS)")
+        op.execute(f"INSERT INTO {plain} SELECT * FROM {table}")
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+        # Drops every partition with it
+        op.execute(f"DROP TABLE {table}")
+        op.execute(f"ALTER TABLE {plain} RENAME TO {table}")
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+        op.create_primary_key(f"{table}_pkey", table, ["id"])
+        _add_foreign_keys(table)
+        for name, columns in indexes.items():
+            op.create_index(name, table, columns, unique=False)
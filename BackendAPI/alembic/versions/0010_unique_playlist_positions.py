@@ -0,0 +1,43 @@
+"""unique track positions within a playlist
+
+Revision ID: 0010_unique_playlist_positions
+Revises: 0009_partition_event_tables
+Create Date: 2026-10-19 00:00:00.000000
+
+Concurrent appends could give two links of one playlist the same position. Playlists with
+duplicates are renumbered in (position, track_id) order, then the (playlist_id, position)
+index becomes unique.
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# Revision identifiers, used by Alembic.
+revision = "0010_unique_playlist_positions"
+down_revision = "0009_partition_event_tables"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    duplicated = bind.execute(
+        sa.text("SELECT DISTINCT playlist_id FROM playlist_tracks GROUP BY playlist_id, position HAVING COUNT(*) > 1")
+    ).scalars().all()
+    for playlist_id in duplicated:
+        track_ids = bind.execute(
+            sa.text("SELECT track_id FROM playlist_tracks WHERE playlist_id = :p ORDER BY position, track_id"),
+            {"p": playlist_id},
+        ).scalars().all()
+        bind.execute(
+            sa.text("UPDATE playlist_tracks SET position = :pos WHERE playlist_id = :p AND track_id = :t"),
+            [{"p": playlist_id, "t": track_id, "pos": pos} for pos, track_id in enumerate(track_ids)],
+        )
+    op.drop_index("ix_playlist_tracks_playlist_position", table_name="playlist_tracks")
+    op.create_index("ix_playlist_tracks_playlist_position", "playlist_tracks", ["playlist_id", "position"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_playlist_tracks_playlist_position", table_name="playlist_tracks")
+    op.create_index("ix_playlist_tracks_playlist_position", "playlist_tracks", ["playlist_id", "position"], unique=False)
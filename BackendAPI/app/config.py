@@ -12,9 +12,114 @@ class Settings(BaseSettings):
     DATABASE_URL: str = Field(default="sqlite:///./app.db", description="SQLAlchemy database URL")
     CORS_ORIGINS: str = Field(default="", description="Comma-separated list of allowed CORS origins")
     PORT: int = Field(default=8000, description="Server port")
+    STARTUP_MODE: str = Field(
+        default="development",
+        description=(
+            "development: create tables, the audio directory and demo admin/tracks on startup. "
+            "production: no schema or seed work at startup (run alembic upgrade head and scripts.seed_demo_data explicitly)"
+        ),
+    )
+
+    # Production server (gunicorn.conf.py)
+    WEB_CONCURRENCY: int = Field(default=0, description="Gunicorn worker processes; 0 sizes to the CPUs available to the container")
+    GRACEFUL_SHUTDOWN_SECONDS: int = Field(
+        default=25, description="On SIGTERM, in-flight requests (audio streams included) get this long to finish before being cancelled"
+    )
+
+    # Trending shelf
+    TRENDING_WINDOW_MINUTES: int = Field(default=60, description="Sliding window (1-minute buckets) for trending counters")
+    TRENDING_TOP_N: int = Field(default=50, description="Maximum number of tracks served by /api/trending")
+    TRENDING_CHECKPOINT_SECONDS: float = Field(default=30.0, description="Interval between trending counter checkpoints to the DB")
+
+    # Playlist detail response cache
+    PLAYLIST_CACHE_MAX_ENTRIES: int = Field(default=10000, description="Maximum cached playlist detail responses per process")
+    PLAYLIST_CACHE_TTL_SECONDS: float = Field(default=5.0, description="Seconds a cached playlist version is trusted before re-checking the DB")
+    TRACK_CACHE_MAX_ENTRIES: int = Field(default=50000, description="Maximum cached track metadata records per process")
+    TRACK_CACHE_TTL_SECONDS: float = Field(default=60.0, description="Seconds a cached track record is used before it is reloaded")
+
+    # Streaming sessions (write-behind registry)
+    STREAM_SESSION_FLUSH_SECONDS: float = Field(default=2.0, description="Interval between batched stream session writes")
+    STREAM_SESSION_ID_BLOCK: int = Field(default=1000, description="Session ids reserved per id block allocation")
+    STREAM_HEARTBEAT_TIMEOUT_SECONDS: float = Field(default=120.0, description="Sessions without a heartbeat for this long are considered abandoned")
+    STREAM_SESSION_MAX_AGE_HOURS: float = Field(default=24.0, description="Sessions that never sent a heartbeat expire after this many hours")
+    STREAM_REAPER_SECONDS: float = Field(default=60.0, description="Interval between expired stream session reaper runs")
+    STREAM_REAPER_BATCH_SIZE: int = Field(default=1000, description="Maximum rows closed per reaper UPDATE")
+    MAX_CONCURRENT_STREAMS: int = Field(default=0, description="Maximum active streams per user across workers (0 disables the limit)")
+
+    # Signed stream URLs
+    STREAM_URL_KEYS: str = Field(
+        default="",
+        description="Comma-separated kid:secret pairs for stream URL HMACs; the first signs, all verify. Empty derives a key from SECRET_KEY",
+    )
+    STREAM_URL_TTL_SECONDS: int = Field(default=6 * 3600, description="Lifetime of signed stream URLs")
+    STREAM_URL_SIGNING_REQUIRED: bool = Field(default=True, description="Reject /static/audio requests without a valid signature")
+
+    # Listening analytics rollups
+    ANALYTICS_ROLLUP_SECONDS: float = Field(default=60.0, description="Interval between incremental analytics rollup runs")
+    ANALYTICS_SETTLE_SECONDS: float = Field(
+        default=30.0, description="Rollups lag real time by this much; must exceed STREAM_SESSION_FLUSH_SECONDS"
+    )
+    ANALYTICS_MAX_WINDOW_HOURS: float = Field(default=24.0, description="Largest slice of raw rows aggregated per rollup transaction")
+
+    # Batched API calls
+    BATCH_MAX_REQUESTS: int = Field(default=20, description="Most GET sub-requests accepted by one /api/batch call")
+
+    # Streamed uploads (playlist import, catalog ingest)
+    UPLOAD_MAX_LINE_BYTES: int = Field(default=1048576, description="Longest line accepted in a streamed NDJSON/CSV upload")
+
+    # Retention of raw stream_sessions / recommendation_events rows
+    RETENTION_DAYS: int = Field(
+        default=0, description="Archive and remove raw event rows older than this many days (whole months); 0 disables"
+    )
+    RETENTION_ARCHIVE_DIR: str = Field(default="./archive", description="Directory receiving the compressed monthly archive files")
+    RETENTION_BATCH_SIZE: int = Field(default=50000, description="Rows per archive file and per delete")
+    RETENTION_MAX_BATCHES: int = Field(default=20, description="Most batches archived per table in one retention run")
+    RETENTION_INTERVAL_SECONDS: float = Field(default=3600.0, description="Interval between retention runs")
+    PARTITION_MONTHS_AHEAD: int = Field(
+        default=3, description="Monthly partitions kept ready beyond the current month (PostgreSQL)"
+    )
+
+    # Metrics
+    METRICS_ENABLED: bool = Field(default=True, description="Record request/DB/audio metrics and serve them at /metrics")
+    METRICS_DEBUG_HEADERS: bool = Field(
+        default=False, description="Add X-DB-Queries and X-DB-Time-Ms (queries issued before the response started) to responses"
+    )
+
+    # Request profiler and slow-query log (viewed via /api/admin/profiles and /api/admin/slow-queries)
+    PROFILER_ENABLED: bool = Field(default=False, description="Install the sampling request profiler middleware")
+    PROFILER_SAMPLE_RATE: float = Field(default=0.01, description="Fraction of requests profiled and kept")
+    PROFILER_SLOW_MS: float = Field(
+        default=0.0, description="When > 0, profile every request and keep those slower than this (ms)"
+    )
+    PROFILER_INTERVAL_MS: float = Field(default=5.0, description="Stack sampling interval while a profile is open")
+    PROFILER_KEEP: int = Field(default=50, description="Profile summaries kept in the ring buffer")
+    PROFILER_TOP_STACKS: int = Field(default=30, description="Folded stacks kept per profile")
+    SLOW_QUERY_MS: float = Field(default=0.0, description="Record SQL statements slower than this (ms); 0 disables")
+    SLOW_QUERY_KEEP: int = Field(default=200, description="Slow statements kept in the ring buffer")
+    SLOW_QUERY_EXPLAIN: bool = Field(default=True, description="Capture EXPLAIN plans of slow statements in the background")
+
+    # Admission control (per worker; 0 disables a limit). Classes: api (/api/*), auth (/api/auth/*),
+    # audio (/static/audio Range requests) and download (/static/audio without Range, i.e. full files)
+    RATE_LIMIT_API_PER_SECOND: float = Field(default=0.0, description="Per-user token refill rate for API requests")
+    RATE_LIMIT_API_BURST: int = Field(default=50, description="Per-user API token bucket size")
+    RATE_LIMIT_AUDIO_PER_SECOND: float = Field(default=0.0, description="Per-user token refill rate for audio and download requests")
+    RATE_LIMIT_AUDIO_BURST: int = Field(default=30, description="Per-user audio token bucket size")
+    RATE_LIMIT_AUTH_PER_SECOND: float = Field(default=0.0, description="Per-client-address token refill rate for /api/auth requests")
+    RATE_LIMIT_AUTH_BURST: int = Field(default=10, description="Per-client-address auth token bucket size")
+    RATE_LIMIT_MAX_KEYS: int = Field(default=100000, description="Token buckets kept per class; least recently used are dropped")
+    CONCURRENCY_LIMIT_API: int = Field(default=0, description="Maximum API requests in progress")
+    CONCURRENCY_LIMIT_AUTH: int = Field(default=0, description="Maximum /api/auth requests in progress (password hashing is CPU bound)")
+    CONCURRENCY_LIMIT_AUDIO: int = Field(default=0, description="Maximum audio Range responses in progress, body included")
+    CONCURRENCY_LIMIT_DOWNLOAD: int = Field(default=0, description="Maximum full-file audio responses in progress, body included")
+    ADMISSION_RETRY_AFTER_SECONDS: int = Field(default=1, description="Retry-After sent with 503 when a concurrency limit is full")
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="allow")
 
+    # PUBLIC_INTERFACE
+    def is_production(self) -> bool:
+        """True when startup must not touch schema, seed data or the filesystem."""
+        return self.STARTUP_MODE.strip().lower() == "production"
+
     # PUBLIC_INTERFACE
     def cors_origin_list(self) -> List[str]:
         """Return parsed CORS origins as list."""
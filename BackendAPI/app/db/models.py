@@ -1,16 +1,19 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Optional
 
 from sqlalchemy import (
+    BigInteger,
     Column,
     Integer,
     String,
     Boolean,
+    Date,
     DateTime,
     ForeignKey,
     Table,
     Text,
     Float,
+    Index,
     UniqueConstraint,
 )
 from sqlalchemy.orm import declarative_base, relationship, Mapped, mapped_column
@@ -23,7 +26,10 @@ playlist_tracks_table = Table(
     Base.metadata,
     Column("playlist_id", ForeignKey("playlists.id", ondelete="CASCADE"), primary_key=True),
     Column("track_id", ForeignKey("tracks.id", ondelete="CASCADE"), primary_key=True),
+    # Stable ordering within a playlist, unique per playlist; appended tracks get max(position) + 1
+    Column("position", Integer, nullable=False, default=0),
     UniqueConstraint("playlist_id", "track_id", name="uq_playlist_track"),
+    Index("ix_playlist_tracks_playlist_position", "playlist_id", "position", unique=True),
 )
 
 
@@ -51,6 +57,11 @@ class Track(Base):
     duration: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # seconds
     cover_image: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    # Filled in by the audio library scanner from static/audio/{id}.mp3
+    bitrate: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # kbit/s (average for VBR)
+    sample_rate: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # Hz
+    file_size: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)  # bytes, for incremental rescans
+    file_mtime: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # epoch seconds, for incremental rescans
 
 
 class Playlist(Base):
@@ -63,13 +74,22 @@ class Playlist(Base):
     owner_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # Denormalized summary fields, maintained on every track add/remove
+    track_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    total_duration: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)  # seconds
+    # Bumped on every change to the playlist or its tracks; used as ETag and cache key
+    version: Mapped[int] = mapped_column(Integer, default=1, nullable=False)
 
     owner: Mapped["User"] = relationship("User", back_populates="playlists")
-    tracks: Mapped[list["Track"]] = relationship("Track", secondary=playlist_tracks_table, lazy="joined")
+    tracks: Mapped[list["Track"]] = relationship(
+        "Track", secondary=playlist_tracks_table, order_by=playlist_tracks_table.c.position, lazy="select"
+    )
 
 
 class RecommendationEvent(Base):
     __tablename__ = "recommendation_events"
+    # Analytics rollups read new events by time range
+    __table_args__ = (Index("ix_recommendation_events_created_at", "created_at"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
@@ -80,16 +100,79 @@ class RecommendationEvent(Base):
 
 class StreamSession(Base):
     __tablename__ = "stream_sessions"
+    # Lets the reaper find open sessions without scanning closed ones; analytics rollups read by start time
+    __table_args__ = (
+        Index("ix_stream_sessions_ended_started", "ended_at", "started_at"),
+        Index("ix_stream_sessions_started_at", "started_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     track_id: Mapped[int] = mapped_column(Integer, ForeignKey("tracks.id", ondelete="SET NULL"))
     started_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    last_heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     ended_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
 
-    # Helper
-    def is_active(self) -> bool:
+    # Helper (per-row check; bulk expiry is done by the stream session reaper with the same rule)
+    def is_active(self, heartbeat_timeout: timedelta = timedelta(seconds=120), max_age: timedelta = timedelta(hours=24)) -> bool:
         if self.ended_at:
             return False
-        # Consider session active for up to 24 hours unless stopped explicitly
-        return (datetime.utcnow() - self.started_at) < timedelta(hours=24)
+        now = datetime.utcnow()
+        if self.last_heartbeat_at is not None:
+            return (now - self.last_heartbeat_at) < heartbeat_timeout
+        # Without heartbeats, consider session active for up to 24 hours unless stopped explicitly
+        return (now - self.started_at) < max_age
+
+
+class IdBlock(Base):
+    """Named id counter from which processes reserve blocks of ids (e.g. stream session ids)."""
+
+    __tablename__ = "id_blocks"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    next_value: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class TrendingBucket(Base):
+    """Checkpoint of one time bucket of the in-memory trending counters."""
+
+    __tablename__ = "trending_buckets"
+
+    bucket_start: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    track_id: Mapped[int] = mapped_column(Integer, ForeignKey("tracks.id", ondelete="CASCADE"), primary_key=True)
+    plays: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+# Analytics rollups: no foreign keys, so history survives deletion or archiving of the raw rows
+class DailyTrackStats(Base):
+    """Per-track, per-day (UTC) play and event counts, maintained incrementally."""
+
+    __tablename__ = "daily_track_stats"
+    # Per-track history lookups; the primary key serves per-day reports
+    __table_args__ = (Index("ix_daily_track_stats_track_day", "track_id", "day"),)
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    track_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    plays: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    events: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class DailyUserStats(Base):
+    """Per-user, per-day (UTC) stream sessions and listening time, maintained incrementally."""
+
+    __tablename__ = "daily_user_stats"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    sessions: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    listen_seconds: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+
+class RollupWatermark(Base):
+    """Exclusive upper bound (source timestamp) up to which a rollup has consumed its raw rows."""
+
+    __tablename__ = "rollup_watermarks"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    position: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
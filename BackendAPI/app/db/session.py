@@ -5,6 +5,7 @@ from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 
 from app.config import get_settings
+from app.request_context import current_batch
 
 settings = get_settings()
 
@@ -29,7 +30,11 @@ SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, expi
 
 # PUBLIC_INTERFACE
 def get_db() -> Generator[Session, None, None]:
-    """Provide a new SQLAlchemy session per request."""
+    """Provide a new SQLAlchemy session per request (inside /api/batch, the batch's shared session)."""
+    batch = current_batch.get()
+    if batch is not None:
+        yield batch.db
+        return
     db = SessionLocal()
     try:
         yield db
@@ -0,0 +1,27 @@
+from typing import List, Sequence
+
+from sqlalchemy.orm import Session
+
+
+# PUBLIC_INTERFACE
+def upsert_add(db: Session, model, keys: Sequence[str], counters: Sequence[str], rows: List[dict]) -> None:
+    """
+    Insert rows, adding their counter columns onto existing rows with the same key
+    (INSERT ... ON CONFLICT DO UPDATE SET c = c + excluded.c). Safe for concurrent writers.
+    """
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise NotImplementedError(f"Additive upserts need ON CONFLICT support (got {dialect})")
+    table = model.__table__
+    stmt = dialect_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={c: table.c[c] + stmt.excluded[c] for c in counters},
+    )
+    db.execute(stmt, rows)
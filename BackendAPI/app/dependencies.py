@@ -4,25 +4,42 @@ from sqlalchemy.orm import Session
 
 from app.db.session import get_db
 from app.db.models import User
+from app.request_context import current_batch
 from app.security.auth import verify_token
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
-# PUBLIC_INTERFACE
-def current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme), db: Session = Depends(get_db)) -> User:
-    """Return the authenticated user from Bearer token or raise 401."""
+
+def _user_id_from_credentials(credentials: HTTPAuthorizationCredentials | None) -> int:
     if not credentials or not credentials.scheme.lower() == "bearer":
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
-    token = credentials.credentials
     try:
-        claims = verify_token(token)
+        claims = verify_token(credentials.credentials)
     except Exception:  # noqa: BLE001
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    sub = claims.get("sub")
     try:
-        user_id = int(sub)
+        return int(claims.get("sub"))
     except Exception:  # noqa: BLE001
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid subject")
+
+
+# PUBLIC_INTERFACE
+def current_user_id(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)) -> int:
+    """Return the user id from a valid Bearer token without a DB lookup, or raise 401."""
+    batch = current_batch.get()
+    if batch is not None:
+        return batch.user.id
+    return _user_id_from_credentials(credentials)
+
+
+# PUBLIC_INTERFACE
+def current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme), db: Session = Depends(get_db)) -> User:
+    """Return the authenticated user from Bearer token or raise 401."""
+    batch = current_batch.get()
+    if batch is not None:
+        # Authenticated once by /api/batch for all of its sub-requests
+        return batch.user
+    user_id = _user_id_from_credentials(credentials)
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
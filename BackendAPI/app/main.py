@@ -1,28 +1,164 @@
+from contextlib import asynccontextmanager
+
+from anyio.to_thread import current_default_thread_limiter
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import Request, HTTPException, status
-from fastapi.responses import StreamingResponse, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse, Response
 from fastapi.routing import APIRoute
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from pathlib import Path
 import os
 
+from app import metrics
 from app.config import get_settings
-from app.db.session import engine, SessionLocal
+from app.db.session import engine, SessionLocal, session_scope
 from app.db.models import Base, User, Track
+from app.middleware.admission import AdmissionMiddleware
+from app.middleware.metrics import RequestMetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.route_context import RouteContextMiddleware
 from app.routers import auth as auth_router
 from app.routers import playlists as playlists_router
 from app.routers import catalog as catalog_router
 from app.routers import recommendations as recommendations_router
 from app.routers import stream as stream_router
 from app.routers import admin as admin_router
+from app.routers import trending as trending_router
+from app.routers import batch as batch_router
+from app.security.stream_urls import get_stream_url_signer
+from app.services.admission import admission
+from app.services.analytics import refresh_rollups
+from app.services.background import BackgroundJobs
+from app.services.profiler import profiler
+from app.services.retention import retention
+from app.services.slow_queries import slow_query_log
+from app.services.stream_sessions import session_registry
+from app.services.trending import trending
 
 settings = get_settings()
 
+
+def _checkpoint_trending() -> None:
+    with session_scope() as db:
+        trending.checkpoint(db)
+
+
+def _flush_stream_sessions() -> None:
+    with SessionLocal() as db:
+        session_registry.flush(db)
+
+
+def _reap_stream_sessions() -> None:
+    with SessionLocal() as db:
+        session_registry.reap(db, batch_size=settings.STREAM_REAPER_BATCH_SIZE)
+
+
+def _refresh_analytics() -> None:
+    with SessionLocal() as db:
+        refresh_rollups(
+            db,
+            settle_seconds=settings.ANALYTICS_SETTLE_SECONDS,
+            max_window_hours=settings.ANALYTICS_MAX_WINDOW_HOURS,
+        )
+
+
+def _run_retention() -> None:
+    retention.run(engine)
+
+
+# Local development conveniences; in production the schema comes from Alembic and
+# seeding from scripts.seed_demo_data, so worker boot does no DDL, hashing or file writes.
+def _init_development() -> None:
+    Base.metadata.create_all(bind=engine)
+    AUDIO_DIR.mkdir(parents=True, exist_ok=True)
+    # Provide a tiny built-in demo file note if directory is empty (no binary content here;
+    # users can place their own .mp3 files into BackendAPI/static/audio/)
+    readme_note = AUDIO_DIR.parent / "README.txt"
+    if not readme_note.exists():
+        readme_note.write_text(
+            "Place demo .mp3 files in this directory to stream locally.\n"
+            "Example filename mapping used by /api/stream/start: {trackId}.mp3\n",
+            encoding="utf-8",
+        )
+    _seed_admin_and_demo()
+
+
+# Optionally seed a default admin for convenience in local development
+def _seed_admin_and_demo():
+    with SessionLocal() as db:  # type: Session
+        seeded = False
+        if not db.query(User).filter(User.email == "admin@example.com").first():
+            from app.security.auth import hash_password
+
+            admin = User(email="admin@example.com", username="Admin", password_hash=hash_password("admin123"), is_admin=True)
+            db.add(admin)
+            seeded = True
+        # Add a couple of demo tracks if none exist.
+        if db.query(Track).count() == 0:
+            demo_tracks = [
+                Track(title="Sunrise", artist="Aurora", album="Morning Light", genre="Ambient", duration=180),
+                Track(title="Night Drive", artist="Neon City", album="Midnight Run", genre="Synthwave", duration=240),
+            ]
+            db.add_all(demo_tracks)
+            seeded = True
+        if not seeded:
+            return
+        try:
+            # Admin and demo tracks commit together: a process racing on the unique admin email
+            # rolls back its whole seed instead of adding a second set of demo tracks
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+
+
+_startup_init_done = False
+
+
+# PUBLIC_INTERFACE
+def run_startup_init() -> None:
+    """
+    One-time per-process init work (development mode only). gunicorn.conf.py runs it in the
+    master before forking so workers inherit the result; otherwise the lifespan runs it.
+    """
+    global _startup_init_done
+    if _startup_init_done:
+        return
+    if not settings.is_production():
+        _init_development()
+    _startup_init_done = True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run startup init, start background jobs, and flush in-memory state on shutdown."""
+    run_startup_init()
+    with session_scope() as db:
+        trending.restore(db)
+    with SessionLocal() as db:
+        session_registry.recover(db)
+    session_registry.preallocate()
+    jobs = BackgroundJobs()
+    jobs.start("trending-checkpoint", settings.TRENDING_CHECKPOINT_SECONDS, _checkpoint_trending)
+    jobs.start("stream-session-flush", settings.STREAM_SESSION_FLUSH_SECONDS, _flush_stream_sessions)
+    jobs.start("stream-session-reaper", settings.STREAM_REAPER_SECONDS, _reap_stream_sessions)
+    jobs.start("analytics-rollup", settings.ANALYTICS_ROLLUP_SECONDS, _refresh_analytics)
+    if settings.RETENTION_DAYS > 0:
+        jobs.start("retention", settings.RETENTION_INTERVAL_SECONDS, _run_retention)
+    try:
+        yield
+    finally:
+        await jobs.stop()
+        _flush_stream_sessions()
+        _checkpoint_trending()
+
+
 app = FastAPI(
     title="Music Streaming Backend API",
     description="FastAPI backend powering the music streaming service",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     openapi_tags=[
         {"name": "Auth", "description": "Authentication endpoints"},
         {"name": "Playlists", "description": "Playlist management"},
@@ -30,10 +166,20 @@ app = FastAPI(
         {"name": "Recommendations", "description": "Personalized music recommendations"},
         {"name": "Streaming", "description": "Streaming session lifecycle"},
         {"name": "Admin", "description": "Administrative operations"},
+        {"name": "Trending", "description": "Trending tracks from live stream counters"},
         {"name": "Static", "description": "Static audio serving for demo (supports Range requests)"},
     ],
+    lifespan=lifespan,
 )
 
+if admission.enabled:
+    # Added before CORS so 429/503 rejections still carry CORS headers the browser can read
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=admission,
+        retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+    )
+
 # Configure CORS
 # If CORS_ORIGINS is not set, default to permissive for dev (since CRA proxy often bypasses CORS anyway)
 cors_origins = settings.cors_origin_list()
@@ -55,8 +201,23 @@ else:
         allow_headers=["*"],
     )
 
-# Initialize DB and create tables
-Base.metadata.create_all(bind=engine)
+if settings.PROFILER_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        profiler=profiler,
+        sample_rate=settings.PROFILER_SAMPLE_RATE,
+        slow_ms=settings.PROFILER_SLOW_MS,
+    )
+if settings.SLOW_QUERY_MS > 0:
+    slow_query_log.install(engine)
+
+if settings.METRICS_ENABLED:
+    # Added last so it is the outermost middleware and times everything below it
+    metrics.instrument_engine(engine)
+    app.add_middleware(RequestMetricsMiddleware, debug_headers=settings.METRICS_DEBUG_HEADERS)
+elif settings.PROFILER_ENABLED or settings.SLOW_QUERY_MS > 0:
+    # Route labels for profiles and slow queries, normally set by the metrics middleware
+    app.add_middleware(RouteContextMiddleware)
 
 # Router registration
 app.include_router(auth_router.router)
@@ -65,20 +226,11 @@ app.include_router(catalog_router.router)
 app.include_router(recommendations_router.router)
 app.include_router(stream_router.router)
 app.include_router(admin_router.router)
+app.include_router(trending_router.router)
+app.include_router(batch_router.router)
 
 # --- Static audio serving with Range support (for demo streaming) ---
 AUDIO_DIR = Path(__file__).resolve().parent.parent / "static" / "audio"
-AUDIO_DIR.mkdir(parents=True, exist_ok=True)
-
-# Provide a tiny built-in demo file note if directory is empty (no binary content here;
-# users can place their own .mp3 files into BackendAPI/app/static/audio/)
-README_NOTE = AUDIO_DIR.parent / "README.txt"
-if not README_NOTE.exists():
-    README_NOTE.write_text(
-        "Place demo .mp3 files in this directory to stream locally.\n"
-        "Example filename mapping used by /api/stream/start: {trackId}.mp3\n",
-        encoding="utf-8",
-    )
 
 
 def _range_parse(range_header: str, file_size: int) -> tuple[int, int] | None:
@@ -114,14 +266,17 @@ def _range_parse(range_header: str, file_size: int) -> tuple[int, int] | None:
     "/static/audio/{filename}",
     tags=["Static"],
     summary="Serve static audio with Range support",
-    description="Serves files from the app/static/audio directory with HTTP Range requests support for media playback.",
+    description="Serves files from the app/static/audio directory with HTTP Range requests support for media playback. Requires the signed query string returned by /api/stream/start.",
 )
 def serve_audio(filename: str, request: Request):
     """
     Serve audio files from the static directory with HTTP Range support.
-    - Path: /static/audio/{filename}
+    - Path: /static/audio/{filename}?u=..&exp=..&kid=..&sig=.. (as returned by /api/stream/start)
     - Supports 'Range: bytes=start-end' for streaming and seeking.
+    - The URL signature is checked statelessly (HMAC, no DB or JWT work) on every range request.
     """
+    if settings.STREAM_URL_SIGNING_REQUIRED and not get_stream_url_signer().verify(filename, request.query_params):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired stream URL")
     file_path = AUDIO_DIR / filename
     if not file_path.exists() or not file_path.is_file():
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
@@ -133,11 +288,16 @@ def serve_audio(filename: str, request: Request):
     if not range_header:
         # Serve full file
         def full_iter():
-            with open(file_path, "rb") as f:
-                chunk = f.read(64 * 1024)
-                while chunk:
-                    yield chunk
+            metrics.audio_responses_active.inc()
+            try:
+                with open(file_path, "rb") as f:
                     chunk = f.read(64 * 1024)
+                    while chunk:
+                        metrics.audio_bytes_served.inc(len(chunk))
+                        yield chunk
+                        chunk = f.read(64 * 1024)
+            finally:
+                metrics.audio_responses_active.dec()
 
         headers = {
             "Accept-Ranges": "bytes",
@@ -156,15 +316,20 @@ def serve_audio(filename: str, request: Request):
     length = end - start + 1
 
     def range_iter(start_pos: int, end_pos: int):
-        with open(file_path, "rb") as f:
-            f.seek(start_pos)
-            remaining = length
-            while remaining > 0:
-                chunk = f.read(min(64 * 1024, remaining))
-                if not chunk:
-                    break
-                remaining -= len(chunk)
-                yield chunk
+        metrics.audio_responses_active.inc()
+        try:
+            with open(file_path, "rb") as f:
+                f.seek(start_pos)
+                remaining = length
+                while remaining > 0:
+                    chunk = f.read(min(64 * 1024, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    metrics.audio_bytes_served.inc(len(chunk))
+                    yield chunk
+        finally:
+            metrics.audio_responses_active.dec()
 
     headers = {
         "Content-Range": f"bytes {start}-{end}/{file_size}",
@@ -175,28 +340,36 @@ def serve_audio(filename: str, request: Request):
     return StreamingResponse(range_iter(start, end), status_code=206, headers=headers, media_type=content_type)
 
 
-@app.get("/", tags=["Root"], summary="Health check", description="Simple health check/root endpoint")
-def root():
-    """Root endpoint to verify service is online."""
-    return {"status": "ok"}
+def _threadpool_usage():
+    # The limiter is per event loop, so this only works when rendered from an async endpoint
+    limiter = current_default_thread_limiter()
+    stats = limiter.statistics()
+    return [(("busy",), limiter.borrowed_tokens), (("total",), limiter.total_tokens), (("waiting",), stats.tasks_waiting)]
 
-# Optionally seed a default admin for convenience in local development
-def _seed_admin_and_demo():
-    with SessionLocal() as db:  # type: Session
-        if not db.query(User).filter(User.email == "admin@example.com").first():
-            from app.security.auth import hash_password
 
-            admin = User(email="admin@example.com", username="Admin", password_hash=hash_password("admin123"), is_admin=True)
-            db.add(admin)
-            db.commit()
-        # Add a couple of demo tracks if none exist.
-        if db.query(Track).count() == 0:
-            demo_tracks = [
-                Track(title="Sunrise", artist="Aurora", album="Morning Light", genre="Ambient", duration=180),
-                Track(title="Night Drive", artist="Neon City", album="Midnight Run", genre="Synthwave", duration=240),
-            ]
-            db.add_all(demo_tracks)
-            db.commit()
+metrics.registry.callback_gauge(
+    "threadpool_threads", "Worker threads for sync endpoints: busy, total, and tasks waiting for one", _threadpool_usage, ("state",)
+)
+metrics.registry.callback_gauge(
+    "stream_sessions_active", "Open stream sessions held by this worker", lambda: [((), session_registry.active_total())]
+)
+metrics.registry.callback_gauge(
+    "admission_concurrency", "Requests in progress and concurrency limit per admission class", admission.concurrency_usage, ("class", "state")
+)
+metrics.registry.callback_gauge(
+    "admission_rate_limit_keys", "Users/addresses with a token bucket per rate-limited class", admission.tracked_keys, ("class",)
+)
+
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus text exposition of this worker's metrics."""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
 
-_seed_admin_and_demo()
+
+@app.get("/", tags=["Root"], summary="Health check", description="Simple health check/root endpoint")
+def root():
+    """Root endpoint to verify service is online."""
+    return {"status": "ok"}
@@ -0,0 +1,364 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Counters, gauges and histograms keep one value array per writing thread: a thread only
+ever updates its own array, so the hot path is a thread-local lookup and an in-place add
+with no lock (a lock is taken once per thread, when it first writes to a metric). Reads
+sum the per-thread arrays at scrape time. When a thread exits (anyio retires idle worker
+threads), its array is folded into a shared base, so arrays are bounded by live threads. Labelled children are created once per label
+set and looked up without locking afterwards; label values must come from a bounded set
+(route templates, not raw paths).
+
+Values are per process: behind gunicorn each worker serves its own numbers, and the
+`process` label set on every sample tells them apart (scrape each worker, or aggregate
+with sum without(process)).
+"""
+import math
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100, 250)
+
+
+class _ThreadShard:
+    """Owner of one thread's array, kept in the thread's local storage; dies with the thread."""
+
+    __slots__ = ("values", "__weakref__")
+
+    def __init__(self, values: List[float]) -> None:
+        self.values = values
+
+
+class _Shards:
+    """Per-thread value arrays; each thread writes only its own, readers sum them all plus the retired base."""
+
+    __slots__ = ("_size", "_local", "_arrays", "_base", "_lock", "__weakref__")
+
+    def __init__(self, size: int) -> None:
+        self._size = size
+        self._local = threading.local()
+        # id(array) -> array of each live thread
+        self._arrays: Dict[int, List[float]] = {}
+        # Values of exited threads
+        self._base = [0.0] * size
+        # Reentrant: a thread-exit finalizer may run while this thread holds the lock
+        self._lock = threading.RLock()
+
+    def mine(self) -> List[float]:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = [0.0] * self._size
+            with self._lock:
+                self._arrays[id(values)] = values
+            shard = _ThreadShard(values)
+            weakref.finalize(shard, _retire, weakref.ref(self), values)
+            self._local.shard = shard
+            self._local.values = values
+            return values
+
+    def _retire(self, values: List[float]) -> None:
+        with self._lock:
+            if self._arrays.pop(id(values), None) is not None:
+                for i, v in enumerate(values):
+                    self._base[i] += v
+
+    def total(self) -> List[float]:
+        with self._lock:
+            arrays = [list(self._base), *self._arrays.values()]
+        return [sum(column) for column in zip(*arrays)]
+
+    def __len__(self) -> int:
+        return len(self._arrays)
+
+
+def _retire(shards_ref: "weakref.ref[_Shards]", values: List[float]) -> None:
+    shards = shards_ref()
+    if shards is not None:
+        shards._retire(values)
+
+
+class _Value:
+    """One counter or gauge sample (a single label set)."""
+
+    __slots__ = ("_shards",)
+
+    def __init__(self) -> None:
+        self._shards = _Shards(1)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._shards.mine()[0] += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._shards.mine()[0] -= amount
+
+    def get(self) -> float:
+        return self._shards.total()[0]
+
+
+class _HistogramValue:
+    """Bucket counts, total count and sum of one label set."""
+
+    __slots__ = ("_bounds", "_shards")
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self._bounds = bounds
+        # [bucket_0 .. bucket_n-1, +Inf bucket, sum]
+        self._shards = _Shards(len(bounds) + 2)
+
+    def observe(self, value: float) -> None:
+        values = self._shards.mine()
+        values[bisect_left(self._bounds, value)] += 1
+        values[-1] += value
+
+    def snapshot(self) -> Tuple[List[float], float, float]:
+        """Return (cumulative bucket counts incl. +Inf, count, sum)."""
+        values = self._shards.total()
+        cumulative = []
+        running = 0.0
+        for count in values[:-1]:
+            running += count
+            cumulative.append(running)
+        return cumulative, running, values[-1]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Return the child for one label set (created on first use)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _items(self) -> List[Tuple[Tuple[str, ...], object]]:
+        with self._lock:
+            return list(self._children.items())
+
+    def samples(self) -> Iterable[Tuple[str, Dict[str, str], float]]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._children[()].inc(amount)
+
+    def samples(self):
+        for values, child in self._items():
+            yield self.name, dict(zip(self.labelnames, values)), child.get()
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._children[()].dec(amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._children[()].observe(value)
+
+    def samples(self):
+        bounds = [_format_value(b) for b in self.buckets] + ["+Inf"]
+        for values, child in self._items():
+            labels = dict(zip(self.labelnames, values))
+            cumulative, count, total = child.snapshot()
+            for le, n in zip(bounds, cumulative):
+                yield f"{self.name}_bucket", {**labels, "le": le}, n
+            yield f"{self.name}_count", labels, count
+            yield f"{self.name}_sum", labels, total
+
+
+class CallbackGauge(_Metric):
+    """Gauge whose samples are computed at scrape time: fn() -> [(label_values, value), ...]."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, fn: Callable[[], Iterable[Tuple[Tuple[str, ...], float]]], labelnames: Sequence[str] = ()) -> None:
+        self.fn = fn
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> None:
+        return None
+
+    def samples(self):
+        for values, value in self.fn():
+            yield self.name, dict(zip(self.labelnames, values)), value
+
+
+def _format_value(value: float) -> str:
+    if not math.isfinite(value):
+        return "NaN" if math.isnan(value) else ("+Inf" if value > 0 else "-Inf")
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Registry:
+    """Holds metrics and renders them in the Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback_gauge(self, name: str, documentation: str, fn, labelnames: Sequence[str] = ()) -> CallbackGauge:
+        return self.register(CallbackGauge(name, documentation, fn, labelnames))
+
+    # PUBLIC_INTERFACE
+    def render(self) -> bytes:
+        """Render every metric in text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics)
+        # Read at render time: with preload_app the module is imported in the gunicorn master
+        process = str(os.getpid())
+        out: List[str] = []
+        for metric in metrics:
+            out.append(f"# HELP {metric.name} {metric.documentation}")
+            out.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                labels = {**labels, "process": process}
+                rendered = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+                out.append(f"{name}{{{rendered}}} {_format_value(value)}")
+        out.append("")
+        return "\n".join(out).encode("utf-8")
+
+
+registry = Registry()
+
+# HTTP
+http_requests = registry.counter("http_requests_total", "Completed HTTP requests", ("method", "route", "status"))
+http_latency = registry.histogram("http_request_duration_seconds", "Time to complete an HTTP request, body included", ("method", "route"))
+http_in_flight = registry.gauge("http_requests_in_flight", "HTTP requests currently being handled", ("method", "route"))
+
+# Database
+db_query_duration = registry.histogram("db_query_duration_seconds", "Duration of single DB cursor executions", buckets=QUERY_BUCKETS)
+db_queries_per_request = registry.histogram("http_request_db_queries", "DB queries issued per HTTP request", ("method", "route"), COUNT_BUCKETS)
+db_seconds_per_request = registry.histogram("http_request_db_seconds", "DB time spent per HTTP request", ("method", "route"), QUERY_BUCKETS)
+
+# Audio
+audio_bytes_served = registry.counter("audio_bytes_served_total", "Bytes of audio sent by /static/audio")
+audio_responses_active = registry.gauge("audio_responses_active", "/static/audio responses currently sending a body")
+
+# Caches
+track_cache_lookups = registry.counter("track_cache_lookups_total", "Track metadata cache lookups by result", ("result",))
+
+# Retention
+retention_rows_archived = registry.counter(
+    "retention_rows_archived_total", "Raw event rows written to the archive by the retention job", ("table",)
+)
+
+# Admission control
+admission_rejected = registry.counter(
+    "admission_rejected_total", "Requests turned away by admission control", ("class", "reason")
+)
+
+# Thread pool (sync endpoints and dependencies run there)
+threadpool_saturated = registry.counter(
+    "threadpool_saturated_requests_total", "Requests that arrived while every worker thread was busy"
+)
+
+
+class QueryStats:
+    """Mutable per-request DB cost; a contextvar holds it so threadpool code can add to it."""
+
+    __slots__ = ("count", "seconds")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+
+
+request_queries: ContextVar[Optional[QueryStats]] = ContextVar("request_queries", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    db_query_duration.observe(elapsed)
+    stats = request_queries.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+
+
+def _handle_error(exception_context) -> None:
+    # A failed execute never reaches after_cursor_execute: drop its start time
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+# PUBLIC_INTERFACE
+def instrument_engine(engine: Engine) -> None:
+    """Time every cursor execution on engine and attribute it to the current request, if any."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
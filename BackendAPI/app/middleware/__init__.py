@@ -0,0 +1 @@
+"""Pure ASGI middlewares (no BaseHTTPMiddleware, so streamed bodies are not buffered)."""
@@ -0,0 +1,151 @@
+"""
+Admission control in front of the routes.
+
+Each request is classed by path (/api/auth/* auth, other /api/* api, /static/audio/* audio,
+or download when it has no Range header) and checked against its class's limits before it
+can occupy a worker thread: over the per-user rate it gets 429, with every concurrency slot
+taken it gets 503, both with Retry-After. A concurrency slot is held until the response
+body has been sent, so long audio responses count for their whole duration.
+
+Rate limits are keyed by user: the Bearer token's subject for API calls (tokens are verified
+once and cached), the signed `u` parameter for audio. Unauthenticated or unverifiable
+requests, and all auth requests, are keyed by client address.
+"""
+import math
+import time
+from typing import Dict, Optional, Tuple
+
+import orjson
+from starlette.datastructures import QueryParams
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app import metrics
+from app.security.auth import verify_token
+from app.security.stream_urls import get_stream_url_signer
+from app.services.admission import AdmissionController
+
+AUDIO_PREFIX = "/static/audio/"
+TOKEN_CACHE_SIZE = 10000
+# Scope key holding (buckets, key) of an admitted rate-limited request, for charge()
+SCOPE_KEY = "admission.bucket"
+
+
+def request_class(scope: Scope) -> Optional[str]:
+    """Admission class of a request, or None for paths that are never limited (/, /metrics, docs)."""
+    path = scope["path"]
+    if path.startswith("/api/"):
+        return "auth" if path.startswith("/api/auth/") else "api"
+    if path.startswith(AUDIO_PREFIX):
+        for name, _ in scope["headers"]:
+            if name == b"range":
+                return "audio"
+        return "download"
+    return None
+
+
+# PUBLIC_INTERFACE
+def charge(scope: Scope, tokens: float) -> None:
+    """Charge extra rate-limit tokens to the key that admitted this request (no-op without a rate limit)."""
+    admitted = scope.get(SCOPE_KEY)
+    if admitted is not None and tokens > 0:
+        buckets, key = admitted
+        buckets.charge(key, tokens)
+
+
+class _TokenSubjects:
+    """Verified bearer token -> (subject, expiry); bounded, cleared when full."""
+
+    def __init__(self) -> None:
+        self._cache: Dict[str, Tuple[str, float]] = {}
+
+    def __call__(self, token: str) -> Optional[str]:
+        hit = self._cache.get(token)
+        if hit is None:
+            try:
+                claims = verify_token(token)
+                hit = (str(claims["sub"]), float(claims.get("exp") or math.inf))
+            except Exception:  # noqa: BLE001 - the route reports the 401
+                return None
+            if len(self._cache) >= TOKEN_CACHE_SIZE:
+                self._cache.clear()
+            self._cache[token] = hit
+        return hit[0] if hit[1] > time.time() else None
+
+
+class AdmissionMiddleware:
+    """Rejects requests over their class's rate or concurrency limit."""
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController, retry_after: int = 1) -> None:
+        self.app = app
+        self.controller = controller
+        self.retry_after = max(retry_after, 1)
+        self._subjects = _TokenSubjects()
+
+    def _client_key(self, scope: Scope) -> str:
+        client = scope.get("client")
+        return f"ip:{client[0]}" if client else "ip:unknown"
+
+    def _user_key(self, scope: Scope, klass: str) -> str:
+        if klass == "api":
+            for name, value in scope["headers"]:
+                if name == b"authorization":
+                    scheme, _, token = value.decode("latin-1").partition(" ")
+                    if scheme.lower() == "bearer" and token:
+                        subject = self._subjects(token.strip())
+                        if subject is not None:
+                            return f"user:{subject}"
+                    break
+        elif klass in ("audio", "download"):
+            params = QueryParams(scope["query_string"])
+            user_id = params.get("u")
+            # Only a verified signature vouches for `u`, even when STREAM_URL_SIGNING_REQUIRED is off:
+            # an unverified value would let a client pick a fresh bucket, or spend someone else's
+            if user_id and get_stream_url_signer().verify(scope["path"][len(AUDIO_PREFIX):], params):
+                return f"user:{user_id}"
+        return self._client_key(scope)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        klass = request_class(scope)
+        limits = self.controller.get(klass)
+        if limits is None:
+            await self.app(scope, receive, send)
+            return
+
+        if limits.buckets is not None:
+            key = self._user_key(scope, klass)
+            wait = limits.buckets.take(key)
+            if wait > 0:
+                metrics.admission_rejected.labels(klass, "rate").inc()
+                await _reject(send, 429, math.ceil(wait), "Rate limit exceeded")
+                return
+            scope[SCOPE_KEY] = (limits.buckets, key)
+
+        concurrency = limits.concurrency
+        if concurrency is None:
+            await self.app(scope, receive, send)
+            return
+        if not concurrency.try_acquire():
+            metrics.admission_rejected.labels(klass, "concurrency").inc()
+            await _reject(send, 503, self.retry_after, "Server busy")
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            concurrency.release()
+
+
+async def _reject(send: Send, status: int, retry_after: int, detail: str) -> None:
+    body = orjson.dumps({"detail": detail})
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            (b"retry-after", str(retry_after).encode("latin-1")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,66 @@
+"""
+Per-request metrics: latency, in-flight requests and DB cost per route template.
+
+The route is resolved up front (the same matching the router does next), so the in-flight
+gauge can carry the route label; it is also published in request_context.current_route.
+A QueryStats object is put in a contextvar for the request; the engine's cursor hooks add
+to it from whichever thread runs the query. With debug headers enabled, X-DB-Queries /
+X-DB-Time-Ms report the queries issued before the response started.
+"""
+import time
+
+from anyio.to_thread import current_default_thread_limiter
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import metrics
+from app.request_context import current_route, resolve_route
+
+
+class RequestMetricsMiddleware:
+    """Records http_* and http_request_db_* metrics for every HTTP request."""
+
+    def __init__(self, app: ASGIApp, debug_headers: bool = False) -> None:
+        self.app = app
+        self.debug_headers = debug_headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = resolve_route(scope)
+        route_token = current_route.set(route)
+        in_flight = metrics.http_in_flight.labels(method, route)
+        in_flight.inc()
+        limiter = current_default_thread_limiter()
+        if limiter.borrowed_tokens >= limiter.total_tokens:
+            metrics.threadpool_saturated.inc()
+
+        stats = metrics.QueryStats()
+        token = metrics.request_queries.set(stats)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.debug_headers:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-queries", str(stats.count).encode("latin-1")))
+                    headers.append((b"x-db-time-ms", f"{stats.seconds * 1000:.2f}".encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.request_queries.reset(token)
+            current_route.reset(route_token)
+            in_flight.dec()
+            metrics.http_requests.labels(method, route, str(status)).inc()
+            metrics.http_latency.labels(method, route).observe(elapsed)
+            metrics.db_queries_per_request.labels(method, route).observe(stats.count)
+            metrics.db_seconds_per_request.labels(method, route).observe(stats.seconds)
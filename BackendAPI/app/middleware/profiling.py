@@ -0,0 +1,54 @@
+"""
+Opt-in request profiling.
+
+A random sample of requests is profiled and always kept. With a latency threshold set,
+every request is profiled and kept only if it ran longer than the threshold, since
+slowness is only known at the end. /metrics is never profiled.
+"""
+import random
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.request_context import current_route, resolve_route
+from app.services.profiler import SamplingProfiler
+
+SKIP_PATHS = ("/metrics",)
+
+
+class ProfilingMiddleware:
+    """Feeds sampled or slow requests to a SamplingProfiler."""
+
+    def __init__(self, app: ASGIApp, profiler: SamplingProfiler, sample_rate: float = 0.0, slow_ms: float = 0.0) -> None:
+        self.app = app
+        self.profiler = profiler
+        self.sample_rate = sample_rate
+        self.slow = slow_ms / 1000.0 if slow_ms > 0 else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in SKIP_PATHS:
+            await self.app(scope, receive, send)
+            return
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        if not sampled and self.slow is None:
+            await self.app(scope, receive, send)
+            return
+
+        route = current_route.get() or resolve_route(scope)
+        profile = self.profiler.begin(scope["method"], route)
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            reason = None
+            if sampled:
+                reason = "sampled"
+            elif self.profiler.elapsed(profile) >= self.slow:
+                reason = "slow"
+            self.profiler.end(profile, status, reason)
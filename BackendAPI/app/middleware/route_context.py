@@ -0,0 +1,26 @@
+"""
+Publishes the route template in request_context.current_route.
+
+RequestMetricsMiddleware already does this; when metrics are disabled this middleware takes
+its place so the profiler and the slow-query log still label their entries by route.
+"""
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.request_context import current_route, resolve_route
+
+
+class RouteContextMiddleware:
+    """Sets current_route for the duration of each HTTP request."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = current_route.set(resolve_route(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_route.reset(token)
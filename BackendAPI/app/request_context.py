@@ -0,0 +1,63 @@
+"""
+Per-request context shared by middlewares and DB hooks.
+
+current_route holds the route template of the request being served (e.g.
+/api/playlists/{playlist_id}); it is readable from threadpool code and SQLAlchemy event
+hooks because anyio copies the context into worker threads.
+
+current_batch is set while /api/batch runs its sub-requests: get_db and the auth
+dependencies then hand out the batch's session and user instead of their own.
+"""
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+
+from starlette.routing import Match
+from starlette.types import Scope
+
+UNMATCHED = "<unmatched>"
+ROUTE_CACHE_SIZE = 4096
+
+current_route: ContextVar[Optional[str]] = ContextVar("current_route", default=None)
+
+
+class BatchScope:
+    """Authenticated user and DB session shared by the sub-requests of one /api/batch call."""
+
+    __slots__ = ("user", "db")
+
+    def __init__(self, user: Any, db: Any) -> None:
+        self.user = user
+        self.db = db
+
+
+current_batch: ContextVar[Optional[BatchScope]] = ContextVar("current_batch", default=None)
+
+
+class RouteResolver:
+    """Resolves a request scope to its route template, the same way the router matches it next."""
+
+    def __init__(self) -> None:
+        # (method, path) -> route template; bounded, cleared when full
+        self._routes: Dict[Tuple[str, str], str] = {}
+
+    def __call__(self, scope: Scope) -> str:
+        key = (scope["method"], scope["path"])
+        route = self._routes.get(key)
+        if route is not None:
+            return route
+        route = UNMATCHED
+        for candidate in scope["app"].router.routes:
+            match, _ = candidate.matches(scope)
+            if match == Match.FULL:
+                route = candidate.path
+                break
+            if match == Match.PARTIAL and route == UNMATCHED:
+                # Path matched but the method did not (405): still label it by template
+                route = candidate.path
+        if len(self._routes) >= ROUTE_CACHE_SIZE:
+            self._routes.clear()
+        self._routes[key] = route
+        return route
+
+
+resolve_route = RouteResolver()
@@ -0,0 +1,47 @@
+"""
+Line splitting for streamed request bodies (NDJSON/CSV uploads).
+
+Each chunk is scanned once: complete lines are yielded as they appear and only the
+unfinished tail is kept, so a line is never re-split, and a line longer than the limit is
+refused with 413 as soon as it exceeds it rather than buffered.
+"""
+from typing import AsyncIterator, List
+
+from fastapi import HTTPException, status
+
+
+# PUBLIC_INTERFACE
+async def aiter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[bytes]:
+    """Yield the lines of a streamed byte body without their line ending (\\n or \\r\\n)."""
+    pending: List[bytes] = []
+    pending_size = 0
+    line_no = 0
+
+    def too_long() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Line {line_no + 1}: longer than {max_line_bytes} bytes",
+        )
+
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                break
+            if pending_size + end - start > max_line_bytes:
+                raise too_long()
+            line = b"".join(pending) + chunk[start:end] if pending else chunk[start:end]
+            pending = []
+            pending_size = 0
+            line_no += 1
+            yield line[:-1] if line.endswith(b"\r") else line
+            start = end + 1
+        if start < len(chunk):
+            pending_size += len(chunk) - start
+            if pending_size > max_line_bytes:
+                raise too_long()
+            pending.append(chunk[start:])
+    if pending:
+        line = b"".join(pending)
+        yield line[:-1] if line.endswith(b"\r") else line
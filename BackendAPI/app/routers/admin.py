@@ -1,35 +1,48 @@
-from fastapi import APIRouter, Depends, Query
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.db.session import get_db
 from app.db.models import User, Track
-from app.schemas.admin import AdminCreateTrack
-from app.schemas.common import PaginatedUsers
+from app.config import get_settings
+from app.schemas.admin import (
+    AdminCreateTrack,
+    DailyStatsResponse,
+    IngestReport,
+    ProfileDetail,
+    ProfileSummary,
+    SlowQueryItem,
+    TopTracksResponse,
+    TrackDailyResponse,
+)
+from app.services import analytics
+from app.services.profiler import profiler
+from app.services.slow_queries import slow_query_log
+from app.services.track_cache import track_cache
+from app.request_lines import aiter_lines
+from app.services.catalog_ingest import CatalogIngestor, RowParser, detect_format, ingest_jobs
+from app.schemas.common import PaginatedUsers, TrackInfo
+from app.serialization import TRACK_COLUMNS, USER_COLUMNS, json_response, rows_to_dicts, track_dict
 from app.dependencies import admin_required
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
 
+settings = get_settings()
+
 
 @router.get("/users", response_model=PaginatedUsers, summary="List users (admin)")
 def list_users(page: int = Query(default=1, ge=1), page_size: int = Query(default=10, ge=1, le=100), db: Session = Depends(get_db), _: User = Depends(admin_required)):  # type: ignore  # noqa: E501
     """Return a paginated list of users for admin view."""
-    q = db.query(User).order_by(User.created_at.desc())
-    total = q.count()
-    items = q.offset((page - 1) * page_size).limit(page_size).all()
-
-    def to_dict(u: User) -> dict:
-        return {
-            "id": u.id,
-            "email": u.email,
-            "username": u.username,
-            "is_admin": u.is_admin,
-            "created_at": u.created_at.isoformat(),
-        }
-
-    return PaginatedUsers(items=[to_dict(u) for u in items], total=total)
+    total = db.scalar(select(func.count()).select_from(User))
+    rows = db.execute(select(*USER_COLUMNS).order_by(User.created_at.desc()).offset((page - 1) * page_size).limit(page_size))
+    return json_response({"items": rows_to_dicts(rows), "total": total})
 
 
-@router.post("/music", status_code=201, summary="Create music track (admin)")
+@router.post("/music", response_model=TrackInfo, status_code=201, summary="Create music track (admin)")
 def create_music(payload: AdminCreateTrack, db: Session = Depends(get_db), _: User = Depends(admin_required)):  # type: ignore
     """Create a new music track."""
     t = Track(
@@ -43,30 +56,191 @@ def create_music(payload: AdminCreateTrack, db: Session = Depends(get_db), _: Us
     db.add(t)
     db.commit()
     db.refresh(t)
-    return {
-        "id": t.id,
-        "title": t.title,
-        "artist": t.artist,
-        "album": t.album,
-        "genre": t.genre,
-        "duration": t.duration,
-        "cover_image": t.cover_image,
-    }
-
-
-@router.get("/music", summary="List music tracks (admin)")
+    track_cache.put([t])
+    return json_response(track_dict(t), status_code=201)
+
+
+@router.get("/music", response_model=List[TrackInfo], summary="List music tracks (admin)")
 def list_music(db: Session = Depends(get_db), _: User = Depends(admin_required)):  # type: ignore
     """List latest music tracks."""
-    items = db.query(Track).order_by(Track.created_at.desc()).limit(100).all()
-    return [
-        {
-            "id": t.id,
-            "title": t.title,
-            "artist": t.artist,
-            "album": t.album,
-            "genre": t.genre,
-            "duration": t.duration,
-            "cover_image": t.cover_image,
+    rows = db.execute(select(*TRACK_COLUMNS).order_by(Track.created_at.desc()).limit(100))
+    return json_response(rows_to_dicts(rows))
+
+
+@router.post(
+    "/music/import",
+    response_model=IngestReport,
+    summary="Bulk import music tracks (admin)",
+    description=(
+        "Stream a CSV (with header row) or NDJSON body of tracks (title, artist, album, genre, duration, cover_image). "
+        "Rows are validated incrementally and inserted in chunked multi-row INSERTs; invalid rows are reported, not fatal. "
+        "Format comes from ?format= or the Content-Type (text/csv, application/x-ndjson)."
+    ),
+    openapi_extra={
+        "requestBody": {
+            "content": {"text/csv": {"schema": {"type": "string"}}, "application/x-ndjson": {"schema": {"type": "string"}}},
+            "required": True,
         }
-        for t in items
-    ]
+    },
+)
+async def import_music(
+    request: Request,
+    format: Optional[str] = Query(default=None, description="csv or ndjson"),
+    chunk_size: int = Query(default=1000, ge=1, le=10000),
+    db: Session = Depends(get_db),
+    _: User = Depends(admin_required),
+):
+    """Ingest a streamed catalog upload; progress is visible at GET /api/admin/music/imports."""
+    fmt = detect_format(request.headers.get("content-type"), format)
+    if fmt is None:
+        raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson")
+    progress = ingest_jobs.create(request.headers.get("x-filename") or f"upload.{fmt}")
+    ingestor = CatalogIngestor(db, progress, chunk_size=chunk_size)
+    parser = RowParser(fmt, max_record_chars=settings.UPLOAD_MAX_LINE_BYTES)
+    batch: List[tuple] = []
+
+    def consume(rows: List[tuple]) -> None:
+        for line_no, row in rows:
+            ingestor.add(line_no, row)
+
+    try:
+        async for line in aiter_lines(request.stream(), settings.UPLOAD_MAX_LINE_BYTES):
+            parsed = parser.feed(line)
+            if parsed is not None:
+                batch.append(parsed)
+            # Hand rows to the threadpool in groups so validation/INSERTs don't block the event loop
+            if len(batch) >= chunk_size:
+                await run_in_threadpool(consume, batch)
+                batch = []
+        tail = parser.close()
+        if tail is not None:
+            batch.append(tail)
+        if batch:
+            await run_in_threadpool(consume, batch)
+        await run_in_threadpool(ingestor.finish)
+    except BaseException:
+        ingestor.abort()
+        raise
+    return progress.as_dict()
+
+
+@router.get("/music/imports", response_model=List[IngestReport], summary="Recent bulk imports (admin)")
+def list_music_imports(_: User = Depends(admin_required)):  # type: ignore
+    """Progress and results of recent bulk imports handled by this worker, newest first."""
+    return ingest_jobs.list()
+
+
+def _date_range(start: Optional[date], end: Optional[date], default_days: int = 30) -> Tuple[date, date]:
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=default_days - 1)
+    if start > end:
+        raise HTTPException(status_code=422, detail="start must not be after end")
+    return start, end
+
+
+@router.get(
+    "/stats/daily",
+    response_model=DailyStatsResponse,
+    summary="Daily listening stats (admin)",
+    description="Per-day plays, events, active users and listening time, read from the incremental rollups (defaults to the last 30 days).",
+)
+def stats_daily(
+    start: Optional[date] = Query(default=None, description="First UTC day (YYYY-MM-DD)"),
+    end: Optional[date] = Query(default=None, description="Last UTC day (YYYY-MM-DD), inclusive"),
+    db: Session = Depends(get_db),
+    _: User = Depends(admin_required),
+):
+    """Return per-day totals from daily_track_stats/daily_user_stats."""
+    start, end = _date_range(start, end)
+    return {"days": analytics.daily_totals(db, start, end), "as_of": analytics.watermarks(db)}
+
+
+@router.get(
+    "/stats/top-tracks",
+    response_model=TopTracksResponse,
+    summary="Most played tracks (admin)",
+    description="Tracks ranked by plays over a day range, read from the incremental rollups (defaults to the last 30 days).",
+)
+def stats_top_tracks(
+    start: Optional[date] = Query(default=None, description="First UTC day (YYYY-MM-DD)"),
+    end: Optional[date] = Query(default=None, description="Last UTC day (YYYY-MM-DD), inclusive"),
+    limit: int = Query(default=20, ge=1, le=200),
+    db: Session = Depends(get_db),
+    _: User = Depends(admin_required),
+):
+    """Return the most played tracks from daily_track_stats."""
+    start, end = _date_range(start, end)
+    return {"items": analytics.top_tracks(db, start, end, limit), "as_of": analytics.watermarks(db)}
+
+
+@router.get(
+    "/stats/tracks/{track_id}/daily",
+    response_model=TrackDailyResponse,
+    summary="Daily plays of a track (admin)",
+    description="Per-day plays and events of one track, read from the incremental rollups (defaults to the last 30 days).",
+)
+def stats_track_daily(
+    track_id: int,
+    start: Optional[date] = Query(default=None, description="First UTC day (YYYY-MM-DD)"),
+    end: Optional[date] = Query(default=None, description="Last UTC day (YYYY-MM-DD), inclusive"),
+    db: Session = Depends(get_db),
+    _: User = Depends(admin_required),
+):
+    """Return one track's per-day history from daily_track_stats."""
+    start, end = _date_range(start, end)
+    return {"track_id": track_id, "days": analytics.track_daily(db, track_id, start, end), "as_of": analytics.watermarks(db)}
+
+
+@router.get(
+    "/profiles",
+    response_model=List[ProfileSummary],
+    summary="Recent request profiles (admin)",
+    description="Summaries of sampled or slow requests kept by the sampling profiler (PROFILER_ENABLED), newest first.",
+)
+def list_profiles(
+    route: Optional[str] = Query(default=None, description="Only this route template, e.g. /api/playlists/{playlist_id}"),
+    limit: int = Query(default=50, ge=1, le=500),
+    _: User = Depends(admin_required),  # type: ignore
+):
+    """Return recent profile summaries from this worker's ring buffer."""
+    if not settings.PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler is disabled (set PROFILER_ENABLED=true)")
+    return profiler.recent(limit=limit, route=route)
+
+
+@router.get(
+    "/profiles/{profile_id}",
+    response_model=ProfileDetail,
+    summary="One request profile (admin)",
+    description="Top functions and folded stacks of one profile. format=folded returns 'stack count' lines for flame graph tools.",
+)
+def get_profile(
+    profile_id: int,
+    format: str = Query(default="json", pattern="^(json|folded)$"),
+    _: User = Depends(admin_required),  # type: ignore
+):
+    """Return one profile, as JSON or as folded stacks."""
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found (it may have been rotated out)")
+    if format == "folded":
+        body = "".join(f"{s['stack']} {s['samples']}\n" for s in profile["stacks"])
+        return Response(content=body, media_type="text/plain; charset=utf-8")
+    return profile
+
+
+@router.get(
+    "/slow-queries",
+    response_model=List[SlowQueryItem],
+    summary="Slow SQL statements (admin)",
+    description="Statements slower than SLOW_QUERY_MS with parameters, originating route and EXPLAIN plan, newest first.",
+)
+def list_slow_queries(
+    route: Optional[str] = Query(default=None, description="Only statements issued by this route template"),
+    limit: int = Query(default=50, ge=1, le=500),
+    _: User = Depends(admin_required),  # type: ignore
+):
+    """Return recent slow statements from this worker's ring buffer."""
+    if settings.SLOW_QUERY_MS <= 0:
+        raise HTTPException(status_code=404, detail="Slow-query log is disabled (set SLOW_QUERY_MS > 0)")
+    return slow_query_log.recent(limit=limit, route=route)
@@ -0,0 +1,204 @@
+"""
+POST /api/batch: several GET requests in one round trip.
+
+The caller is authenticated once (Bearer token plus one user lookup) and every sub-request
+sees that user and one shared DB session through current_batch. Sub-requests are dispatched
+in-process to the matched route, concurrently; those whose route depends on get_db take turns
+on the shared session under a per-batch lock, the rest run unrestricted. Middlewares (admission,
+metrics, CORS) apply to the batch as a whole, and its DB cost is reported under /api/batch; the
+API rate limit is charged one token per sub-request.
+"""
+import logging
+from typing import Dict, List, Optional
+from urllib.parse import unquote
+
+import anyio
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.routing import APIRoute
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Match
+from starlette.types import Message, Scope
+
+from app.config import get_settings
+from app.db.models import User
+from app.db.session import get_db
+from app.dependencies import current_user
+from app.middleware.admission import charge
+from app.request_context import BatchScope, current_batch, current_route
+from app.schemas.batch import BatchItem, BatchRequest, BatchResponse
+from app.serialization import JSON_MEDIA_TYPE
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api", tags=["Batch"])
+
+settings = get_settings()
+
+# Response headers copied into each item (lowercase)
+FORWARDED_HEADERS = (b"etag",)
+
+# id(route) -> whether any of its dependencies is get_db (routes define __eq__, so are unhashable)
+_db_routes: Dict[int, bool] = {}
+
+
+def _uses_db(dependant) -> bool:
+    return any(d.call is get_db or _uses_db(d) for d in dependant.dependencies)
+
+
+def _route_uses_db(route) -> bool:
+    uses = _db_routes.get(id(route))
+    if uses is None:
+        uses = isinstance(route, APIRoute) and _uses_db(route.dependant)
+        _db_routes[id(route)] = uses
+    return uses
+
+
+def _sub_scope(outer: Scope, item: BatchItem) -> Scope:
+    path, _, query = item.path.partition("?")
+    return {
+        "type": "http",
+        "asgi": outer.get("asgi", {"version": "3.0"}),
+        "http_version": outer.get("http_version", "1.1"),
+        "method": "GET",
+        "scheme": outer.get("scheme", "http"),
+        "server": outer.get("server"),
+        "client": outer.get("client"),
+        "root_path": outer.get("root_path", ""),
+        "path": unquote(path),
+        "raw_path": path.encode("latin-1"),
+        "query_string": query.encode("latin-1"),
+        "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in item.headers.items()],
+        "app": outer["app"],
+        "state": outer.get("state", {}),
+        "starlette.exception_handlers": outer["starlette.exception_handlers"],
+    }
+
+
+def _match(scope: Scope):
+    """(route, child scope) for the route handling scope, or (None, status) when none does."""
+    partial = False
+    for route in scope["app"].router.routes:
+        match, child = route.matches(scope)
+        if match == Match.FULL:
+            return route, child
+        partial = partial or match == Match.PARTIAL
+    return None, status.HTTP_405_METHOD_NOT_ALLOWED if partial else status.HTTP_404_NOT_FOUND
+
+
+def _item_bytes(item_id: Optional[str], code: int, headers: Dict[str, str], content_type: str, body: bytes) -> bytes:
+    if not body:
+        encoded = b"null"
+    elif content_type.startswith(JSON_MEDIA_TYPE):
+        # Already JSON: splice it in instead of parsing and re-encoding
+        encoded = body
+    else:
+        encoded = orjson.dumps(body.decode("utf-8", "replace"))
+    head = orjson.dumps({"id": item_id, "status": code, "headers": headers})
+    return head[:-1] + b',"body":' + encoded + b"}"
+
+
+def _error_bytes(item_id: Optional[str], code: int, detail: str) -> bytes:
+    return _item_bytes(item_id, code, {}, JSON_MEDIA_TYPE, orjson.dumps({"detail": detail}))
+
+
+class _Batch:
+    """Runs the sub-requests of one batch and collects their encoded response items."""
+
+    def __init__(self, request: Request, db: Session, items: List[BatchItem]) -> None:
+        self.scope = request.scope
+        self.db = db
+        self.items = items
+        self.results: List[bytes] = [b""] * len(items)
+        self.db_lock = anyio.Lock()
+
+    async def run(self) -> bytes:
+        async with anyio.create_task_group() as tg:
+            for index in range(len(self.items)):
+                tg.start_soon(self._run_item, index)
+        return b'{"responses":[' + b",".join(self.results) + b"]}"
+
+    async def _run_item(self, index: int) -> None:
+        item = self.items[index]
+        scope = _sub_scope(self.scope, item)
+        route, child = _match(scope)
+        if route is None:
+            self.results[index] = _error_bytes(item.id, child, "Not Found" if child == 404 else "Method Not Allowed")
+            return
+        scope.update(child)
+        current_route.set(route.path)
+        if not _route_uses_db(route):
+            self.results[index] = await self._dispatch(item, route, scope, uses_db=False)
+            return
+        async with self.db_lock:
+            self.results[index] = await self._dispatch(item, route, scope, uses_db=True)
+
+    async def _dispatch(self, item: BatchItem, route, scope: Scope, uses_db: bool) -> bytes:
+        started: Dict[str, object] = {}
+        chunks: List[bytes] = []
+        finished = anyio.Event()
+        request_sent = False
+
+        async def receive() -> Message:
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # Streaming responses listen for a disconnect until they are done
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                started.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        try:
+            await route.handle(scope, receive, send)
+        except HTTPException as exc:
+            return _error_bytes(item.id, exc.status_code, str(exc.detail))
+        except Exception:  # noqa: BLE001 - one failing sub-request must not fail the batch
+            logger.exception("Batch sub-request GET %s failed", item.path)
+            if uses_db:
+                # Leave the shared session usable for the remaining sub-requests
+                await run_in_threadpool(self.db.rollback)
+            return _error_bytes(item.id, status.HTTP_500_INTERNAL_SERVER_ERROR, "Internal Server Error")
+        finally:
+            finished.set()
+
+        headers: Dict[str, str] = {}
+        content_type = ""
+        for name, value in started.get("headers", ()):
+            if name == b"content-type":
+                content_type = value.decode("latin-1")
+            elif name in FORWARDED_HEADERS:
+                headers[name.decode("latin-1")] = value.decode("latin-1")
+        return _item_bytes(item.id, started.get("status", 500), headers, content_type, b"".join(chunks))
+
+
+@router.post(
+    "/batch",
+    response_model=BatchResponse,
+    summary="Run several GET requests in one call",
+    description=(
+        "Runs each GET sub-request against the API concurrently with the caller's credentials, "
+        "authenticated once and sharing one DB session. Always 200; each item carries its own status."
+    ),
+)
+async def run_batch(payload: BatchRequest, request: Request, user: User = Depends(current_user), db: Session = Depends(get_db)):
+    """Run the batch's GET sub-requests and return their responses in request order."""
+    if len(payload.requests) > settings.BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {settings.BATCH_MAX_REQUESTS} requests per batch",
+        )
+    # The admission middleware took one token for the batch itself
+    charge(request.scope, len(payload.requests) - 1)
+    token = current_batch.set(BatchScope(user, db))
+    try:
+        body = await _Batch(request, db, payload.requests).run()
+    finally:
+        current_batch.reset(token)
+    return Response(content=body, media_type=JSON_MEDIA_TYPE)
@@ -1,11 +1,13 @@
 from typing import Optional
 
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
 from app.db.models import Track
 from app.schemas.catalog import CatalogSearchResponse
+from app.serialization import TRACK_COLUMNS, json_response, rows_to_dicts
 from app.dependencies import current_user, User  # type: ignore
 
 router = APIRouter(prefix="/api/catalog", tags=["Catalog"])
@@ -23,27 +25,16 @@ def search_catalog(
     user: User = Depends(current_user),  # noqa: ARG001
 ):
     """Perform a simple LIKE-based search on Track fields."""
-    q = db.query(Track)
-    q = q.filter(Track.title.ilike(f"%{query}%") | Track.artist.ilike(f"%{query}%") | Track.album.ilike(f"%{query}%"))
+    filters = [Track.title.ilike(f"%{query}%") | Track.artist.ilike(f"%{query}%") | Track.album.ilike(f"%{query}%")]
     if genre:
-        q = q.filter(Track.genre.ilike(f"%{genre}%"))
+        filters.append(Track.genre.ilike(f"%{genre}%"))
     if artist:
-        q = q.filter(Track.artist.ilike(f"%{artist}%"))
+        filters.append(Track.artist.ilike(f"%{artist}%"))
     if album:
-        q = q.filter(Track.album.ilike(f"%{album}%"))
+        filters.append(Track.album.ilike(f"%{album}%"))
 
-    total = q.count()
-    items = q.order_by(Track.created_at.desc()).offset((page - 1) * page_size).limit(page_size).all()
-
-    def to_dict(t: Track) -> dict:
-        return {
-            "id": t.id,
-            "title": t.title,
-            "artist": t.artist,
-            "album": t.album,
-            "genre": t.genre,
-            "duration": t.duration,
-            "cover_image": t.cover_image,
-        }
-
-    return CatalogSearchResponse(items=[to_dict(t) for t in items], total=total)
+    total = db.scalar(select(func.count()).select_from(Track).where(*filters))
+    page_rows = db.execute(
+        select(*TRACK_COLUMNS).where(*filters).order_by(Track.created_at.desc()).offset((page - 1) * page_size).limit(page_size)
+    )
+    return json_response({"items": rows_to_dicts(page_rows), "total": total})
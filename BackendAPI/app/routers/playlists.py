@@ -1,34 +1,75 @@
-from typing import List, Optional
+import json
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.db.session import get_db
-from app.db.models import Playlist, Track, User, playlist_tracks_table
-from app.schemas.playlists import PlaylistCreate, PlaylistUpdate, PlaylistSummary, PlaylistDetail, TrackInfo
-from app.dependencies import current_user
+from app.config import get_settings
+from app.db.session import SessionLocal, get_db
+from app.db.models import Playlist, User, playlist_tracks_table
+from app.schemas.playlists import (
+    PlaylistCreate,
+    PlaylistUpdate,
+    PlaylistSummary,
+    PlaylistDetail,
+    PlaylistImportTrack,
+    PlaylistTracksPage,
+)
+from app.dependencies import current_user, current_user_id
+from app.request_lines import aiter_lines
+from app.serialization import PLAYLIST_SUMMARY_COLUMNS, json_bytes, json_response, rows_to_dicts
+from app.services import playlists as playlist_service
+from app.services.playlist_cache import CachedPlaylist, etag_matches, playlist_cache
 
 router = APIRouter(prefix="/api/playlists", tags=["Playlists"])
 
+settings = get_settings()
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+IMPORT_CHUNK_SIZE = 1000
+
 
 def to_summary(p: Playlist) -> PlaylistSummary:
-    return PlaylistSummary(id=p.id, name=p.name, description=p.description, cover_image=p.cover_image)
+    return PlaylistSummary(
+        id=p.id,
+        name=p.name,
+        description=p.description,
+        cover_image=p.cover_image,
+        track_count=p.track_count or 0,
+        total_duration=p.total_duration or 0.0,
+    )
+
+
+def detail_dict(p: Playlist, db: Session) -> dict:
+    tracks = playlist_service.track_rows(db, p.id)
+    for row in tracks:
+        del row["position"]
+    return {**to_summary(p).model_dump(), "tracks": tracks}
 
 
-def to_trackinfo(t: Track) -> TrackInfo:
-    return TrackInfo(id=t.id, title=t.title, artist=t.artist, album=t.album, genre=t.genre, duration=t.duration, cover_image=t.cover_image)
+def _cache_detail(p: Playlist, db: Session) -> CachedPlaylist:
+    body = json_bytes(detail_dict(p, db))
+    return playlist_cache.put(p.id, p.owner_id, p.version, body)
 
 
-def to_detail(p: Playlist) -> PlaylistDetail:
-    tracks = [to_trackinfo(t) for t in (p.tracks or [])]
-    return PlaylistDetail(id=p.id, name=p.name, description=p.description, cover_image=p.cover_image, tracks=tracks)
+def _detail_response(entry: CachedPlaylist, if_none_match: Optional[str]) -> Response:
+    headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, entry.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
 
 
 @router.get("", response_model=List[PlaylistSummary], summary="List user playlists", description="Return current user's playlists")
 def list_playlists(user: User = Depends(current_user), db: Session = Depends(get_db)):
     """Return the current user's playlists."""
-    items = db.query(Playlist).filter(Playlist.owner_id == user.id).order_by(Playlist.created_at.desc()).all()
-    return [to_summary(p) for p in items]
+    rows = db.execute(
+        select(*PLAYLIST_SUMMARY_COLUMNS).where(Playlist.owner_id == user.id).order_by(Playlist.created_at.desc())
+    )
+    return json_response(rows_to_dicts(rows))
 
 
 @router.post("", response_model=PlaylistSummary, status_code=201, summary="Create playlist")
@@ -41,13 +82,173 @@ def create_playlist(payload: PlaylistCreate, user: User = Depends(current_user),
     return to_summary(p)
 
 
-@router.get("/{playlist_id}", response_model=PlaylistDetail, summary="Get playlist details")
-def get_playlist(playlist_id: int, user: User = Depends(current_user), db: Session = Depends(get_db)):
-    """Get details for a playlist owned by the user."""
+async def _ndjson_lines(request: Request) -> AsyncIterator[Tuple[int, dict]]:
+    """Incrementally parse an NDJSON request body, yielding (line_number, object) pairs."""
+    line_no = 0
+
+    def parse(raw: bytes) -> Optional[dict]:
+        raw = raw.strip()
+        if not raw:
+            return None
+        try:
+            obj = json.loads(raw)
+        except ValueError:
+            raise HTTPException(status_code=422, detail=f"Line {line_no}: invalid JSON")
+        if not isinstance(obj, dict):
+            raise HTTPException(status_code=422, detail=f"Line {line_no}: expected a JSON object")
+        return obj
+
+    async for raw in aiter_lines(request.stream(), settings.UPLOAD_MAX_LINE_BYTES):
+        line_no += 1
+        obj = parse(raw)
+        if obj is not None:
+            yield line_no, obj
+
+
+@router.post(
+    "/import",
+    response_model=PlaylistSummary,
+    status_code=201,
+    summary="Import playlist (NDJSON)",
+    description=(
+        "Create a playlist from an NDJSON body. The first line is the playlist ({name, description?, cover_image?}); "
+        "each following line is a track ({id, title?, artist?, ...}). Tracks are inserted in chunks of "
+        f"{IMPORT_CHUNK_SIZE} inside a single transaction."
+    ),
+    openapi_extra={"requestBody": {"content": {NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}}}, "required": True}},
+)
+async def import_playlist(request: Request, user: User = Depends(current_user), db: Session = Depends(get_db)):
+    """Import a playlist streamed as NDJSON without buffering the whole body."""
+    p: Optional[Playlist] = None
+    pending: List[PlaylistImportTrack] = []
+
+    def flush_chunk(items: List[PlaylistImportTrack]) -> None:
+        ids = [t.id for t in items]
+        playlist_service.ensure_tracks(db, ids, {t.id: t.model_dump(exclude={"id"}) for t in items})
+        playlist_service.add_tracks(db, p.id, ids)
+
+    try:
+        async for line_no, obj in _ndjson_lines(request):
+            try:
+                if p is None:
+                    header = PlaylistCreate.model_validate(obj)
+                    p = Playlist(name=header.name, description=header.description, cover_image=header.cover_image, owner_id=user.id)
+                    db.add(p)
+                    await run_in_threadpool(db.flush)
+                    continue
+                pending.append(PlaylistImportTrack.model_validate(obj))
+            except ValidationError as exc:
+                raise HTTPException(status_code=422, detail=f"Line {line_no}: {exc.errors()[0]['msg']}")
+            if len(pending) >= IMPORT_CHUNK_SIZE:
+                await run_in_threadpool(flush_chunk, pending)
+                pending = []
+        if p is None:
+            raise HTTPException(status_code=422, detail="Empty import: first line must describe the playlist")
+        if pending:
+            await run_in_threadpool(flush_chunk, pending)
+
+        def finish() -> None:
+            playlist_service.refresh_totals(db, [p.id])
+            db.commit()
+            db.refresh(p)
+
+        await run_in_threadpool(finish)
+    except BaseException:
+        await run_in_threadpool(db.rollback)
+        raise
+    return to_summary(p)
+
+
+@router.get(
+    "/{playlist_id}/export",
+    summary="Export playlist (NDJSON)",
+    description="Stream the playlist as NDJSON: a playlist line followed by one line per track in order.",
+    response_class=StreamingResponse,
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+)
+def export_playlist(playlist_id: int, user: User = Depends(current_user), db: Session = Depends(get_db)):
+    """Export a playlist using a server-side cursor so memory stays constant regardless of size."""
     p = db.query(Playlist).filter(Playlist.id == playlist_id, Playlist.owner_id == user.id).first()
     if not p:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Playlist not found")
-    return to_detail(p)
+    header = to_summary(p).model_dump_json(include={"name", "description", "cover_image"})
+
+    def generate() -> Iterator[bytes]:
+        yield header.encode("utf-8") + b"\n"
+        # The request-scoped session is closed once the response starts, so stream from a dedicated one
+        with SessionLocal() as stream_db:
+            batch: List[bytes] = []
+            for row in playlist_service.iter_track_rows(stream_db, playlist_id):
+                row.pop("position", None)
+                batch.append(json.dumps(row, separators=(",", ":")).encode("utf-8"))
+                if len(batch) >= 500:
+                    yield b"\n".join(batch) + b"\n"
+                    batch = []
+            if batch:
+                yield b"\n".join(batch) + b"\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="playlist-{playlist_id}.ndjson"'},
+    )
+
+
+@router.get(
+    "/{playlist_id}",
+    response_model=PlaylistDetail,
+    summary="Get playlist details",
+    description="Returns an ETag (playlist version). Polls with a matching If-None-Match get 304 Not Modified.",
+    responses={304: {"description": "Playlist unchanged since the given ETag"}},
+)
+def get_playlist(
+    playlist_id: int,
+    if_none_match: Optional[str] = Header(default=None),
+    user_id: int = Depends(current_user_id),
+    db: Session = Depends(get_db),
+):
+    """Get details for a playlist owned by the user, served from the versioned response cache when possible."""
+    entry = playlist_cache.get(playlist_id)
+    if entry is not None and entry.owner_id == user_id:
+        if playlist_cache.is_fresh(entry):
+            return _detail_response(entry, if_none_match)
+        # Cheap revalidation: compare the cached version with the stored one
+        version = db.query(Playlist.version).filter(Playlist.id == playlist_id, Playlist.owner_id == user_id).scalar()
+        if version == entry.version:
+            playlist_cache.mark_checked(entry)
+            return _detail_response(entry, if_none_match)
+
+    p = db.query(Playlist).filter(Playlist.id == playlist_id, Playlist.owner_id == user_id).first()
+    if not p:
+        if entry is not None and entry.owner_id == user_id:
+            playlist_cache.invalidate([playlist_id])
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Playlist not found")
+    return _detail_response(_cache_detail(p, db), if_none_match)
+
+
+@router.get("/{playlist_id}/tracks", response_model=PlaylistTracksPage, summary="List playlist tracks (paginated)")
+def list_playlist_tracks(
+    playlist_id: int,
+    after: Optional[int] = Query(default=None, ge=-1, description="Return tracks after this position (keyset cursor)"),
+    after_track: Optional[int] = Query(default=None, description="Track id at position 'after' (keyset tie-breaker)"),
+    limit: int = Query(default=100, ge=1, le=500),
+    user: User = Depends(current_user),
+    db: Session = Depends(get_db),
+):
+    """Return one page of a playlist's tracks ordered by position, using keyset paging on (position, track id)."""
+    owned = db.query(Playlist.id).filter(Playlist.id == playlist_id, Playlist.owner_id == user.id).first()
+    if not owned:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Playlist not found")
+    rows = playlist_service.track_rows(db, playlist_id, after_position=after, limit=limit + 1, after_track=after_track)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return json_response(
+        {
+            "items": rows,
+            "next_after": rows[-1]["position"] if has_more else None,
+            "next_after_track": rows[-1]["id"] if has_more else None,
+        }
+    )
 
 
 @router.patch("/{playlist_id}", response_model=PlaylistDetail, summary="Update playlist (metadata and track ops)")
@@ -56,6 +257,8 @@ def update_playlist(playlist_id: int, payload: PlaylistUpdate, user: User = Depe
     p = db.query(Playlist).filter(Playlist.id == playlist_id, Playlist.owner_id == user.id).first()
     if not p:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Playlist not found")
+    # Bumped first: concurrent PATCHes of this playlist wait here and each gets its own version
+    version = playlist_service.bump_version(db, p.id)
 
     # Metadata updates
     if payload.name is not None:
@@ -65,27 +268,25 @@ def update_playlist(playlist_id: int, payload: PlaylistUpdate, user: User = Depe
     if payload.cover_image is not None:
         p.cover_image = payload.cover_image
 
-    # Track operations
+    # Track operations (set-based: one IN lookup per chunk, one multi-row INSERT, one DELETE)
     if payload.add_tracks:
         # Ensure tracks exist; create placeholders if they don't
-        for tid in payload.add_tracks:
-            track = db.query(Track).filter(Track.id == tid).first()
-            if not track:
-                # Create a minimal placeholder track for demo purposes
-                track = Track(id=tid, title=f"Track {tid}", artist="Unknown")
-                db.add(track)
-                db.flush()
-            # Link if not already present
-            if track not in p.tracks:
-                p.tracks.append(track)
+        playlist_service.ensure_tracks(db, payload.add_tracks)
+        playlist_service.add_tracks(db, p.id, payload.add_tracks)
 
     if payload.remove_tracks:
-        p.tracks = [t for t in p.tracks if t.id not in set(payload.remove_tracks)]
+        playlist_service.remove_tracks(db, p.id, payload.remove_tracks)
 
-    db.add(p)
-    db.commit()
+    if payload.add_tracks or payload.remove_tracks:
+        playlist_service.refresh_totals(db, [p.id])
+
+    db.flush()
     db.refresh(p)
-    return to_detail(p)
+    # Serialized in the same transaction as the bump, so the body is exactly that version's
+    body = json_bytes(detail_dict(p, db))
+    db.commit()
+    # Write-through: the PATCH response body is the new cached detail (put keeps a newer version)
+    return _detail_response(playlist_cache.put(playlist_id, user.id, version, body), None)
 
 
 @router.delete("/{playlist_id}", status_code=204, summary="Delete playlist")
@@ -96,4 +297,5 @@ def delete_playlist(playlist_id: int, user: User = Depends(current_user), db: Se
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Playlist not found")
     db.delete(p)
     db.commit()
+    playlist_cache.invalidate([playlist_id])
     return
@@ -5,57 +5,79 @@ from pathlib import Path
 
 from app.db.session import get_db
 from app.db.models import StreamSession, Track, User
-from app.schemas.stream import StreamStartRequest, StreamStopRequest, StreamStartResponse
-from app.dependencies import current_user
+from app.schemas.stream import StreamStartRequest, StreamStopRequest, StreamStartResponse, StreamHeartbeatRequest
+from app.dependencies import current_user, current_user_id
+from app.config import get_settings
+from app.security.stream_urls import signed_stream_url
+from app.serialization import json_response
+from app.services.stream_sessions import ConcurrentStreamLimitExceeded, HeartbeatBacklogFull, session_registry
+from app.services.track_cache import track_cache
+from app.services.trending import trending, track_meta
 
 router = APIRouter(prefix="/api/stream", tags=["Streaming"])
 
 STATIC_AUDIO_DIR = Path(__file__).resolve().parents[1] / "static" / "audio"
 
+settings = get_settings()
+
 @router.post(
     "/start",
     response_model=StreamStartResponse,
     summary="Start music stream",
-    description="Start a streaming session and return a stream URL. For demo, serves /static/audio/{trackId}.mp3 if available.",
+    description="Start a streaming session and return a signed, expiring stream URL. For demo, serves /static/audio/{trackId}.mp3 if available.",
 )
 def start_stream(payload: StreamStartRequest, user: User = Depends(current_user), db: Session = Depends(get_db)):
     """
     Create a streaming session for a track and return a stream URL.
     For demo/local use, returns a URL under /static/audio/{trackId}.mp3 which supports Range requests.
     """
+    # Cheap early rejection from this worker's counters; start() below also counts other workers' sessions
+    if 0 < settings.MAX_CONCURRENT_STREAMS <= session_registry.active_count(user.id):
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many concurrent streams")
+
     # Resolve track (allow numeric IDs, else fallback placeholder)
     track_id = payload.trackId
     track = None
+    created = False
     try:
         tid_int = int(track_id)
-        track = db.query(Track).filter(Track.id == tid_int).first()
+        track = track_cache.get(db, tid_int)
         if not track:
             track = Track(id=tid_int, title=f"Track {tid_int}", artist="Unknown")
             db.add(track)
-            db.flush()
+            created = True
     except Exception:
         # Non-integer id: create a placeholder track if not exists
         track = db.query(Track).filter(Track.title == str(track_id)).first()
         if not track:
             track = Track(title=str(track_id), artist="Unknown")
             db.add(track)
-            db.flush()
+            created = True
+    if created:
+        # Placeholder tracks must exist before the session row referencing them is flushed
+        db.commit()
+        track_cache.put([track])
 
-    session = StreamSession(user_id=user.id, track_id=track.id)
-    db.add(session)
-    db.commit()
-    db.refresh(session)
+    # Session is recorded in memory and persisted by the background flusher
+    try:
+        session = session_registry.start(user.id, track.id, max_concurrent=settings.MAX_CONCURRENT_STREAMS, db=db)
+    except ConcurrentStreamLimitExceeded:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many concurrent streams")
+    trending.record(track.id, track_meta(track))
 
     # Prefer local static if file exists, else still return static path (frontend may 404 if missing)
     candidate = STATIC_AUDIO_DIR / f"{track.id}.mp3"
-    # Use relative path served by FastAPI app (works with same-origin/proxy)
-    stream_url = f"/static/audio/{track.id}.mp3"
+    # Use relative path served by FastAPI app (works with same-origin/proxy), signed for this user
+    stream_url = signed_stream_url(f"{track.id}.mp3", user.id)
     return StreamStartResponse(session_id=session.id, track_id=str(track_id), stream_url=stream_url)
 
 
 @router.post("/stop", summary="Stop music stream", description="Stop a streaming session")
 def stop_stream(payload: StreamStopRequest, user: User = Depends(current_user), db: Session = Depends(get_db)):
     """Stop a streaming session if owned by user."""
+    if session_registry.stop(payload.sessionId, user.id) is not None:
+        return {"ok": True}
+    # Not held in memory by this worker (older or evicted session): fall back to the DB
     s = db.query(StreamSession).filter(StreamSession.id == payload.sessionId, StreamSession.user_id == user.id).first()
     if not s:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
@@ -65,3 +87,26 @@ def stop_stream(payload: StreamStopRequest, user: User = Depends(current_user),
     db.add(s)
     db.commit()
     return {"ok": True}
+
+
+@router.post(
+    "/heartbeat",
+    summary="Stream heartbeat",
+    description=(
+        "Mark a streaming session as still playing. Recorded in memory and persisted in batches. "
+        "202 when the session is held by another worker: the heartbeat is applied only if it is open and the user's."
+    ),
+)
+def heartbeat_stream(payload: StreamHeartbeatRequest, user_id: int = Depends(current_user_id)):
+    """Record a heartbeat for a session owned by the user without touching the DB."""
+    try:
+        recorded = session_registry.heartbeat(payload.sessionId, user_id)
+    except HeartbeatBacklogFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Heartbeat backlog full", headers={"Retry-After": "1"}
+        )
+    if recorded is None:
+        return json_response({"ok": True, "verified": False}, status_code=status.HTTP_202_ACCEPTED)
+    if not recorded:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    return {"ok": True}
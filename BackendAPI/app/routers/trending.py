@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Query
+
+from app.config import get_settings
+from app.schemas.trending import TrendingResponse
+from app.services.trending import trending
+
+router = APIRouter(prefix="/api", tags=["Trending"])
+
+settings = get_settings()
+
+
+@router.get(
+    "/trending",
+    response_model=TrendingResponse,
+    summary="Trending now",
+    description="Most streamed tracks over the recent sliding window. Served from in-memory counters without DB access.",
+)
+def get_trending(limit: int = Query(default=20, ge=1, le=settings.TRENDING_TOP_N)):
+    """Return the top tracks by stream starts in the current window."""
+    return TrendingResponse(items=trending.top(limit), window_minutes=trending.window_buckets)
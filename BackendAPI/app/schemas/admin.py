@@ -1,4 +1,5 @@
-from typing import Optional
+from datetime import date, datetime
+from typing import Dict, List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -9,3 +10,99 @@ class AdminCreateTrack(BaseModel):
     genre: Optional[str] = Field(default=None, description="Genre")
     duration: Optional[float] = Field(default=None, description="Duration seconds")
     cover_image: Optional[str] = Field(default=None, description="Cover image URL")
+
+
+class IngestRowError(BaseModel):
+    line: int = Field(..., description="Line number in the upload (header is line 1 for CSV)")
+    error: str = Field(..., description="Validation or parse error")
+
+
+class IngestReport(BaseModel):
+    job_id: str = Field(..., description="Ingest run id")
+    source: str = Field(..., description="Upload or file name")
+    status: str = Field(..., description="running, completed or failed")
+    rows_seen: int = Field(..., description="Rows parsed so far")
+    inserted: int = Field(..., description="Rows inserted")
+    failed: int = Field(..., description="Rows rejected")
+    errors: List[IngestRowError] = Field(default_factory=list, description="First rejected rows with reasons")
+    elapsed_seconds: float = Field(..., description="Wall time so far")
+    rows_per_second: float = Field(..., description="Throughput")
+
+
+class DailyStatsItem(BaseModel):
+    day: date = Field(..., description="UTC day")
+    plays: int = Field(..., description="Stream sessions started")
+    events: int = Field(..., description="Recommendation events")
+    sessions: int = Field(..., description="Stream sessions started (per-user rollup)")
+    active_users: int = Field(..., description="Users with at least one stream session")
+    listen_seconds: float = Field(..., description="Listening time of ended sessions")
+
+
+class DailyStatsResponse(BaseModel):
+    days: List[DailyStatsItem]
+    as_of: Dict[str, datetime] = Field(default_factory=dict, description="Rollup watermarks (UTC): raw rows before these are included")
+
+
+class TrackStatsItem(BaseModel):
+    track_id: int
+    title: Optional[str] = None
+    artist: Optional[str] = None
+    plays: int
+    events: int
+
+
+class TopTracksResponse(BaseModel):
+    items: List[TrackStatsItem]
+    as_of: Dict[str, datetime] = Field(default_factory=dict, description="Rollup watermarks (UTC)")
+
+
+class TrackDailyItem(BaseModel):
+    day: date
+    plays: int
+    events: int
+
+
+class TrackDailyResponse(BaseModel):
+    track_id: int
+    days: List[TrackDailyItem]
+    as_of: Dict[str, datetime] = Field(default_factory=dict, description="Rollup watermarks (UTC)")
+
+
+class ProfileFunction(BaseModel):
+    frame: str = Field(..., description="function (file:first line)")
+    samples: int
+    approx_ms: float = Field(..., description="samples x sampling interval")
+
+
+class ProfileStack(BaseModel):
+    stack: str = Field(..., description="Folded stack, root first, frames separated by ';'")
+    samples: int
+
+
+class ProfileSummary(BaseModel):
+    id: int
+    method: str
+    route: str
+    status: int
+    reason: str = Field(..., description="sampled or slow")
+    started_at: datetime
+    duration_ms: float
+    samples: int
+    interval_ms: float
+    concurrent: int = Field(..., description="Other requests being profiled when this one started")
+    top_functions: List[ProfileFunction]
+
+
+class ProfileDetail(ProfileSummary):
+    stacks: List[ProfileStack]
+
+
+class SlowQueryItem(BaseModel):
+    id: int
+    at: datetime
+    duration_ms: float
+    route: Optional[str] = Field(default=None, description="Route template of the request that ran it (None outside requests)")
+    statement: str
+    parameters: str = Field(..., description="Bound parameters (repr, first row for executemany)")
+    executemany: bool
+    plan: Optional[str] = Field(default=None, description="EXPLAIN output; None until captured")
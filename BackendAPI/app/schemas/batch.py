@@ -0,0 +1,43 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field, field_validator
+
+
+class BatchItem(BaseModel):
+    id: Optional[str] = Field(default=None, description="Client label echoed in the matching response item")
+    path: str = Field(..., description="Path and query string of a GET route under /api/, e.g. /api/playlists/3")
+    headers: Dict[str, str] = Field(default_factory=dict, description="Extra request headers, e.g. If-None-Match")
+
+    @field_validator("path")
+    @classmethod
+    def _api_path(cls, value: str) -> str:
+        if not value.startswith("/api/"):
+            raise ValueError("path must start with /api/")
+        if not value.isascii():
+            raise ValueError("path must be ASCII; percent-encode other characters")
+        return value
+
+    @field_validator("headers")
+    @classmethod
+    def _latin1_headers(cls, value: Dict[str, str]) -> Dict[str, str]:
+        for name, header in value.items():
+            try:
+                name.encode("latin-1")
+                header.encode("latin-1")
+            except UnicodeEncodeError:
+                raise ValueError(f"header {name!r} is not latin-1 encodable")
+        return value
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem] = Field(..., min_length=1, description="GET sub-requests, run concurrently")
+
+
+class BatchItemResponse(BaseModel):
+    id: Optional[str] = Field(default=None, description="The request item's id")
+    status: int = Field(..., description="HTTP status of the sub-request")
+    headers: Dict[str, str] = Field(default_factory=dict, description="Selected response headers (ETag)")
+    body: Any = Field(default=None, description="JSON body as returned by the route; other media types as text; null when empty")
+
+
+class BatchResponse(BaseModel):
+    responses: List[BatchItemResponse] = Field(default_factory=list, description="One item per request, in request order")
@@ -1,7 +1,9 @@
 from typing import List, Optional
 from pydantic import BaseModel, Field
 
+from app.schemas.common import TrackInfo
+
 
 class CatalogSearchResponse(BaseModel):
-    items: List[dict] = Field(default_factory=list, description="Search results")
+    items: List[TrackInfo] = Field(default_factory=list, description="Search results")
     total: Optional[int] = Field(default=None, description="Total results (optional)")
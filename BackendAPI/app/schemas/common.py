@@ -1,4 +1,5 @@
-from typing import Optional
+from datetime import datetime
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -6,6 +7,24 @@ class MessageResponse(BaseModel):
     message: str = Field(..., description="Human-readable message")
 
 
+class TrackInfo(BaseModel):
+    id: int = Field(..., description="Track id")
+    title: str = Field(..., description="Title")
+    artist: str = Field(..., description="Artist")
+    album: Optional[str] = Field(default=None, description="Album")
+    genre: Optional[str] = Field(default=None, description="Genre")
+    duration: Optional[float] = Field(default=None, description="Length in seconds")
+    cover_image: Optional[str] = Field(default=None, description="Cover image URL")
+
+
+class UserInfo(BaseModel):
+    id: int = Field(..., description="User id")
+    email: str = Field(..., description="User email")
+    username: str = Field(..., description="Username")
+    is_admin: bool = Field(..., description="Admin flag")
+    created_at: datetime = Field(..., description="Registration time (UTC)")
+
+
 class PaginatedUsers(BaseModel):
-    items: list = Field(default_factory=list, description="Items list")
+    items: List[UserInfo] = Field(default_factory=list, description="Items list")
     total: Optional[int] = Field(default=None, description="Total items (optional)")
@@ -1,6 +1,8 @@
 from typing import List, Optional
 from pydantic import BaseModel, Field
 
+from app.schemas.common import TrackInfo
+
 
 class PlaylistCreate(BaseModel):
     name: str = Field(..., description="Playlist name")
@@ -23,17 +25,29 @@ class PlaylistSummary(BaseModel):
     name: str = Field(..., description="Name")
     description: Optional[str] = Field(default=None, description="Description")
     cover_image: Optional[str] = Field(default=None, description="Cover image URL")
+    track_count: int = Field(default=0, description="Number of tracks")
+    total_duration: float = Field(default=0.0, description="Sum of track durations in seconds")
+
+
+class PlaylistDetail(PlaylistSummary):
+    tracks: List[TrackInfo] = Field(default_factory=list, description="Tracks in playlist")
+
+
+class PlaylistTrackItem(TrackInfo):
+    position: int = Field(..., description="Position within the playlist (stable sort key, may have gaps)")
 
 
-class TrackInfo(BaseModel):
-    id: int = Field(..., description="Track id")
-    title: str = Field(..., description="Title")
-    artist: str = Field(..., description="Artist")
+class PlaylistTracksPage(BaseModel):
+    items: List[PlaylistTrackItem] = Field(default_factory=list, description="Tracks ordered by position")
+    next_after: Optional[int] = Field(default=None, description="Pass as 'after' to fetch the next page; null when done")
+    next_after_track: Optional[int] = Field(default=None, description="Pass as 'after_track' with next_after; null when done")
+
+
+class PlaylistImportTrack(BaseModel):
+    id: int = Field(..., description="Track id; unknown ids become placeholder tracks")
+    title: Optional[str] = Field(default=None, description="Title used if a placeholder is created")
+    artist: Optional[str] = Field(default=None, description="Artist used if a placeholder is created")
     album: Optional[str] = Field(default=None, description="Album")
     genre: Optional[str] = Field(default=None, description="Genre")
     duration: Optional[float] = Field(default=None, description="Length in seconds")
     cover_image: Optional[str] = Field(default=None, description="Cover image URL")
-
-
-class PlaylistDetail(PlaylistSummary):
-    tracks: List[TrackInfo] = Field(default_factory=list, description="Tracks in playlist")
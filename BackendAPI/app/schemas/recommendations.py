@@ -0,0 +1,8 @@
+from typing import List
+from pydantic import BaseModel, Field
+
+from app.schemas.common import TrackInfo
+
+
+class RecommendationsResponse(BaseModel):
+    items: List[TrackInfo] = Field(default_factory=list, description="Recommended tracks")
@@ -9,6 +9,10 @@ class StreamStopRequest(BaseModel):
     sessionId: int = Field(..., description="Streaming session id")
 
 
+class StreamHeartbeatRequest(BaseModel):
+    sessionId: int = Field(..., description="Streaming session id")
+
+
 class StreamStartResponse(BaseModel):
     session_id: int = Field(..., description="Streaming session id")
     track_id: str = Field(..., description="Track id")
@@ -0,0 +1,18 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class TrendingTrack(BaseModel):
+    id: int = Field(..., description="Track id")
+    title: Optional[str] = Field(default=None, description="Title")
+    artist: Optional[str] = Field(default=None, description="Artist")
+    album: Optional[str] = Field(default=None, description="Album")
+    genre: Optional[str] = Field(default=None, description="Genre")
+    duration: Optional[float] = Field(default=None, description="Length in seconds")
+    cover_image: Optional[str] = Field(default=None, description="Cover image URL")
+    plays: int = Field(..., description="Stream starts within the trending window")
+
+
+class TrendingResponse(BaseModel):
+    items: List[TrendingTrack] = Field(default_factory=list, description="Most played tracks, highest first")
+    window_minutes: int = Field(..., description="Length of the sliding window in minutes")
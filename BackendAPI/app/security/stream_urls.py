@@ -0,0 +1,89 @@
+"""
+HMAC-signed, expiring stream URLs.
+
+start_stream hands out /static/audio/{file}?u=..&exp=..&kid=..&sig=.. where sig is
+HMAC-SHA256 over (file, user, expiry) under the key named by kid. serve_audio checks it
+with a constant-time compare and no DB access or JWT decode, so the many Range requests
+a player issues per track stay cheap. Rotation: list the new key first in STREAM_URL_KEYS
+and keep the old ones until the URLs they signed have expired.
+"""
+import base64
+import hashlib
+import hmac
+import time
+from functools import lru_cache
+from typing import Dict, Mapping, Optional
+from urllib.parse import urlencode
+
+from app.config import get_settings
+
+
+class StreamUrlSigner:
+    """Signs and verifies stream URLs with a set of named keys; the first key signs."""
+
+    def __init__(self, keys: Dict[str, bytes], ttl_seconds: int) -> None:
+        if not keys:
+            raise ValueError("At least one stream URL key is required")
+        self.ttl_seconds = ttl_seconds
+        self.active_kid = next(iter(keys))
+        # Pre-keyed HMAC states; copying one is cheaper than re-deriving the key pads per request
+        self._macs = {kid: hmac.new(key, digestmod=hashlib.sha256) for kid, key in keys.items()}
+
+    def _signature(self, kid: str, filename: str, user_id: str, expires: str) -> Optional[str]:
+        base = self._macs.get(kid)
+        if base is None:
+            return None
+        mac = base.copy()
+        mac.update(f"{filename}|{user_id}|{expires}".encode("utf-8"))
+        return base64.urlsafe_b64encode(mac.digest()).rstrip(b"=").decode("ascii")
+
+    # PUBLIC_INTERFACE
+    def sign(self, filename: str, user_id: int, now: Optional[float] = None) -> str:
+        """Return the query string (without '?') authorizing user_id to fetch filename until expiry."""
+        expires = str(int((time.time() if now is None else now) + self.ttl_seconds))
+        sig = self._signature(self.active_kid, filename, str(user_id), expires)
+        return urlencode({"u": user_id, "exp": expires, "kid": self.active_kid, "sig": sig})
+
+    # PUBLIC_INTERFACE
+    def verify(self, filename: str, params: Mapping[str, str], now: Optional[float] = None) -> bool:
+        """Check a signed URL's parameters for filename: known key, valid signature, not expired."""
+        user_id = params.get("u")
+        expires = params.get("exp")
+        kid = params.get("kid")
+        sig = params.get("sig")
+        if not (user_id and expires and kid and sig):
+            return False
+        try:
+            if int(expires) < (time.time() if now is None else now):
+                return False
+        except ValueError:
+            return False
+        expected = self._signature(kid, filename, user_id, expires)
+        # Compare bytes: compare_digest rejects non-ASCII str, and sig comes straight from the query string
+        return expected is not None and hmac.compare_digest(expected.encode("ascii"), sig.encode("utf-8", "surrogateescape"))
+
+
+def _parse_keys(raw: str, fallback_secret: str) -> Dict[str, bytes]:
+    keys: Dict[str, bytes] = {}
+    for item in raw.split(","):
+        kid, sep, secret = item.strip().partition(":")
+        if sep and kid and secret:
+            keys[kid] = secret.encode("utf-8")
+    if not keys:
+        # Derive a dedicated key from SECRET_KEY so JWT and URL signatures never share a key
+        keys["k0"] = hmac.new(fallback_secret.encode("utf-8"), b"stream-url-signing", hashlib.sha256).digest()
+    return keys
+
+
+@lru_cache
+# PUBLIC_INTERFACE
+def get_stream_url_signer() -> StreamUrlSigner:
+    """Get the cached signer configured from settings."""
+    settings = get_settings()
+    return StreamUrlSigner(_parse_keys(settings.STREAM_URL_KEYS, settings.SECRET_KEY), settings.STREAM_URL_TTL_SECONDS)
+
+
+# PUBLIC_INTERFACE
+def signed_stream_url(filename: str, user_id: int) -> str:
+    """Return the signed, expiring URL of an audio file under /static/audio."""
+    return f"/static/audio/{filename}?{get_stream_url_signer().sign(filename, user_id)}"
@@ -0,0 +1,56 @@
+"""
+Shared response serialization.
+
+ORJSONResponse is the application's default response class. List endpoints go further
+and skip the ORM object -> dict -> pydantic round trip: they select only the columns of
+their response model, zip each row tuple with the column names and write the result
+straight to JSON bytes with orjson. The response_model declared on those routes still
+documents the shape, so the column tuples below must stay in step with TrackInfo,
+UserInfo and PlaylistSummary.
+"""
+from typing import Any, Dict, List, Mapping, Optional
+
+import orjson
+from fastapi import Response
+from sqlalchemy.engine import Result
+
+from app.db.models import Playlist, Track, User
+
+TRACK_COLUMNS = (Track.id, Track.title, Track.artist, Track.album, Track.genre, Track.duration, Track.cover_image)
+USER_COLUMNS = (User.id, User.email, User.username, User.is_admin, User.created_at)
+PLAYLIST_SUMMARY_COLUMNS = (
+    Playlist.id,
+    Playlist.name,
+    Playlist.description,
+    Playlist.cover_image,
+    Playlist.track_count,
+    Playlist.total_duration,
+)
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+# PUBLIC_INTERFACE
+def rows_to_dicts(result: Result) -> List[Dict[str, Any]]:
+    """Turn a Core result into plain dicts keyed by column label (no ORM objects involved)."""
+    # Labels can be quoted_name (a str subclass), which orjson refuses as a dict key
+    keys = tuple(str(k) for k in result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+# PUBLIC_INTERFACE
+def track_dict(track: Track) -> Dict[str, Any]:
+    """TrackInfo-shaped dict for a single ORM track."""
+    return {c.key: getattr(track, c.key) for c in TRACK_COLUMNS}
+
+
+# PUBLIC_INTERFACE
+def json_bytes(payload: Any) -> bytes:
+    """Serialize plain data (dicts, lists, datetimes, ...) to compact JSON bytes."""
+    return orjson.dumps(payload)
+
+
+# PUBLIC_INTERFACE
+def json_response(payload: Any, status_code: int = 200, headers: Optional[Mapping[str, str]] = None) -> Response:
+    """Return already-shaped data as JSON, bypassing response_model validation."""
+    return Response(content=orjson.dumps(payload), status_code=status_code, headers=headers, media_type=JSON_MEDIA_TYPE)
@@ -0,0 +1,164 @@
+"""
+Admission control: per-key token buckets and per-class concurrency limits.
+
+Requests are grouped into classes (api, auth, audio, download). A class can have a token
+bucket per key (user id, or client address for anonymous callers) that bounds each key's
+request rate, and a concurrency limit that bounds how many of its requests are in progress
+at once. A request over either limit is rejected immediately instead of waiting for a
+worker thread, so one class flooding the worker (e.g. full-file downloads) cannot starve
+the others.
+
+All state is touched only from the event loop thread (AdmissionMiddleware), so nothing is
+locked. Limits are per worker process.
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.config import get_settings
+
+
+class TokenBuckets:
+    """One token bucket per key, refilled lazily at `rate` tokens/second up to `burst`."""
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 100000) -> None:
+        self.rate = rate
+        self.burst = float(max(burst, 1))
+        self.max_keys = max(max_keys, 1)
+        # key -> [tokens, last refill (monotonic)], least recently used first
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _refilled(self, key: str, now: float) -> List[float]:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                # Dropping a bucket only forgives that key's debt; it never admits more than burst
+                self._buckets.popitem(last=False)
+            bucket = self._buckets[key] = [self.burst, now]
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        return bucket
+
+    # PUBLIC_INTERFACE
+    def take(self, key: str, now: Optional[float] = None) -> float:
+        """Take a token for key; return 0 if admitted, else the seconds until a token is available."""
+        bucket = self._refilled(key, time.monotonic() if now is None else now)
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+            return 0.0
+        return (1.0 - bucket[0]) / self.rate
+
+    # PUBLIC_INTERFACE
+    def charge(self, key: str, tokens: float, now: Optional[float] = None) -> None:
+        """
+        Take tokens from key's bucket after the request was admitted, going into debt if needed;
+        the key's next requests wait until the debt is refilled.
+        """
+        bucket = self._refilled(key, time.monotonic() if now is None else now)
+        bucket[0] -= tokens
+
+
+class ConcurrencyLimit:
+    """Counter of requests in progress with a fixed ceiling."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.active = 0
+
+    # PUBLIC_INTERFACE
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free."""
+        if self.active >= self.limit:
+            return False
+        self.active += 1
+        return True
+
+    # PUBLIC_INTERFACE
+    def release(self) -> None:
+        """Give back a slot taken by try_acquire."""
+        self.active -= 1
+
+
+class AdmissionClass:
+    """Limits applied to one request class; either may be None (unlimited)."""
+
+    def __init__(self, name: str, buckets: Optional[TokenBuckets], concurrency: Optional[ConcurrencyLimit]) -> None:
+        self.name = name
+        self.buckets = buckets
+        self.concurrency = concurrency
+
+
+class AdmissionController:
+    """The configured classes; a class without any limit is left out."""
+
+    def __init__(self, classes: Dict[str, AdmissionClass]) -> None:
+        self.classes = {name: c for name, c in classes.items() if c.buckets is not None or c.concurrency is not None}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.classes)
+
+    # PUBLIC_INTERFACE
+    def get(self, name: Optional[str]) -> Optional[AdmissionClass]:
+        """The limits of a class, or None when it is unlimited."""
+        return self.classes.get(name) if name else None
+
+    # PUBLIC_INTERFACE
+    def concurrency_usage(self) -> List[Tuple[Tuple[str, str], float]]:
+        """(class, active|limit) samples for the classes with a concurrency limit."""
+        out: List[Tuple[Tuple[str, str], float]] = []
+        for name, c in self.classes.items():
+            if c.concurrency is not None:
+                out.append(((name, "active"), c.concurrency.active))
+                out.append(((name, "limit"), c.concurrency.limit))
+        return out
+
+    # PUBLIC_INTERFACE
+    def tracked_keys(self) -> List[Tuple[Tuple[str], float]]:
+        """Number of token buckets held per rate-limited class."""
+        seen = set()
+        out: List[Tuple[Tuple[str], float]] = []
+        for name, c in self.classes.items():
+            if c.buckets is not None and id(c.buckets) not in seen:
+                seen.add(id(c.buckets))
+                out.append(((name,), len(c.buckets)))
+        return out
+
+
+def _buckets(rate: float, burst: int, max_keys: int) -> Optional[TokenBuckets]:
+    return TokenBuckets(rate, burst, max_keys) if rate > 0 else None
+
+
+def _limit(limit: int) -> Optional[ConcurrencyLimit]:
+    return ConcurrencyLimit(limit) if limit > 0 else None
+
+
+# PUBLIC_INTERFACE
+def build_admission_controller(settings) -> AdmissionController:
+    """Build the controller from RATE_LIMIT_* / CONCURRENCY_LIMIT_* settings."""
+    max_keys = settings.RATE_LIMIT_MAX_KEYS
+    # Range requests and full-file downloads draw from the same per-user audio bucket
+    audio_buckets = _buckets(settings.RATE_LIMIT_AUDIO_PER_SECOND, settings.RATE_LIMIT_AUDIO_BURST, max_keys)
+    return AdmissionController({
+        "api": AdmissionClass(
+            "api",
+            _buckets(settings.RATE_LIMIT_API_PER_SECOND, settings.RATE_LIMIT_API_BURST, max_keys),
+            _limit(settings.CONCURRENCY_LIMIT_API),
+        ),
+        "auth": AdmissionClass(
+            "auth",
+            _buckets(settings.RATE_LIMIT_AUTH_PER_SECOND, settings.RATE_LIMIT_AUTH_BURST, max_keys),
+            _limit(settings.CONCURRENCY_LIMIT_AUTH),
+        ),
+        "audio": AdmissionClass("audio", audio_buckets, _limit(settings.CONCURRENCY_LIMIT_AUDIO)),
+        "download": AdmissionClass("download", audio_buckets, _limit(settings.CONCURRENCY_LIMIT_DOWNLOAD)),
+    })
+
+
+settings = get_settings()
+admission = build_admission_controller(settings)
@@ -0,0 +1,245 @@
+"""
+Incrementally maintained listening analytics.
+
+A background job folds new stream_sessions and recommendation_events rows into per-day
+rollup tables (daily_track_stats, daily_user_stats), so admin reports read a few rows
+per day instead of aggregating the raw tables. Each rollup keeps a timestamp watermark
+in rollup_watermarks; a run aggregates the half-open window [watermark, horizon) with
+GROUP BY, adds the results to the rollups with additive ON CONFLICT upserts and moves the
+watermark in the same transaction, so every raw row is counted exactly once.
+
+The horizon trails "now" by a settle delay, since stream sessions are written behind
+(rows reach the DB up to a flush interval after they start). Listening time is only
+known once a session ends, so that rollup's horizon additionally stops at the oldest
+session that is still open; the reaper bounds how long an abandoned session can hold it.
+"""
+import logging
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.models import DailyTrackStats, DailyUserStats, RecommendationEvent, RollupWatermark, StreamSession, Track
+from app.db.upsert import upsert_add
+
+logger = logging.getLogger(__name__)
+
+PLAYS = "stream_session_plays"
+LISTENING = "stream_session_listening"
+EVENTS = "recommendation_events"
+
+
+def _as_day(value) -> date:
+    # date() comes back as 'YYYY-MM-DD' text on SQLite and as a date on PostgreSQL
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _seconds_between(db: Session, start, end):
+    if db.get_bind().dialect.name == "sqlite":
+        return (func.julianday(end) - func.julianday(start)) * 86400.0
+    return func.extract("epoch", end - start)
+
+
+def _roll_plays(db: Session, start: datetime, end: datetime) -> None:
+    s = StreamSession.__table__.c
+    day = func.date(s.started_at).label("day")
+    in_window = and_(s.started_at >= start, s.started_at < end)
+    tracks = db.execute(
+        select(day, s.track_id, func.count()).where(in_window, s.track_id.is_not(None)).group_by(day, s.track_id)
+    ).all()
+    users = db.execute(select(day, s.user_id, func.count()).where(in_window).group_by(day, s.user_id)).all()
+    upsert_add(
+        db, DailyTrackStats, ("day", "track_id"), ("plays",),
+        [{"day": _as_day(d), "track_id": tid, "plays": n, "events": 0} for d, tid, n in tracks],
+    )
+    upsert_add(
+        db, DailyUserStats, ("day", "user_id"), ("sessions",),
+        [{"day": _as_day(d), "user_id": uid, "sessions": n, "listen_seconds": 0.0} for d, uid, n in users],
+    )
+
+
+def _roll_listening(db: Session, start: datetime, end: datetime) -> None:
+    s = StreamSession.__table__.c
+    day = func.date(s.started_at).label("day")
+    seconds = func.sum(_seconds_between(db, s.started_at, s.ended_at))
+    users = db.execute(
+        select(day, s.user_id, seconds)
+        .where(s.started_at >= start, s.started_at < end, s.ended_at.is_not(None))
+        .group_by(day, s.user_id)
+    ).all()
+    upsert_add(
+        db, DailyUserStats, ("day", "user_id"), ("listen_seconds",),
+        [{"day": _as_day(d), "user_id": uid, "sessions": 0, "listen_seconds": float(sec or 0.0)} for d, uid, sec in users],
+    )
+
+
+def _roll_events(db: Session, start: datetime, end: datetime) -> None:
+    e = RecommendationEvent.__table__.c
+    day = func.date(e.created_at).label("day")
+    tracks = db.execute(
+        select(day, e.track_id, func.count())
+        .where(e.created_at >= start, e.created_at < end, e.track_id.is_not(None))
+        .group_by(day, e.track_id)
+    ).all()
+    upsert_add(
+        db, DailyTrackStats, ("day", "track_id"), ("events",),
+        [{"day": _as_day(d), "track_id": tid, "plays": 0, "events": n} for d, tid, n in tracks],
+    )
+
+
+def _claim_window(db: Session, name: str, start: datetime, end: datetime, exists: bool) -> bool:
+    """Move the watermark from start to end if nobody else did; must commit with the window's upserts."""
+    now = datetime.utcnow()
+    if not exists:
+        try:
+            db.execute(insert(RollupWatermark).values(name=name, position=end, updated_at=now))
+            return True
+        except IntegrityError:
+            db.rollback()
+            return False
+    moved = db.execute(
+        update(RollupWatermark)
+        .where(RollupWatermark.name == name, RollupWatermark.position == start)
+        .values(position=end, updated_at=now)
+    ).rowcount
+    if not moved:
+        # Another worker advanced this rollup concurrently
+        db.rollback()
+    return bool(moved)
+
+
+def _advance(
+    db: Session,
+    name: str,
+    ts_column,
+    horizon: datetime,
+    apply: Callable[[Session, datetime, datetime], None],
+    max_window: timedelta,
+    max_windows: int,
+) -> int:
+    """Fold raw rows with ts in [watermark, horizon) into the rollups, one committed window at a time."""
+    done = 0
+    for _ in range(max_windows):
+        start = db.scalar(select(RollupWatermark.position).where(RollupWatermark.name == name))
+        exists = start is not None
+        if not exists:
+            start = db.scalar(select(func.min(ts_column)))
+            if start is None:
+                break
+        if start >= horizon:
+            break
+        end = min(horizon, start + max_window)
+        if not _claim_window(db, name, start, end, exists):
+            break
+        try:
+            apply(db, start, end)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        done += 1
+    return done
+
+
+# PUBLIC_INTERFACE
+def refresh_rollups(
+    db: Session,
+    settle_seconds: float = 30.0,
+    max_window_hours: float = 24.0,
+    max_windows: int = 100,
+    now: Optional[datetime] = None,
+) -> Dict[str, int]:
+    """
+    Fold new raw rows into the daily rollups. Returns the number of windows processed per rollup.
+    settle_seconds must exceed the stream session flush interval; rows that reach the DB later
+    than that behind their timestamp are not counted.
+    """
+    horizon = (now or datetime.utcnow()) - timedelta(seconds=settle_seconds)
+    window = timedelta(hours=max_window_hours)
+    s = StreamSession.__table__.c
+    oldest_open = db.scalar(select(func.min(s.started_at)).where(s.ended_at.is_(None)))
+    listen_horizon = horizon if oldest_open is None else min(horizon, oldest_open)
+    db.commit()
+    done = {
+        PLAYS: _advance(db, PLAYS, s.started_at, horizon, _roll_plays, window, max_windows),
+        LISTENING: _advance(db, LISTENING, s.started_at, listen_horizon, _roll_listening, window, max_windows),
+        EVENTS: _advance(db, EVENTS, RecommendationEvent.__table__.c.created_at, horizon, _roll_events, window, max_windows),
+    }
+    if any(done.values()):
+        logger.debug("Analytics rollups advanced: %s", done)
+    return done
+
+
+# PUBLIC_INTERFACE
+def watermarks(db: Session) -> Dict[str, datetime]:
+    """Return how far (exclusive, UTC) each rollup has consumed its raw rows."""
+    return {name: position for name, position in db.execute(select(RollupWatermark.name, RollupWatermark.position))}
+
+
+# PUBLIC_INTERFACE
+def daily_totals(db: Session, start: date, end: date) -> List[dict]:
+    """Per-day plays, events, sessions, active users and listening seconds for start..end (inclusive)."""
+    t, u = DailyTrackStats, DailyUserStats
+    days: Dict[date, dict] = {}
+
+    def row(day: date) -> dict:
+        return days.setdefault(
+            day, {"day": day, "plays": 0, "events": 0, "sessions": 0, "active_users": 0, "listen_seconds": 0.0}
+        )
+
+    for day, plays, events in db.execute(
+        select(t.day, func.sum(t.plays), func.sum(t.events)).where(t.day.between(start, end)).group_by(t.day)
+    ):
+        row(day).update(plays=int(plays or 0), events=int(events or 0))
+    for day, users, sessions, seconds in db.execute(
+        select(u.day, func.count(), func.sum(u.sessions), func.sum(u.listen_seconds))
+        .where(u.day.between(start, end))
+        .group_by(u.day)
+    ):
+        row(day).update(active_users=int(users), sessions=int(sessions or 0), listen_seconds=round(float(seconds or 0.0), 1))
+    return [days[d] for d in sorted(days)]
+
+
+# PUBLIC_INTERFACE
+def top_tracks(db: Session, start: date, end: date, limit: int = 20) -> List[dict]:
+    """Most played tracks between start and end (inclusive), with their catalog title/artist."""
+    t = DailyTrackStats
+    plays = func.sum(t.plays).label("plays")
+    ranked = db.execute(
+        select(t.track_id, plays, func.sum(t.events))
+        .where(t.day.between(start, end))
+        .group_by(t.track_id)
+        .order_by(plays.desc(), t.track_id)
+        .limit(limit)
+    ).all()
+    meta = _track_meta(db, [tid for tid, _, _ in ranked])
+    return [
+        {"track_id": tid, "plays": int(p or 0), "events": int(ev or 0), **meta.get(tid, {"title": None, "artist": None})}
+        for tid, p, ev in ranked
+    ]
+
+
+def _track_meta(db: Session, track_ids: Iterable[int]) -> Dict[int, dict]:
+    ids = list(track_ids)
+    if not ids:
+        return {}
+    return {
+        tid: {"title": title, "artist": artist}
+        for tid, title, artist in db.execute(select(Track.id, Track.title, Track.artist).where(Track.id.in_(ids)))
+    }
+
+
+# PUBLIC_INTERFACE
+def track_daily(db: Session, track_id: int, start: date, end: date) -> List[dict]:
+    """Per-day plays and events of one track between start and end (inclusive)."""
+    t = DailyTrackStats
+    rows = db.execute(
+        select(t.day, t.plays, t.events).where(t.track_id == track_id, t.day.between(start, end)).order_by(t.day)
+    )
+    return [{"day": day, "plays": plays, "events": events} for day, plays, events in rows]
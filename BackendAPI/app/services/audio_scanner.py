@@ -0,0 +1,389 @@
+"""
+Audio library scanner.
+
+Walks the static audio directory, parses MP3 headers (ID3v2/ID3v1 tags, the first MPEG
+frame header and any Xing/Info or VBRI header) in a process pool and writes duration,
+bitrate and sample rate back to tracks in batches. Files follow the serving convention
+{track_id}.mp3; tracks that do not exist yet are created from the file's ID3 tags.
+File size and mtime are stored with each track, so later runs only re-parse files that
+changed. Only the head and tail of each file are read, never the audio payload.
+"""
+import logging
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from app.db.models import Track
+from app.services.playlist_cache import playlist_cache
+from app.services.playlists import ensure_tracks, tracks_changed
+from app.services.track_cache import track_cache
+
+logger = logging.getLogger(__name__)
+
+# Same directory main.py serves /static/audio/{filename} from
+DEFAULT_AUDIO_DIR = Path(__file__).resolve().parents[2] / "static" / "audio"
+
+# How far past the ID3v2 tag to look for the first frame, and how much of the tag to parse for text frames
+SYNC_SEARCH_BYTES = 64 * 1024
+TAG_READ_BYTES = 64 * 1024
+
+_BITRATES = {
+    # (mpeg1?, layer) -> kbit/s by bitrate index; MPEG 2 and 2.5 share a table
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}  # by version bits
+
+_ID3_TEXT_FRAMES = {
+    b"TIT2": "title", b"TPE1": "artist", b"TALB": "album", b"TCON": "genre",
+    b"TT2": "title", b"TP1": "artist", b"TAL": "album", b"TCO": "genre",
+}
+
+
+class FrameHeader:
+    __slots__ = ("version", "layer", "bitrate", "sample_rate", "padding", "mono", "length", "samples")
+
+    def __init__(self, version: int, layer: int, bitrate: int, sample_rate: int, padding: int, mono: bool) -> None:
+        self.version = version  # version bits: 3 = MPEG 1, 2 = MPEG 2, 0 = MPEG 2.5
+        self.layer = layer
+        self.bitrate = bitrate  # kbit/s
+        self.sample_rate = sample_rate
+        self.padding = padding
+        self.mono = mono
+        mpeg1 = version == 3
+        if layer == 1:
+            self.samples = 384
+            self.length = (12000 * bitrate // sample_rate + padding) * 4
+        else:
+            self.samples = 1152 if (layer == 2 or mpeg1) else 576
+            self.length = (self.samples // 8) * 1000 * bitrate // sample_rate + padding
+
+
+def parse_frame_header(b: bytes) -> Optional[FrameHeader]:
+    """Decode a 4-byte MPEG audio frame header; None if it is not a valid one."""
+    if len(b) < 4 or b[0] != 0xFF or (b[1] & 0xE0) != 0xE0:
+        return None
+    version = (b[1] >> 3) & 0x3
+    layer = 4 - ((b[1] >> 1) & 0x3)
+    bitrate_index = b[2] >> 4
+    rate_index = (b[2] >> 2) & 0x3
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None  # reserved values; free-format streams are not supported
+    bitrate = _BITRATES[(version == 3, layer)][bitrate_index]
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    return FrameHeader(version, layer, bitrate, sample_rate, (b[2] >> 1) & 0x1, (b[3] >> 6) == 3)
+
+
+def _syncsafe(b: bytes) -> int:
+    return (b[0] << 21) | (b[1] << 14) | (b[2] << 7) | b[3]
+
+
+def _decode_text(payload: bytes) -> Optional[str]:
+    if not payload:
+        return None
+    encoding, data = payload[0], payload[1:]
+    codec = {0: "latin-1", 1: "utf-16", 2: "utf-16-be", 3: "utf-8"}.get(encoding)
+    if codec is None:
+        return None
+    text = data.decode(codec, errors="replace").split("\x00")[0].strip()
+    return text or None
+
+
+def parse_id3v2_frames(tag: bytes, major: int) -> Dict[str, str]:
+    """Extract title/artist/album/genre from the body of an ID3v2.2-2.4 tag."""
+    tags: Dict[str, str] = {}
+    pos = 0
+    id_len, head_len = (3, 6) if major == 2 else (4, 10)
+    while pos + head_len <= len(tag):
+        frame_id = tag[pos : pos + id_len]
+        if not frame_id.strip(b"\x00"):
+            break  # padding
+        if major == 2:
+            size = int.from_bytes(tag[pos + 3 : pos + 6], "big")
+        elif major == 4:
+            size = _syncsafe(tag[pos + 4 : pos + 8])
+        else:
+            size = struct.unpack(">I", tag[pos + 4 : pos + 8])[0]
+        start = pos + head_len
+        if size <= 0 or start + size > len(tag):
+            break
+        field = _ID3_TEXT_FRAMES.get(frame_id)
+        if field and field not in tags:
+            value = _decode_text(tag[start : start + size])
+            if value:
+                tags[field] = value
+        pos = start + size
+    return tags
+
+
+def _parse_id3v1(tail: bytes) -> Dict[str, str]:
+    tags: Dict[str, str] = {}
+    for field, (a, b) in (("title", (3, 33)), ("artist", (33, 63)), ("album", (63, 93))):
+        value = tail[a:b].split(b"\x00")[0].decode("latin-1").strip()
+        if value:
+            tags[field] = value
+    return tags
+
+
+def _find_first_frame(buf: bytes) -> Optional[Tuple[int, FrameHeader]]:
+    """Find the first frame header that is followed by a consistent second header (avoids false syncs)."""
+    pos = buf.find(b"\xff")
+    while 0 <= pos <= len(buf) - 4:
+        header = parse_frame_header(buf[pos : pos + 4])
+        if header is not None and header.length > 0:
+            nxt = pos + header.length
+            if nxt + 4 > len(buf):
+                return pos, header
+            follow = parse_frame_header(buf[nxt : nxt + 4])
+            if follow is not None and follow.version == header.version and follow.sample_rate == header.sample_rate:
+                return pos, header
+        pos = buf.find(b"\xff", pos + 1)
+    return None
+
+
+def _vbr_info(frame: bytes, header: FrameHeader) -> Optional[Tuple[int, Optional[int]]]:
+    """Return (frame_count, byte_count) from a Xing/Info or VBRI header in the first frame, if present."""
+    if header.version == 3:
+        side_info = 17 if header.mono else 32
+    else:
+        side_info = 9 if header.mono else 17
+    xing = 4 + side_info
+    if frame[xing : xing + 4] in (b"Xing", b"Info") and len(frame) >= xing + 8:
+        flags = struct.unpack(">I", frame[xing + 4 : xing + 8])[0]
+        pos = xing + 8
+        frames = nbytes = None
+        if flags & 0x1 and len(frame) >= pos + 4:
+            frames = struct.unpack(">I", frame[pos : pos + 4])[0]
+            pos += 4
+        if flags & 0x2 and len(frame) >= pos + 4:
+            nbytes = struct.unpack(">I", frame[pos : pos + 4])[0]
+        if frames:
+            return frames, nbytes
+    if frame[36:40] == b"VBRI" and len(frame) >= 54:
+        nbytes, frames = struct.unpack(">II", frame[46:54])
+        if frames:
+            return frames, nbytes
+    return None
+
+
+# PUBLIC_INTERFACE
+def probe_mp3(path: str) -> dict:
+    """
+    Read duration (seconds), bitrate (kbit/s), sample_rate (Hz) and ID3 tags of an MP3 file.
+    VBR files are measured from their Xing/VBRI header, CBR files from the audio payload size.
+    Raises ValueError if no MPEG audio frames are found.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as fh:
+        head = fh.read(10)
+        tags: Dict[str, str] = {}
+        audio_start = 0
+        if len(head) == 10 and head[:3] == b"ID3":
+            major, flags = head[3], head[5]
+            tag_size = _syncsafe(head[6:10])
+            tags = parse_id3v2_frames(fh.read(min(tag_size, TAG_READ_BYTES)), major)
+            audio_start = 10 + tag_size + (10 if flags & 0x10 else 0)
+        fh.seek(audio_start)
+        buf = fh.read(SYNC_SEARCH_BYTES)
+        audio_end = size
+        if size - audio_start >= 128:
+            fh.seek(size - 128)
+            tail = fh.read(128)
+            if tail[:3] == b"TAG":
+                audio_end -= 128
+                for field, value in _parse_id3v1(tail).items():
+                    tags.setdefault(field, value)
+
+    found = _find_first_frame(buf)
+    if found is None:
+        raise ValueError("no MPEG audio frames found")
+    offset, header = found
+    vbr = _vbr_info(buf[offset : offset + max(header.length, 160)], header)
+    if vbr is not None:
+        frames, nbytes = vbr
+        duration = frames * header.samples / header.sample_rate
+        payload = nbytes or (audio_end - audio_start - offset)
+        bitrate = round(payload * 8 / duration / 1000) if duration > 0 else header.bitrate
+    else:
+        duration = (audio_end - audio_start - offset) * 8 / (header.bitrate * 1000)
+        bitrate = header.bitrate
+    return {
+        "duration": round(duration, 3),
+        "bitrate": bitrate,
+        "sample_rate": header.sample_rate,
+        "tags": tags,
+    }
+
+
+def _probe_task(task: Tuple[int, str, int, float]) -> Tuple[int, int, float, Optional[dict], Optional[str]]:
+    """Process-pool entry point: (track_id, path, size, mtime) -> (track_id, size, mtime, info, error)."""
+    track_id, path, size, mtime = task
+    try:
+        return track_id, size, mtime, probe_mp3(path), None
+    except (OSError, ValueError, struct.error) as exc:
+        return track_id, size, mtime, None, str(exc) or exc.__class__.__name__
+
+
+class ScanReport:
+    """Counters of one library scan; rates are over the files actually parsed."""
+
+    def __init__(self, audio_dir: str, max_errors: int = 100) -> None:
+        self.audio_dir = audio_dir
+        self.files_seen = 0
+        self.skipped = 0
+        self.unlinked = 0
+        self.scanned = 0
+        self.bytes_scanned = 0
+        self.updated = 0
+        self.created = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+        self.max_errors = max_errors
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+
+    def error(self, filename: str, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"file": filename, "error": message})
+
+    def as_dict(self) -> dict:
+        elapsed = (self.finished or time.monotonic()) - self.started
+        return {
+            "audio_dir": self.audio_dir,
+            "files_seen": self.files_seen,
+            "skipped_unchanged": self.skipped,
+            "unlinked": self.unlinked,
+            "scanned": self.scanned,
+            "updated": self.updated,
+            "created": self.created,
+            "failed": self.failed,
+            "errors": list(self.errors),
+            "elapsed_seconds": round(elapsed, 3),
+            "files_per_second": round(self.scanned / elapsed, 1) if elapsed > 0 else 0.0,
+            "mb_per_second": round(self.bytes_scanned / 1e6 / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+
+def _candidates(audio_dir: Path, known: Dict[int, Tuple[int, float]], full: bool, report: ScanReport) -> List[Tuple[int, str, int, float]]:
+    """List {track_id}.mp3 files whose (size, mtime) differ from what tracks recorded last time."""
+    tasks: List[Tuple[int, str, int, float]] = []
+    with os.scandir(audio_dir) as entries:
+        for entry in entries:
+            if not entry.is_file() or not entry.name.lower().endswith(".mp3"):
+                continue
+            report.files_seen += 1
+            stem = entry.name[:-4]
+            if not stem.isdigit():
+                # Only {track_id}.mp3 is reachable through /api/stream/start
+                report.unlinked += 1
+                continue
+            st = entry.stat()
+            track_id = int(stem)
+            if not full and known.get(track_id) == (st.st_size, st.st_mtime):
+                report.skipped += 1
+                continue
+            tasks.append((track_id, entry.path, st.st_size, st.st_mtime))
+    tasks.sort()
+    return tasks
+
+
+def _apply_batch(db: Session, rows: List[dict], report: ScanReport) -> None:
+    """Upsert one batch of probe results: create missing tracks from tags, then one bulk UPDATE."""
+    ids = [r["_id"] for r in rows]
+    created = ensure_tracks(db, ids, metadata={r["_id"]: r["_tags"] for r in rows})
+    db.execute(
+        update(Track.__table__)
+        .where(Track.__table__.c.id == bindparam("_id"))
+        .values(
+            duration=bindparam("_duration"),
+            bitrate=bindparam("_bitrate"),
+            sample_rate=bindparam("_sample_rate"),
+            file_size=bindparam("_size"),
+            file_mtime=bindparam("_mtime"),
+        ),
+        [{k: v for k, v in r.items() if k != "_tags"} for r in rows],
+    )
+    # Durations feed playlist totals and cached details
+    affected = tracks_changed(db, ids)
+    db.commit()
+    track_cache.invalidate(ids)
+    playlist_cache.invalidate(affected)
+    report.created += len(created)
+    report.updated += len(rows) - len(created)
+
+
+def _probe_all(tasks: List[Tuple[int, str, int, float]], workers: int) -> Iterator[Tuple[int, int, float, Optional[dict], Optional[str]]]:
+    if workers <= 1 or len(tasks) < 2 * workers:
+        yield from map(_probe_task, tasks)
+        return
+    chunksize = max(1, min(64, len(tasks) // (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_probe_task, tasks, chunksize=chunksize)
+
+
+# PUBLIC_INTERFACE
+def scan_library(
+    db: Session,
+    audio_dir: Optional[Path] = None,
+    workers: Optional[int] = None,
+    batch_size: int = 500,
+    full: bool = False,
+    on_batch: Optional[Callable[[ScanReport], None]] = None,
+) -> ScanReport:
+    """
+    Scan {track_id}.mp3 files in audio_dir and upsert their duration/bitrate/sample rate into tracks.
+    Files whose size and mtime match the previous scan are skipped unless full=True.
+    workers defaults to the CPU count; batch_size bounds rows per UPDATE/commit.
+    """
+    audio_dir = Path(audio_dir or DEFAULT_AUDIO_DIR)
+    report = ScanReport(str(audio_dir))
+    known = {
+        row.id: (row.file_size, row.file_mtime)
+        for row in db.execute(select(Track.id, Track.file_size, Track.file_mtime).where(Track.file_size.is_not(None)))
+    }
+    db.commit()  # don't hold a transaction open while files are parsed
+    tasks = _candidates(audio_dir, known, full, report)
+    pending: List[dict] = []
+    for track_id, size, mtime, info, error in _probe_all(tasks, workers or os.cpu_count() or 1):
+        report.scanned += 1
+        report.bytes_scanned += size
+        if info is None:
+            report.error(f"{track_id}.mp3", error or "unreadable")
+            continue
+        pending.append(
+            {
+                "_id": track_id,
+                "_duration": info["duration"],
+                "_bitrate": info["bitrate"],
+                "_sample_rate": info["sample_rate"],
+                "_size": size,
+                "_mtime": mtime,
+                "_tags": info["tags"],
+            }
+        )
+        if len(pending) >= batch_size:
+            _apply_batch(db, pending, report)
+            pending = []
+            if on_batch is not None:
+                on_batch(report)
+    if pending:
+        _apply_batch(db, pending, report)
+        if on_batch is not None:
+            on_batch(report)
+    report.finished = time.monotonic()
+    logger.info(
+        "Audio scan of %s: %d files, %d parsed, %d unchanged, %d failed",
+        audio_dir, report.files_seen, report.scanned, report.skipped, report.failed,
+    )
+    return report
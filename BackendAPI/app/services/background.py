@@ -0,0 +1,39 @@
+import asyncio
+import logging
+from typing import Callable, Dict
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundJobs:
+    """Registry of periodic background jobs bound to the application lifespan."""
+
+    def __init__(self) -> None:
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    # PUBLIC_INTERFACE
+    def start(self, name: str, interval_seconds: float, func: Callable[[], None]) -> None:
+        """Run a blocking function in the threadpool every interval_seconds until stopped."""
+        if name in self._tasks:
+            return
+        self._tasks[name] = asyncio.create_task(self._loop(name, interval_seconds, func), name=name)
+
+    # PUBLIC_INTERFACE
+    async def stop(self) -> None:
+        """Cancel all running jobs and wait for them to finish."""
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    @staticmethod
+    async def _loop(name: str, interval_seconds: float, func: Callable[[], None]) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await run_in_threadpool(func)
+            except Exception:  # noqa: BLE001
+                logger.exception("Background job %s failed", name)
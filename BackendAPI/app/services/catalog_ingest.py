@@ -0,0 +1,303 @@
+"""
+Streaming bulk catalog ingestion (CSV or NDJSON).
+
+Rows are parsed and validated one at a time and inserted in chunks with multi-row
+INSERTs, each chunk committed on its own so a multi-million-row load keeps bounded
+transactions and memory. Invalid rows (including lines that are not valid UTF-8) are
+skipped and reported with their line number.
+Derived structures (planner statistics, caches) are refreshed once when the ingest
+finishes rather than per row.
+"""
+import csv
+import io
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from app.db.models import Track
+from app.schemas.admin import AdminCreateTrack
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "ndjson")
+TRACK_FIELDS = ("title", "artist", "album", "genre", "duration", "cover_image")
+
+
+class RowError(str):
+    """A row that could not be parsed; the string is the error message."""
+
+
+class IngestProgress:
+    """Counters and capped per-row errors of one ingest run."""
+
+    def __init__(self, job_id: str, source: str, max_errors: int = 100) -> None:
+        self.job_id = job_id
+        self.source = source
+        self.status = "running"
+        self.rows_seen = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+        self.max_errors = max_errors
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+
+    def error(self, line: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self) -> dict:
+        elapsed = (self.finished or time.monotonic()) - self.started
+        return {
+            "job_id": self.job_id,
+            "source": self.source,
+            "status": self.status,
+            "rows_seen": self.rows_seen,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": list(self.errors),
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows_seen / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+
+class IngestJobs:
+    """Recent ingest runs in this process, for progress polling."""
+
+    def __init__(self, keep: int = 20) -> None:
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, IngestProgress]" = OrderedDict()
+        self._ids = itertools.count(1)
+
+    # PUBLIC_INTERFACE
+    def create(self, source: str) -> IngestProgress:
+        """Register a new run and return its progress object."""
+        with self._lock:
+            progress = IngestProgress(f"ingest-{next(self._ids)}", source)
+            self._jobs[progress.job_id] = progress
+            while len(self._jobs) > self.keep:
+                self._jobs.popitem(last=False)
+            return progress
+
+    # PUBLIC_INTERFACE
+    def list(self) -> List[dict]:
+        """Return snapshots of recent runs, newest first."""
+        with self._lock:
+            return [p.as_dict() for p in reversed(self._jobs.values())]
+
+
+ingest_jobs = IngestJobs()
+
+
+class CatalogIngestor:
+    """Validates rows incrementally and inserts them in fixed-size chunks."""
+
+    def __init__(
+        self,
+        db: Session,
+        progress: IngestProgress,
+        chunk_size: int = 1000,
+        on_chunk: Optional[Callable[[IngestProgress], None]] = None,
+    ) -> None:
+        self.db = db
+        self.progress = progress
+        self.chunk_size = chunk_size
+        self.on_chunk = on_chunk
+        self._pending: List[dict] = []
+
+    # PUBLIC_INTERFACE
+    def add(self, line: int, raw: object) -> None:
+        """Validate one parsed row; valid rows are buffered and flushed when a chunk fills up."""
+        self.progress.rows_seen += 1
+        if isinstance(raw, RowError):
+            self.progress.error(line, raw)
+            return
+        if not isinstance(raw, dict):
+            self.progress.error(line, "expected an object")
+            return
+        # CSV cells are strings: treat empty cells as missing
+        cleaned = {k: (None if v == "" else v) for k, v in raw.items() if k in TRACK_FIELDS}
+        try:
+            row = AdminCreateTrack.model_validate(cleaned)
+        except ValidationError as exc:
+            err = exc.errors()[0]
+            field = ".".join(str(p) for p in err.get("loc", ()))
+            self.progress.error(line, f"{field}: {err['msg']}" if field else err["msg"])
+            return
+        self._pending.append(row.model_dump())
+        if len(self._pending) >= self.chunk_size:
+            self.flush()
+
+    # PUBLIC_INTERFACE
+    def flush(self) -> None:
+        """Insert buffered rows with one multi-row INSERT and commit the chunk."""
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        try:
+            self.db.execute(insert(Track), rows)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        self.progress.inserted += len(rows)
+        if self.on_chunk is not None:
+            self.on_chunk(self.progress)
+
+    # PUBLIC_INTERFACE
+    def finish(self) -> IngestProgress:
+        """Flush the last chunk and refresh derived structures once for the whole ingest."""
+        try:
+            self.flush()
+            if self.progress.inserted:
+                refresh_after_ingest(self.db)
+            self.progress.status = "completed"
+            logger.info(
+                "Catalog ingest %s finished: %d rows, %d inserted, %d failed",
+                self.progress.job_id,
+                self.progress.rows_seen,
+                self.progress.inserted,
+                self.progress.failed,
+            )
+        except Exception:
+            self.progress.status = "failed"
+            raise
+        finally:
+            self.progress.finished = time.monotonic()
+        return self.progress
+
+    # PUBLIC_INTERFACE
+    def abort(self) -> None:
+        """Mark the run failed (rows from already committed chunks stay inserted)."""
+        self._pending = []
+        self.progress.status = "failed"
+        self.progress.finished = time.monotonic()
+
+
+# PUBLIC_INTERFACE
+def refresh_after_ingest(db: Session) -> None:
+    """Bulk post-ingest maintenance: refresh planner statistics for tracks once."""
+    db.execute(text("ANALYZE tracks"))
+    db.commit()
+
+
+class RowParser:
+    """
+    Incremental CSV/NDJSON row parser fed one line at a time. Lines given as bytes are decoded
+    as strict UTF-8; an undecodable line fails its row (the whole CSV record it belongs to).
+    """
+
+    def __init__(self, fmt: str, max_record_chars: Optional[int] = None) -> None:
+        self.fmt = fmt
+        self.line_no = 0
+        self.max_record_chars = max_record_chars
+        self._header: Optional[List[str]] = None
+        self._record = ""
+        self._record_line = 0
+        self._quotes = 0
+        self._invalid: Optional[str] = None
+
+    # PUBLIC_INTERFACE
+    def feed(self, line: Union[str, bytes]) -> Optional[Tuple[int, object]]:
+        """Consume one line; return (line_number, row-or-error) when a full row is available."""
+        self.line_no += 1
+        if isinstance(line, bytes):
+            try:
+                line = line.decode("utf-8")
+            except UnicodeDecodeError:
+                if self.fmt == "ndjson":
+                    return self.line_no, RowError("invalid UTF-8")
+                # Still tracked for its quotes, so the record's extent is found as usual
+                line = line.decode("utf-8", errors="replace")
+                self._invalid = "invalid UTF-8"
+        if self.fmt == "ndjson":
+            if not line.strip():
+                return None
+            try:
+                return self.line_no, json.loads(line)
+            except ValueError:
+                return self.line_no, RowError("invalid JSON")
+        if not self._record:
+            self._record_line = self.line_no
+        self._record += line if not self._record else "\n" + line
+        # A CSV record can span lines inside quotes; it is complete once quotes are balanced
+        self._quotes += line.count('"')
+        if self._quotes % 2:
+            if self.max_record_chars is not None and len(self._record) > self.max_record_chars:
+                return self._fail(f"record longer than {self.max_record_chars} characters (unterminated quoted field?)")
+            return None
+        if self._invalid is not None:
+            return self._fail(self._invalid)
+        values = next(csv.reader(io.StringIO(self._record)), [])
+        self._record = ""
+        self._quotes = 0
+        if not values:
+            return None
+        if self._header is None:
+            self._header = [h.strip().lower() for h in values]
+            return None
+        return self._record_line, dict(zip(self._header, values))
+
+    def _fail(self, message: str) -> Tuple[int, object]:
+        self._record = ""
+        self._quotes = 0
+        self._invalid = None
+        return self._record_line, RowError(message)
+
+    # PUBLIC_INTERFACE
+    def close(self) -> Optional[Tuple[int, object]]:
+        """Return an error for a trailing incomplete CSV record, if any."""
+        if self._record:
+            return self._record_line, RowError("unterminated quoted field")
+        return None
+
+
+# PUBLIC_INTERFACE
+def iter_rows(lines: Iterable[Union[str, bytes]], fmt: str) -> Iterator[Tuple[int, object]]:
+    """Parse lines as CSV (with header) or NDJSON, yielding (line_number, row-or-error) pairs."""
+    parser = RowParser(fmt)
+    for line in lines:
+        parsed = parser.feed(line)
+        if parsed is not None:
+            yield parsed
+    tail = parser.close()
+    if tail is not None:
+        yield tail
+
+
+# PUBLIC_INTERFACE
+def ingest_file(db: Session, path: str, fmt: str, chunk_size: int = 1000, on_chunk: Optional[Callable[[IngestProgress], None]] = None) -> IngestProgress:
+    """Ingest a CSV/NDJSON file from disk (used by the CLI)."""
+    progress = ingest_jobs.create(path)
+    ingestor = CatalogIngestor(db, progress, chunk_size=chunk_size, on_chunk=on_chunk)
+    try:
+        with open(path, "rb") as fh:
+            for line_no, row in iter_rows((line.rstrip(b"\r\n") for line in fh), fmt):
+                ingestor.add(line_no, row)
+    except Exception:
+        ingestor.abort()
+        raise
+    return ingestor.finish()
+
+
+# PUBLIC_INTERFACE
+def detect_format(content_type: Optional[str], explicit: Optional[str] = None) -> Optional[str]:
+    """Pick the upload format from an explicit parameter or the Content-Type header."""
+    if explicit:
+        return explicit if explicit in FORMATS else None
+    ct = (content_type or "").split(";")[0].strip().lower()
+    if ct in ("text/csv", "application/csv"):
+        return "csv"
+    if ct in ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/json-seq"):
+        return "ndjson"
+    return None
@@ -0,0 +1,112 @@
+"""
+Versioned cache of serialized playlist detail responses.
+
+Entries are keyed by playlist id and tagged with the playlist's version counter, which
+doubles as the ETag. A cached version is trusted for PLAYLIST_CACHE_TTL_SECONDS; after
+that it is re-checked against playlists.version with a single-column query, so changes
+made by other workers/processes (including track metadata updates that bump versions)
+are picked up within the TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from app.config import get_settings
+
+
+class CachedPlaylist:
+    __slots__ = ("playlist_id", "owner_id", "version", "etag", "body", "checked_at")
+
+    def __init__(self, playlist_id: int, owner_id: int, version: int, body: bytes) -> None:
+        self.playlist_id = playlist_id
+        self.owner_id = owner_id
+        self.version = version
+        self.etag = make_etag(playlist_id, version)
+        self.body = body
+        self.checked_at = time.monotonic()
+
+
+# PUBLIC_INTERFACE
+def make_etag(playlist_id: int, version: int) -> str:
+    """Return the strong ETag for a playlist version."""
+    return f'"pl-{playlist_id}-v{version}"'
+
+
+# PUBLIC_INTERFACE
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header against an ETag (weak comparison, '*' matches)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class PlaylistDetailCache:
+    """Size-bounded LRU of serialized PlaylistDetail bodies keyed by playlist id."""
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 5.0) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, CachedPlaylist]" = OrderedDict()
+
+    # PUBLIC_INTERFACE
+    def get(self, playlist_id: int) -> Optional[CachedPlaylist]:
+        """Return the cached entry for playlist_id, if any."""
+        with self._lock:
+            entry = self._entries.get(playlist_id)
+            if entry is not None:
+                self._entries.move_to_end(playlist_id)
+            return entry
+
+    # PUBLIC_INTERFACE
+    def is_fresh(self, entry: CachedPlaylist) -> bool:
+        """Whether the entry's version can be trusted without re-checking the DB."""
+        return time.monotonic() - entry.checked_at < self.ttl_seconds
+
+    # PUBLIC_INTERFACE
+    def mark_checked(self, entry: CachedPlaylist) -> None:
+        """Record that the entry's version was just confirmed against the DB."""
+        entry.checked_at = time.monotonic()
+
+    # PUBLIC_INTERFACE
+    def put(self, playlist_id: int, owner_id: int, version: int, body: bytes) -> CachedPlaylist:
+        """Store a serialized body for a playlist version, replacing older versions."""
+        entry = CachedPlaylist(playlist_id, owner_id, version, body)
+        with self._lock:
+            current = self._entries.get(playlist_id)
+            if current is not None and current.version > version:
+                return current
+            self._entries[playlist_id] = entry
+            self._entries.move_to_end(playlist_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    # PUBLIC_INTERFACE
+    def invalidate(self, playlist_ids: Iterable[int]) -> None:
+        """Drop cached entries for the given playlists."""
+        with self._lock:
+            for pid in playlist_ids:
+                self._entries.pop(pid, None)
+
+    # PUBLIC_INTERFACE
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+settings = get_settings()
+playlist_cache = PlaylistDetailCache(
+    max_entries=settings.PLAYLIST_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PLAYLIST_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,208 @@
+"""
+Set-based playlist track operations.
+
+Track membership changes are applied with a bounded number of statements regardless
+of how many ids are involved: one IN lookup per chunk of ids, one multi-row INSERT and
+one DELETE, instead of per-id SELECTs and ORM collection rewrites. Track listings are
+read as plain rows ordered by playlist position, never through the ORM relationship.
+"""
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set
+
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.db.models import Playlist, Track, playlist_tracks_table
+from app.serialization import TRACK_COLUMNS
+from app.services.track_cache import track_cache
+
+PLACEHOLDER_FIELDS = ("title", "artist", "album", "genre", "duration", "cover_image")
+
+# Keep IN lists well below bind-parameter limits (SQLite allows 32766 per statement).
+IN_CHUNK_SIZE = 5000
+
+
+def _chunks(ids: Sequence[int], size: int = IN_CHUNK_SIZE) -> Iterator[Sequence[int]]:
+    for i in range(0, len(ids), size):
+        yield ids[i : i + size]
+
+
+def _unique(ids: Iterable[int]) -> List[int]:
+    """Deduplicate ids while keeping first-seen order."""
+    return list(dict.fromkeys(ids))
+
+
+# PUBLIC_INTERFACE
+def ensure_tracks(db: Session, track_ids: Iterable[int], metadata: Optional[Dict[int, dict]] = None) -> Set[int]:
+    """
+    Make sure all ids exist in tracks, inserting placeholder rows for missing ones. Returns the created ids.
+    metadata may supply known fields (title, artist, ...) for placeholders, keyed by track id.
+    """
+    ids = _unique(track_ids)
+    if not ids:
+        return set()
+    # Existence is checked in the DB, not the track cache: a cached id may have been deleted since
+    existing: Set[int] = set()
+    for chunk in _chunks(ids):
+        existing.update(db.scalars(select(Track.id).where(Track.id.in_(chunk))))
+    missing = [tid for tid in ids if tid not in existing]
+    if missing:
+        # Minimal placeholder tracks for demo purposes, enriched with any supplied metadata
+        metadata = metadata or {}
+        rows = []
+        for tid in missing:
+            known = {k: v for k, v in metadata.get(tid, {}).items() if v is not None and k in PLACEHOLDER_FIELDS}
+            rows.append({**{f: None for f in PLACEHOLDER_FIELDS}, "title": f"Track {tid}", "artist": "Unknown", **known, "id": tid})
+        db.execute(insert(Track), rows)
+        track_cache.stage(db, rows)
+    return set(missing)
+
+
+# PUBLIC_INTERFACE
+def add_tracks(db: Session, playlist_id: int, track_ids: Iterable[int]) -> int:
+    """Link tracks to a playlist, skipping ones already present. Returns the number of rows inserted."""
+    ids = _unique(track_ids)
+    if not ids:
+        return 0
+    present: Set[int] = set()
+    for chunk in _chunks(ids):
+        present.update(
+            db.scalars(
+                select(playlist_tracks_table.c.track_id).where(
+                    and_(playlist_tracks_table.c.playlist_id == playlist_id, playlist_tracks_table.c.track_id.in_(chunk))
+                )
+            )
+        )
+    new_ids = [tid for tid in ids if tid not in present]
+    if new_ids:
+        # Lock the playlist row so concurrent appends read max(position) one after the other
+        # (positions are unique per playlist; SQLite serializes writers on its own)
+        db.execute(select(Playlist.id).where(Playlist.id == playlist_id).with_for_update())
+        last = db.scalar(
+            select(func.max(playlist_tracks_table.c.position)).where(playlist_tracks_table.c.playlist_id == playlist_id)
+        )
+        start = 0 if last is None else last + 1
+        db.execute(
+            insert(playlist_tracks_table),
+            [{"playlist_id": playlist_id, "track_id": tid, "position": start + i} for i, tid in enumerate(new_ids)],
+        )
+    return len(new_ids)
+
+
+# PUBLIC_INTERFACE
+def bump_version(db: Session, playlist_id: int) -> int:
+    """
+    Increment a playlist's version in SQL and return the new value. The UPDATE also holds the
+    playlist row lock until commit, so concurrent edits of one playlist take turns.
+    """
+    return db.execute(
+        update(Playlist)
+        .where(Playlist.id == playlist_id)
+        .values(version=Playlist.version + 1)
+        .returning(Playlist.version)
+        .execution_options(synchronize_session=False)
+    ).scalar_one()
+
+
+# PUBLIC_INTERFACE
+def remove_tracks(db: Session, playlist_id: int, track_ids: Iterable[int]) -> int:
+    """Unlink tracks from a playlist. Returns the number of rows deleted."""
+    ids = _unique(track_ids)
+    removed = 0
+    for chunk in _chunks(ids):
+        result = db.execute(
+            delete(playlist_tracks_table).where(
+                and_(playlist_tracks_table.c.playlist_id == playlist_id, playlist_tracks_table.c.track_id.in_(chunk))
+            )
+        )
+        removed += result.rowcount or 0
+    return removed
+
+
+# PUBLIC_INTERFACE
+def refresh_totals(db: Session, playlist_ids: Iterable[int]) -> None:
+    """Recompute the denormalized track_count/total_duration of the given playlists."""
+    ids = _unique(playlist_ids)
+    pt = playlist_tracks_table
+    count_q = select(func.count()).select_from(pt).where(pt.c.playlist_id == Playlist.id).scalar_subquery()
+    duration_q = (
+        select(func.coalesce(func.sum(Track.duration), 0.0))
+        .select_from(pt.join(Track, Track.id == pt.c.track_id))
+        .where(pt.c.playlist_id == Playlist.id)
+        .scalar_subquery()
+    )
+    for chunk in _chunks(ids):
+        db.execute(
+            update(Playlist)
+            .where(Playlist.id.in_(chunk))
+            .values(track_count=count_q, total_duration=duration_q)
+            .execution_options(synchronize_session=False)
+        )
+
+
+# PUBLIC_INTERFACE
+def track_rows(
+    db: Session,
+    playlist_id: int,
+    after_position: Optional[int] = None,
+    limit: Optional[int] = None,
+    after_track: Optional[int] = None,
+) -> List[dict]:
+    """
+    Return a playlist's tracks ordered by (position, track_id), optionally as a keyset page after
+    (after_position, after_track), or after after_position alone when after_track is None.
+    Only (position, track_id) is read from playlist_tracks; track metadata comes from the track cache.
+    """
+    pt = playlist_tracks_table
+    q = select(pt.c.position, pt.c.track_id).where(pt.c.playlist_id == playlist_id).order_by(pt.c.position, pt.c.track_id)
+    if after_position is not None and after_track is not None:
+        q = q.where(or_(pt.c.position > after_position, and_(pt.c.position == after_position, pt.c.track_id > after_track)))
+    elif after_position is not None:
+        q = q.where(pt.c.position > after_position)
+    if limit is not None:
+        q = q.limit(limit)
+    links = db.execute(q).all()
+    records = track_cache.get_many(db, [tid for _, tid in links])
+    return [{"position": position, **records[tid].as_dict()} for position, tid in links if tid in records]
+
+
+# PUBLIC_INTERFACE
+def iter_track_rows(db: Session, playlist_id: int, batch_size: int = 1000) -> Iterator[dict]:
+    """Stream a playlist's tracks ordered by position using a server-side cursor (constant memory)."""
+    pt = playlist_tracks_table
+    q = (
+        select(pt.c.position, *TRACK_COLUMNS)
+        .select_from(pt.join(Track, Track.id == pt.c.track_id))
+        .where(pt.c.playlist_id == playlist_id)
+        .order_by(pt.c.position, pt.c.track_id)
+        .execution_options(yield_per=batch_size)
+    )
+    result = db.execute(q)
+    keys = tuple(str(k) for k in result.keys())
+    for row in result:
+        yield dict(zip(keys, row))
+
+
+# PUBLIC_INTERFACE
+def tracks_changed(db: Session, track_ids: Iterable[int]) -> List[int]:
+    """
+    Propagate track metadata changes to the playlists containing those tracks:
+    refresh their totals and bump their version so cached details/ETags are invalidated.
+    Returns the affected playlist ids (callers should also drop them from the in-process cache).
+    """
+    ids = _unique(track_ids)
+    affected: Set[int] = set()
+    for chunk in _chunks(ids):
+        affected.update(
+            db.scalars(select(playlist_tracks_table.c.playlist_id).where(playlist_tracks_table.c.track_id.in_(chunk)).distinct())
+        )
+    playlist_ids = sorted(affected)
+    if playlist_ids:
+        refresh_totals(db, playlist_ids)
+        for chunk in _chunks(playlist_ids):
+            db.execute(
+                update(Playlist)
+                .where(Playlist.id.in_(chunk))
+                .values(version=Playlist.version + 1)
+                .execution_options(synchronize_session=False)
+            )
+    return playlist_ids
@@ -0,0 +1,196 @@
+"""
+Low-overhead sampling profiler for individual requests.
+
+One daemon thread wakes every interval while at least one request is being profiled, takes
+sys._current_frames() and adds each busy thread's stack to every active profile. Nothing
+is traced or hooked, so a profiled request runs at full speed; the cost is one stack walk
+per thread per tick, only while profiles are open. Idle threads (an event loop waiting in
+select, pool threads waiting for work) are skipped.
+
+Samples are per process, not per task: a profile shows what the worker's threads were doing
+while the request ran, so under concurrency it also contains neighbouring requests. The
+`concurrent` count recorded with each profile says how many other requests were in flight.
+
+Finished profiles are reduced to summaries (top folded stacks and hottest leaf functions)
+and kept in a fixed-size ring buffer.
+"""
+import itertools
+import os
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Set
+
+from app.config import get_settings
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) + os.sep
+_STDLIB = sysconfig.get_paths()["stdlib"] + os.sep
+# Leaf frames that mean "this thread is parked, not working"
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+}
+
+
+def _short_path(filename: str) -> str:
+    if filename.startswith(_APP_ROOT):
+        return filename[len(_APP_ROOT):]
+    marker = "site-packages" + os.sep
+    idx = filename.rfind(marker)
+    if idx >= 0:
+        return filename[idx + len(marker):]
+    if filename.startswith(_STDLIB):
+        return filename[len(_STDLIB):]
+    return filename
+
+
+class RequestProfile:
+    """Samples collected for one request while it runs."""
+
+    __slots__ = ("method", "route", "started_at", "started", "concurrent", "stacks", "samples")
+
+    def __init__(self, method: str, route: str, concurrent: int) -> None:
+        self.method = method
+        self.route = route
+        self.started_at = datetime.utcnow()
+        self.started = time.perf_counter()
+        self.concurrent = concurrent
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+
+class SamplingProfiler:
+    """Shared sampler thread plus a ring buffer of finished profile summaries."""
+
+    def __init__(self, interval_ms: float = 5.0, keep: int = 50, top_stacks: int = 30, max_depth: int = 64) -> None:
+        self.interval = max(interval_ms, 1.0) / 1000.0
+        self.top_stacks = top_stacks
+        self.max_depth = max_depth
+        self._lock = threading.Lock()
+        self._active: Set[RequestProfile] = set()
+        self._recent: Deque[dict] = deque(maxlen=keep)
+        self._ids = itertools.count(1)
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._labels: Dict[object, str] = {}
+
+    # PUBLIC_INTERFACE
+    def begin(self, method: str, route: str) -> RequestProfile:
+        """Start sampling on behalf of a request."""
+        with self._lock:
+            profile = RequestProfile(method, route, concurrent=len(self._active))
+            self._active.add(profile)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return profile
+
+    # PUBLIC_INTERFACE
+    def elapsed(self, profile: RequestProfile) -> float:
+        """Seconds since the profile began."""
+        return time.perf_counter() - profile.started
+
+    # PUBLIC_INTERFACE
+    def end(self, profile: RequestProfile, status: int, reason: Optional[str]) -> None:
+        """Stop sampling; keep a summary in the ring buffer when reason is given (sampled/slow)."""
+        duration = time.perf_counter() - profile.started
+        with self._lock:
+            self._active.discard(profile)
+        if reason is None:
+            return
+        summary = self._summarize(profile, status, duration, reason)
+        with self._lock:
+            self._recent.append(summary)
+
+    # PUBLIC_INTERFACE
+    def recent(self, limit: int = 50, route: Optional[str] = None) -> List[dict]:
+        """Finished profile summaries, newest first (without the folded stacks)."""
+        with self._lock:
+            items = list(self._recent)
+        items.reverse()
+        if route:
+            items = [p for p in items if p["route"] == route]
+        return [{k: v for k, v in p.items() if k != "stacks"} for p in items[:limit]]
+
+    # PUBLIC_INTERFACE
+    def get(self, profile_id: int) -> Optional[dict]:
+        """One profile summary including its top folded stacks."""
+        with self._lock:
+            return next((p for p in self._recent if p["id"] == profile_id), None)
+
+    def _summarize(self, profile: RequestProfile, status: int, duration: float, reason: str) -> dict:
+        leaves: Counter = Counter()
+        for stack, count in profile.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        interval_ms = self.interval * 1000
+        return {
+            "id": next(self._ids),
+            "method": profile.method,
+            "route": profile.route,
+            "status": status,
+            "reason": reason,
+            "started_at": profile.started_at,
+            "duration_ms": round(duration * 1000, 3),
+            "samples": profile.samples,
+            "interval_ms": interval_ms,
+            "concurrent": profile.concurrent,
+            "top_functions": [
+                {"frame": frame, "samples": n, "approx_ms": round(n * interval_ms, 1)} for frame, n in leaves.most_common(15)
+            ],
+            "stacks": [{"stack": stack, "samples": n} for stack, n in profile.stacks.most_common(self.top_stacks)],
+        }
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _folded(self, frame) -> Optional[str]:
+        code = frame.f_code
+        if (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES:
+            return None
+        labels = []
+        depth = 0
+        while frame is not None and depth < self.max_depth:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+            depth += 1
+        labels.reverse()
+        return ";".join(labels)
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while True:
+            with self._lock:
+                idle = not self._active
+                if idle:
+                    self._wake.clear()
+            if idle:
+                self._wake.wait()
+                continue
+            time.sleep(self.interval)
+            stacks = [
+                stack
+                for tid, frame in sys._current_frames().items()
+                if tid != own and (stack := self._folded(frame)) is not None
+            ]
+            with self._lock:
+                for profile in self._active:
+                    profile.samples += 1
+                    profile.stacks.update(stacks)
+
+
+settings = get_settings()
+profiler = SamplingProfiler(
+    interval_ms=settings.PROFILER_INTERVAL_MS,
+    keep=settings.PROFILER_KEEP,
+    top_stacks=settings.PROFILER_TOP_STACKS,
+)
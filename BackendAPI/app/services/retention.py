@@ -0,0 +1,372 @@
+"""
+Retention for the raw event tables (stream_sessions, recommendation_events).
+
+Months that are entirely older than RETENTION_DAYS, and already folded into the analytics
+rollups, are moved to compressed archive files and removed from the database:
+
+- Rows are read in batches of RETENTION_BATCH_SIZE ordered by (timestamp, id). Each batch
+  becomes one gzip file of columnar JSON ({"columns": [...], "data": {column: [values]}})
+  under RETENTION_ARCHIVE_DIR/{table}/{YYYY-MM}/, written to a temp name, fsynced and
+  renamed. A per-month manifest.json lists the files with their row counts and time range.
+- On PostgreSQL a month with its own partition (migration 0009) is removed by detaching and
+  dropping the partition once every batch is archived; rows are never deleted one by one.
+  Elsewhere (SQLite, or rows in the DEFAULT partition) each archived batch is deleted by id
+  in the same step.
+- Files are named after the first (timestamp, id) of their batch, so a run interrupted
+  between writing a file and removing its rows rewrites the same file on the next run.
+
+One run handles at most RETENTION_MAX_BATCHES batches per table. Runs are serialized by a
+lock file in the archive directory and, on PostgreSQL, an advisory lock. On PostgreSQL each
+run also creates the partitions for the next PARTITION_MONTHS_AHEAD months.
+"""
+import fcntl
+import gzip
+import logging
+import os
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import orjson
+from sqlalchemy import and_, delete, func, select, text, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app import metrics
+from app.config import get_settings
+from app.db.models import RecommendationEvent, StreamSession
+from app.services.analytics import EVENTS, LISTENING, PLAYS, watermarks
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FORMAT = 1
+MANIFEST = "manifest.json"
+LOCK_FILE = ".retention.lock"
+# pg_try_advisory_lock key shared by every worker and host
+ADVISORY_LOCK_KEY = 0x5245544E
+
+
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def next_month(month: datetime) -> datetime:
+    return datetime(month.year + (month.month == 12), month.month % 12 + 1, 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+class RetainedTable:
+    """A raw table under retention: its timestamp column and the rollups that must have consumed it."""
+
+    def __init__(self, model, ts_column: str, rollups: Tuple[str, ...]) -> None:
+        self.table = model.__table__
+        self.name = self.table.name
+        self.ts = self.table.c[ts_column]
+        self.id = self.table.c.id
+        self.columns = [c.name for c in self.table.columns]
+        self.rollups = rollups
+
+
+RETAINED = (
+    RetainedTable(StreamSession, "started_at", (PLAYS, LISTENING)),
+    RetainedTable(RecommendationEvent, "created_at", (EVENTS,)),
+)
+
+
+class ArchiveMonth:
+    """The archive directory of one table and month, with its manifest."""
+
+    def __init__(self, archive_dir: str, table: str, month: datetime, columns: List[str]) -> None:
+        self.table = table
+        self.month = month
+        self.path = os.path.join(archive_dir, table, f"{month:%Y-%m}")
+        manifest_path = os.path.join(self.path, MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "rb") as fh:
+                self.manifest = orjson.loads(fh.read())
+        else:
+            self.manifest = {
+                "format": ARCHIVE_FORMAT,
+                "table": table,
+                "month": f"{month:%Y-%m}",
+                "columns": columns,
+                "files": [],
+                "last_key": None,
+                "complete": False,
+            }
+
+    @property
+    def last_key(self) -> Optional[Tuple[datetime, int]]:
+        key = self.manifest["last_key"]
+        return (datetime.fromisoformat(key[0]), key[1]) if key else None
+
+    def write_batch(self, columns: List[str], rows: List[tuple], ts_index: int) -> None:
+        """Write rows as one columnar gzip file and record it in the manifest."""
+        first, last = rows[0], rows[-1]
+        name = f"part-{first[ts_index]:%Y%m%dT%H%M%S%f}-{first[0]}.json.gz"
+        payload = {
+            "format": ARCHIVE_FORMAT,
+            "table": self.table,
+            "columns": columns,
+            "rows": len(rows),
+            "data": {col: [row[i] for row in rows] for i, col in enumerate(columns)},
+        }
+        _atomic_write(os.path.join(self.path, name), gzip.compress(orjson.dumps(payload), compresslevel=6))
+        files = [f for f in self.manifest["files"] if f["name"] != name]
+        files.append({
+            "name": name,
+            "rows": len(rows),
+            "min_ts": first[ts_index].isoformat(),
+            "max_ts": last[ts_index].isoformat(),
+        })
+        self.manifest["files"] = files
+        self.manifest["last_key"] = [last[ts_index].isoformat(), last[0]]
+        self.save()
+
+    def save(self) -> None:
+        _atomic_write(os.path.join(self.path, MANIFEST), orjson.dumps(self.manifest, option=orjson.OPT_INDENT_2))
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+class RetentionManager:
+    """Archives and removes months of raw rows past the retention window."""
+
+    def __init__(
+        self,
+        archive_dir: str,
+        retention_days: int,
+        batch_size: int = 50_000,
+        max_batches: int = 20,
+        months_ahead: int = 3,
+    ) -> None:
+        self.archive_dir = archive_dir
+        self.retention = timedelta(days=retention_days)
+        self.batch_size = max(batch_size, 1)
+        self.max_batches = max(max_batches, 1)
+        self.months_ahead = months_ahead
+
+    # PUBLIC_INTERFACE
+    def run(self, engine: Engine, now: Optional[datetime] = None) -> Dict[str, dict]:
+        """Run one retention pass. Returns per-table counts (rows archived, months completed, partitions dropped)."""
+        now = now or datetime.utcnow()
+        report: Dict[str, dict] = {}
+        with self._exclusive(engine) as acquired:
+            if not acquired:
+                logger.debug("Retention run skipped: another run holds the lock")
+                return report
+            with Session(engine) as db:
+                postgres = engine.dialect.name == "postgresql"
+                if postgres:
+                    self.ensure_partitions(db, now)
+                marks = watermarks(db)
+                db.commit()
+                for rt in RETAINED:
+                    limit = self._archive_limit(rt, now, marks)
+                    report[rt.name] = self._retain(db, rt, limit, postgres) if limit else {"archived": 0, "months": 0, "dropped": 0}
+        if any(r["archived"] or r["dropped"] for r in report.values()):
+            logger.info("Retention run: %s", report)
+        return report
+
+    # PUBLIC_INTERFACE
+    def ensure_partitions(self, db: Session, now: datetime) -> None:
+        """Create monthly partitions from the current month through months_ahead (PostgreSQL)."""
+        for rt in RETAINED:
+            if not _is_partitioned(db, rt.name):
+                continue
+            month = month_start(now)
+            for _ in range(self.months_ahead + 1):
+                upper = next_month(month)
+                try:
+                    db.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS {partition_name(rt.name, month)} PARTITION OF {rt.name} "
+                        f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+                    ))
+                    db.commit()
+                except Exception:  # noqa: BLE001 - e.g. the DEFAULT partition already holds rows of that month
+                    db.rollback()
+                    logger.warning("Could not create partition %s", partition_name(rt.name, month), exc_info=True)
+                month = upper
+
+    def _archive_limit(self, rt: RetainedTable, now: datetime, marks: Dict[str, datetime]) -> Optional[datetime]:
+        """Months ending at or before the returned month start may be archived."""
+        bounds = [now - self.retention]
+        for rollup in rt.rollups:
+            if rollup not in marks:
+                # Not rolled up yet: archiving would lose these rows from the daily stats
+                return None
+            bounds.append(marks[rollup])
+        return month_start(min(bounds))
+
+    def _retain(self, db: Session, rt: RetainedTable, limit: datetime, postgres: bool) -> dict:
+        result = {"archived": 0, "months": 0, "dropped": 0}
+        budget = self.max_batches
+        oldest = db.scalar(select(func.min(rt.ts)).where(rt.ts < limit))
+        db.commit()
+        month = month_start(oldest) if oldest is not None else limit
+        while month < limit and budget > 0:
+            own_partition = postgres and _table_exists(db, partition_name(rt.name, month))
+            archive = ArchiveMonth(self.archive_dir, rt.name, month, rt.columns)
+            archived, budget, done = self._archive_month(db, rt, archive, own_partition, budget)
+            result["archived"] += archived
+            if not done:
+                break
+            if own_partition:
+                _drop_partition(db, rt.name, partition_name(rt.name, month))
+                result["dropped"] += 1
+            archive.manifest["complete"] = True
+            archive.save()
+            result["months"] += 1
+            month = next_month(month)
+        if postgres:
+            result["dropped"] += self._drop_empty_partitions(db, rt, limit)
+        return result
+
+    def _archive_month(self, db: Session, rt: RetainedTable, archive: ArchiveMonth, own_partition: bool, budget: int):
+        """Archive one month's rows in batches. Returns (rows archived, remaining budget, month finished)."""
+        upper = next_month(archive.month)
+        in_month = and_(rt.ts >= archive.month, rt.ts < upper)
+        ts_index = rt.columns.index(rt.ts.name)
+        archived = 0
+        while budget > 0:
+            q = select(*rt.table.c).where(in_month).order_by(rt.ts, rt.id).limit(self.batch_size)
+            # Partition rows stay until the partition is dropped, so resume after the last archived key
+            if own_partition and archive.last_key is not None:
+                q = q.where(tuple_(rt.ts, rt.id) > tuple_(*archive.last_key))
+            rows = [tuple(r) for r in db.execute(q)]
+            if not rows:
+                db.commit()
+                return archived, budget, True
+            archive.write_batch(rt.columns, rows, ts_index)
+            if not own_partition:
+                ids = [r[0] for r in rows]
+                db.execute(delete(rt.table).where(in_month, rt.id.in_(ids)))
+            db.commit()
+            archived += len(rows)
+            budget -= 1
+            metrics.retention_rows_archived.labels(rt.name).inc(len(rows))
+            if len(rows) < self.batch_size:
+                return archived, budget, True
+        return archived, budget, False
+
+    def _drop_empty_partitions(self, db: Session, rt: RetainedTable, limit: datetime) -> int:
+        """Drop partitions of months before limit that hold no rows (e.g. months without traffic)."""
+        dropped = 0
+        pattern = re.compile(rf"^{rt.name}_p(\d{{4}})_(\d{{2}})$")
+        children = db.scalars(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:parent)"
+        ), {"parent": rt.name}).all()
+        for child in children:
+            m = pattern.match(child)
+            if not m or datetime(int(m.group(1)), int(m.group(2)), 1) >= limit:
+                continue
+            if db.scalar(text(f"SELECT EXISTS (SELECT 1 FROM {child})")):
+                continue
+            _drop_partition(db, rt.name, child)
+            dropped += 1
+        db.commit()
+        return dropped
+
+    @contextmanager
+    def _exclusive(self, engine: Engine) -> Iterator[bool]:
+        os.makedirs(self.archive_dir, exist_ok=True)
+        with open(os.path.join(self.archive_dir, LOCK_FILE), "a+") as fh:
+            try:
+                fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                if engine.dialect.name != "postgresql":
+                    yield True
+                    return
+                # Other hosts share the database but not this lock file
+                with engine.connect() as conn:
+                    if not conn.scalar(text("SELECT pg_try_advisory_lock(:k)"), {"k": ADVISORY_LOCK_KEY}):
+                        yield False
+                        return
+                    try:
+                        yield True
+                    finally:
+                        conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": ADVISORY_LOCK_KEY})
+                        conn.commit()
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _table_exists(db: Session, name: str) -> bool:
+    return db.scalar(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name})
+
+
+def _is_partitioned(db: Session, name: str) -> bool:
+    return db.scalar(text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:name)"), {"name": name}) or False
+
+
+def _drop_partition(db: Session, table: str, partition: str) -> None:
+    db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition}"))
+    db.execute(text(f"DROP TABLE {partition}"))
+    db.commit()
+    logger.info("Dropped archived partition %s", partition)
+
+
+# PUBLIC_INTERFACE
+def archived_months(archive_dir: str, table: str) -> List[dict]:
+    """Manifests of a table's archived months, oldest first."""
+    base = os.path.join(archive_dir, table)
+    if not os.path.isdir(base):
+        return []
+    out = []
+    for name in sorted(os.listdir(base)):
+        path = os.path.join(base, name, MANIFEST)
+        if os.path.exists(path):
+            with open(path, "rb") as fh:
+                out.append(orjson.loads(fh.read()))
+    return out
+
+
+# PUBLIC_INTERFACE
+def iter_archive(archive_dir: str, table: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Iterator[dict]:
+    """
+    Yield archived rows of table (as dicts, timestamps as ISO strings) with start <= timestamp < end,
+    reading only the files whose time range overlaps.
+    """
+    ts_column = next(rt.ts.name for rt in RETAINED if rt.name == table)
+    lo = start.isoformat() if start else None
+    hi = end.isoformat() if end else None
+    for manifest in archived_months(archive_dir, table):
+        for entry in manifest["files"]:
+            if (hi and entry["min_ts"] >= hi) or (lo and entry["max_ts"] < lo):
+                continue
+            with gzip.open(os.path.join(archive_dir, table, manifest["month"], entry["name"]), "rb") as fh:
+                payload = orjson.loads(fh.read())
+            columns = payload["columns"]
+            data = payload["data"]
+            for values in zip(*(data[c] for c in columns)):
+                row = dict(zip(columns, values))
+                ts = row[ts_column]
+                if (lo and ts < lo) or (hi and ts >= hi):
+                    continue
+                yield row
+
+
+settings = get_settings()
+retention = RetentionManager(
+    archive_dir=settings.RETENTION_ARCHIVE_DIR,
+    retention_days=settings.RETENTION_DAYS,
+    batch_size=settings.RETENTION_BATCH_SIZE,
+    max_batches=settings.RETENTION_MAX_BATCHES,
+    months_ahead=settings.PARTITION_MONTHS_AHEAD,
+)
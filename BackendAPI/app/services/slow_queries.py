@@ -0,0 +1,181 @@
+"""
+Slow-query log with captured plans.
+
+Cursor hooks time every statement; one slower than the threshold is recorded with its bound
+parameters, duration and originating route (request_context.current_route) into a ring
+buffer. Its plan is captured off the request path: a daemon thread runs EXPLAIN (EXPLAIN
+QUERY PLAN on SQLite) with the same parameters on a separate connection, then logs the
+statement together with the plan. EXPLAIN without ANALYZE does not execute the statement,
+so writes are safe to explain. If the explain queue is full the entry is logged without
+a plan.
+
+Parameters of statements on the users table, or of any statement naming a password column,
+are redacted in entries and logs. Those statements are not explained either, as PostgreSQL
+plans print the bound values.
+"""
+import itertools
+import logging
+import queue
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, List, Mapping, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import get_settings
+from app.request_context import current_route
+
+logger = logging.getLogger(__name__)
+
+EXPLAINABLE = ("select", "insert", "update", "delete", "with")
+MAX_STATEMENT_CHARS = 4000
+MAX_PARAMS_CHARS = 1000
+REDACTED = "<redacted>"
+SENSITIVE_STATEMENT = re.compile(r"\busers\b|password", re.IGNORECASE)
+
+
+def _first_parameters(parameters, executemany: bool):
+    if executemany and parameters:
+        return parameters[0]
+    return parameters
+
+
+def _sensitive(statement: str) -> bool:
+    return SENSITIVE_STATEMENT.search(statement) is not None
+
+
+def _redacted_parameters(params, sensitive: bool) -> str:
+    if not sensitive:
+        return repr(params)[:MAX_PARAMS_CHARS]
+    if isinstance(params, Mapping):
+        # Keep the shape (named parameters) but none of the values
+        return repr({k: REDACTED for k in params})[:MAX_PARAMS_CHARS]
+    return REDACTED
+
+
+class SlowQueryLog:
+    """Ring buffer of slow statements; plans are filled in by a background explain thread."""
+
+    def __init__(self, threshold_ms: float = 200.0, keep: int = 200, explain: bool = True, queue_size: int = 100) -> None:
+        self.threshold = threshold_ms / 1000.0
+        self.explain = explain
+        self._lock = threading.Lock()
+        self._entries: Deque[dict] = deque(maxlen=keep)
+        self._ids = itertools.count(1)
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._engine: Optional[Engine] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # PUBLIC_INTERFACE
+    def install(self, engine: Engine) -> None:
+        """Time statements on engine and record the slow ones."""
+        self._engine = engine
+        if not event.contains(engine, "before_cursor_execute", self._before):
+            event.listen(engine, "before_cursor_execute", self._before)
+            event.listen(engine, "after_cursor_execute", self._after)
+            event.listen(engine, "handle_error", self._error)
+
+    # PUBLIC_INTERFACE
+    def recent(self, limit: int = 50, route: Optional[str] = None) -> List[dict]:
+        """Recorded slow statements, newest first."""
+        with self._lock:
+            items = [dict(e) for e in self._entries]
+        items.reverse()
+        if route:
+            items = [e for e in items if e["route"] == route]
+        return items[:limit]
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("slow_query_started", []).append(time.perf_counter())
+
+    def _error(self, exception_context) -> None:
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("slow_query_started"):
+            conn.info["slow_query_started"].pop()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        started = conn.info.get("slow_query_started")
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        if elapsed < self.threshold or conn.info.get("explaining"):
+            return
+        params = _first_parameters(parameters, executemany)
+        sensitive = _sensitive(statement)
+        entry = {
+            "id": next(self._ids),
+            "at": datetime.utcnow(),
+            "duration_ms": round(elapsed * 1000, 3),
+            "route": current_route.get(),
+            "statement": statement[:MAX_STATEMENT_CHARS],
+            "parameters": _redacted_parameters(params, sensitive),
+            "executemany": executemany,
+            "plan": None,
+        }
+        with self._lock:
+            self._entries.append(entry)
+        verb = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else ""
+        if self.explain and verb in EXPLAINABLE and not sensitive:
+            try:
+                self._queue.put_nowait((entry, statement, params))
+                self._ensure_thread()
+                return
+            except queue.Full:
+                pass
+        self._log(entry)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._explain_loop, name="slow-query-explain", daemon=True)
+                    self._thread.start()
+
+    def _explain_loop(self) -> None:
+        while True:
+            entry, statement, params = self._queue.get()
+            try:
+                plan = self._explain(statement, params)
+            except Exception as exc:  # noqa: BLE001 - a plan is best effort
+                plan = f"EXPLAIN failed: {type(exc).__name__}: {exc}"
+            with self._lock:
+                entry["plan"] = plan
+            self._log(entry)
+
+    def _explain(self, statement: str, params) -> str:
+        dialect = self._engine.dialect.name
+        if dialect == "sqlite":
+            prefix = "EXPLAIN QUERY PLAN "
+        elif dialect == "postgresql":
+            prefix = "EXPLAIN "
+        else:
+            return f"EXPLAIN not supported on {dialect}"
+        with self._engine.connect() as conn:
+            conn.info["explaining"] = True
+            try:
+                rows = conn.exec_driver_sql(prefix + statement, params if params else ()).all()
+            finally:
+                conn.info.pop("explaining", None)
+                conn.rollback()
+        if dialect == "sqlite":
+            # (id, parent, notused, detail)
+            return "\n".join(str(row[-1]) for row in rows)
+        return "\n".join(str(row[0]) for row in rows)
+
+    def _log(self, entry: dict) -> None:
+        logger.warning(
+            "Slow query %.1f ms route=%s params=%s\n%s\nplan:\n%s",
+            entry["duration_ms"], entry["route"], entry["parameters"], entry["statement"], entry["plan"] or "(not captured)",
+        )
+
+
+settings = get_settings()
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_MS,
+    keep=settings.SLOW_QUERY_KEEP,
+    explain=settings.SLOW_QUERY_EXPLAIN,
+)
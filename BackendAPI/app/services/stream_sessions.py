@@ -0,0 +1,442 @@
+"""
+Write-behind registry of streaming sessions.
+
+start/heartbeat/stop are recorded in memory and persisted to stream_sessions in batches
+by a background job, so pressing play never waits on a DB write. Session ids are handed
+out from blocks reserved in the id_blocks table, which keeps ids unique across workers
+without a round trip per session. All stream_sessions inserts must go through the
+registry, since reserved ids bypass the table's own id sequence.
+"""
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import DateTime, and_, bindparam, case, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.db.models import IdBlock, StreamSession
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+ID_BLOCK_NAME = "stream_sessions"
+
+
+class ConcurrentStreamLimitExceeded(Exception):
+    """Raised when a user already has the maximum number of active streams."""
+
+
+class HeartbeatBacklogFull(Exception):
+    """Raised when too many heartbeats for sessions held by other workers await the next flush."""
+
+
+class LiveSession:
+    __slots__ = ("id", "user_id", "track_id", "started_at", "last_heartbeat_at", "ended_at", "persisted", "dirty")
+
+    def __init__(self, session_id: int, user_id: int, track_id: int, started_at: datetime) -> None:
+        self.id = session_id
+        self.user_id = user_id
+        self.track_id = track_id
+        self.started_at = started_at
+        self.last_heartbeat_at: Optional[datetime] = None
+        self.ended_at: Optional[datetime] = None
+        self.persisted = False
+        self.dirty = True
+
+    def last_seen(self) -> datetime:
+        return self.last_heartbeat_at or self.started_at
+
+    def as_row(self) -> dict:
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "track_id": self.track_id,
+            "started_at": self.started_at,
+            "last_heartbeat_at": self.last_heartbeat_at,
+            "ended_at": self.ended_at,
+        }
+
+
+# PUBLIC_INTERFACE
+def reserve_id_block(db: Session, name: str, size: int, floor: int = 1) -> Tuple[int, int]:
+    """Atomically reserve ids [start, end) from the named block counter; floor seeds a missing counter."""
+    for _ in range(3):
+        updated = db.execute(
+            update(IdBlock).where(IdBlock.name == name).values(next_value=IdBlock.next_value + size)
+        ).rowcount
+        if updated:
+            end = db.scalar(select(IdBlock.next_value).where(IdBlock.name == name))
+            db.commit()
+            return end - size, end
+        try:
+            db.execute(insert(IdBlock).values(name=name, next_value=floor))
+            db.commit()
+        except IntegrityError:
+            # Another worker created the counter first; retry the reservation
+            db.rollback()
+    raise RuntimeError(f"Could not reserve id block {name!r}")
+
+
+class SessionRegistry:
+    """In-memory stream session state with batched persistence."""
+
+    def __init__(
+        self,
+        id_block_size: int = 1000,
+        heartbeat_timeout_seconds: float = 120.0,
+        max_age_hours: float = 24.0,
+        max_foreign_heartbeats: int = 10000,
+    ) -> None:
+        self.id_block_size = id_block_size
+        self.max_foreign_heartbeats = max_foreign_heartbeats
+        self.heartbeat_timeout = timedelta(seconds=heartbeat_timeout_seconds)
+        self.max_age = timedelta(hours=max_age_hours)
+        self._lock = threading.Lock()
+        self._alloc_lock = threading.Lock()
+        self._sessions: Dict[int, LiveSession] = {}
+        # Open, unexpired sessions per user held by this worker (kept in step with stop/expiry)
+        self._active_by_user: Dict[int, int] = {}
+        self._next_id = 0
+        self._block_end = 0
+        # Heartbeats for sessions owned by other workers, applied in the next flush: id -> (user_id, at)
+        self._foreign_heartbeats: Dict[int, Tuple[int, datetime]] = {}
+
+    def _take_id(self) -> int:
+        with self._alloc_lock:
+            if self._next_id >= self._block_end:
+                self._reserve_block()
+            session_id = self._next_id
+            self._next_id += 1
+            return session_id
+
+    def _reserve_block(self) -> None:
+        with SessionLocal() as db:
+            floor = (db.scalar(select(func.max(StreamSession.id))) or 0) + 1
+            self._next_id, self._block_end = reserve_id_block(db, ID_BLOCK_NAME, self.id_block_size, floor)
+
+    # PUBLIC_INTERFACE
+    def preallocate(self) -> None:
+        """Reserve the first id block up front so the first play does not hit the DB."""
+        with self._alloc_lock:
+            if self._next_id >= self._block_end:
+                self._reserve_block()
+
+    def _is_expired(self, session: LiveSession, now: datetime) -> bool:
+        """Same rule as the DB reaper: heartbeat timeout once heartbeats started, else max session age."""
+        if session.last_heartbeat_at is not None:
+            return session.last_heartbeat_at < now - self.heartbeat_timeout
+        return session.started_at < now - self.max_age
+
+    def _release_slot(self, user_id: int) -> None:
+        """Give back one of the user's active slots. Caller holds the lock."""
+        remaining = self._active_by_user.get(user_id, 0) - 1
+        if remaining > 0:
+            self._active_by_user[user_id] = remaining
+        else:
+            self._active_by_user.pop(user_id, None)
+
+    def _close(self, session: LiveSession, ended_at: datetime) -> None:
+        """Mark an open session ended and release its per-user active slot. Caller holds the lock."""
+        session.ended_at = ended_at
+        session.dirty = True
+        self._release_slot(session.user_id)
+
+    # PUBLIC_INTERFACE
+    def active_count(self, user_id: int) -> int:
+        """Return the user's active sessions held by this worker (O(1))."""
+        return self._active_by_user.get(user_id, 0)
+
+    # PUBLIC_INTERFACE
+    def active_total(self) -> int:
+        """Return all active sessions held by this worker."""
+        with self._lock:
+            return sum(self._active_by_user.values())
+
+    def _open_elsewhere(self, db: Session, user_id: int) -> int:
+        """The user's open, unexpired sessions in the DB that this worker does not hold."""
+        with self._lock:
+            held = [sid for sid, s in self._sessions.items() if s.user_id == user_id]
+        now = datetime.utcnow()
+        t = StreamSession.__table__
+        q = select(func.count()).select_from(t).where(
+            t.c.user_id == user_id,
+            t.c.ended_at.is_(None),
+            or_(
+                t.c.last_heartbeat_at >= now - self.heartbeat_timeout,
+                and_(t.c.last_heartbeat_at.is_(None), t.c.started_at >= now - self.max_age),
+            ),
+        )
+        if held:
+            q = q.where(t.c.id.not_in(held))
+        return db.scalar(q) or 0
+
+    # PUBLIC_INTERFACE
+    def start(self, user_id: int, track_id: int, max_concurrent: int = 0, db: Optional[Session] = None) -> LiveSession:
+        """
+        Open a session in memory and return it; persisted by the next flush.
+        Raises ConcurrentStreamLimitExceeded if max_concurrent > 0 and the user is at the limit. With db,
+        open sessions other workers have flushed count towards the limit too (starts they have not
+        flushed yet, at most STREAM_SESSION_FLUSH_SECONDS old, are not seen).
+        """
+        elsewhere = self._open_elsewhere(db, user_id) if db is not None and max_concurrent > 0 else 0
+        with self._lock:
+            active = self._active_by_user.get(user_id, 0)
+            if max_concurrent > 0 and active + elsewhere >= max_concurrent:
+                raise ConcurrentStreamLimitExceeded()
+            # Claim the slot before allocating an id so concurrent starts cannot overshoot
+            self._active_by_user[user_id] = active + 1
+        try:
+            session = LiveSession(self._take_id(), user_id, track_id, datetime.utcnow())
+        except Exception:
+            with self._lock:
+                self._active_by_user[user_id] -= 1
+                if not self._active_by_user[user_id]:
+                    del self._active_by_user[user_id]
+            raise
+        with self._lock:
+            self._sessions[session.id] = session
+        return session
+
+    # PUBLIC_INTERFACE
+    def heartbeat(self, session_id: int, user_id: int) -> Optional[bool]:
+        """
+        Record a heartbeat. Returns True when applied to a session held here, False if the session
+        is held here but not open for this user, and None when it is not held here: the heartbeat is
+        then queued unverified and only lands if the next flush finds an open row of this user.
+        Raises HeartbeatBacklogFull when max_foreign_heartbeats are already queued.
+        """
+        now = datetime.utcnow()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                if session_id not in self._foreign_heartbeats and len(self._foreign_heartbeats) >= self.max_foreign_heartbeats:
+                    raise HeartbeatBacklogFull()
+                self._foreign_heartbeats[session_id] = (user_id, now)
+                return None
+            if session.user_id != user_id or session.ended_at is not None:
+                return False
+            session.last_heartbeat_at = now
+            session.dirty = True
+            return True
+
+    # PUBLIC_INTERFACE
+    def stop(self, session_id: int, user_id: int) -> Optional[LiveSession]:
+        """Close a session held in memory. Returns None if this worker does not hold it for the user."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or session.user_id != user_id:
+                return None
+            if session.ended_at is None:
+                self._close(session, datetime.utcnow())
+            return session
+
+    # PUBLIC_INTERFACE
+    def flush(self, db: Session) -> int:
+        """Persist pending starts/heartbeats/stops in batches. Returns the number of sessions written."""
+        with self._lock:
+            new_rows: List[dict] = []
+            changed_rows: List[dict] = []
+            flushed: List[LiveSession] = []
+            was_persisted: Dict[int, bool] = {}
+            for s in self._sessions.values():
+                if not s.dirty:
+                    continue
+                (changed_rows if s.persisted else new_rows).append(s.as_row())
+                flushed.append(s)
+                was_persisted[s.id] = s.persisted
+                # Mark optimistically so changes racing with this flush become UPDATEs, not duplicate INSERTs
+                s.persisted = True
+                s.dirty = False
+            foreign = self._foreign_heartbeats
+            self._foreign_heartbeats = {}
+        rejected: List[int] = []
+        # Ids _write_singly committed before a later failure; those rows must not be inserted again
+        committed: Set[int] = set()
+        try:
+            try:
+                self._write(db, new_rows, changed_rows, foreign)
+            except IntegrityError:
+                # A bad row (e.g. its track no longer exists) must not hold back the rest of the batch
+                db.rollback()
+                rejected = self._write_singly(db, new_rows, changed_rows, foreign, committed)
+        except Exception:
+            db.rollback()
+            with self._lock:
+                for s in flushed:
+                    s.dirty = True
+                    s.persisted = was_persisted[s.id] or s.id in committed
+                for sid, value in foreign.items():
+                    if sid not in committed:
+                        self._foreign_heartbeats.setdefault(sid, value)
+            raise
+        with self._lock:
+            for sid in rejected:
+                session = self._sessions.pop(sid, None)
+                if session is not None and session.ended_at is None:
+                    self._release_slot(session.user_id)
+            self._evict()
+        return len(flushed) - len(rejected) + len(foreign)
+
+    def _write(self, db: Session, new_rows: List[dict], changed_rows: List[dict], foreign: Dict[int, Tuple[int, datetime]]) -> None:
+        t = StreamSession.__table__
+        if new_rows:
+            db.execute(insert(StreamSession), new_rows)
+        if changed_rows:
+            # A row already closed (stopped through another worker, or reaped) stays closed, and a later
+            # heartbeat applied by another worker's flush is not moved back
+            hb = bindparam("_hb", type_=DateTime())
+            db.execute(
+                update(t)
+                .where(and_(t.c.id == bindparam("_id"), t.c.ended_at.is_(None)))
+                .values(
+                    last_heartbeat_at=case(
+                        (hb.is_(None), t.c.last_heartbeat_at), (t.c.last_heartbeat_at > hb, t.c.last_heartbeat_at), else_=hb
+                    ),
+                    ended_at=bindparam("_ended"),
+                ),
+                [{"_id": r["id"], "_hb": r["last_heartbeat_at"], "_ended": r["ended_at"]} for r in changed_rows],
+            )
+        if foreign:
+            db.execute(
+                update(t)
+                .where(and_(t.c.id == bindparam("_id"), t.c.user_id == bindparam("_uid"), t.c.ended_at.is_(None)))
+                .values(last_heartbeat_at=bindparam("at")),
+                [{"_id": sid, "_uid": uid, "at": at} for sid, (uid, at) in foreign.items()],
+            )
+        db.commit()
+
+    def _write_singly(
+        self,
+        db: Session,
+        new_rows: List[dict],
+        changed_rows: List[dict],
+        foreign: Dict[int, Tuple[int, datetime]],
+        committed: Set[int],
+    ) -> List[int]:
+        """
+        Write a batch whose INSERT failed one new row per transaction. Returns the ids of rows the DB
+        refused; ids of rows committed so far are added to committed as they go.
+        """
+        self._write(db, [], changed_rows, foreign)
+        committed.update(r["id"] for r in changed_rows)
+        committed.update(foreign)
+        rejected = []
+        for row in new_rows:
+            try:
+                db.execute(insert(StreamSession), [row])
+                db.commit()
+                committed.add(row["id"])
+            except IntegrityError:
+                db.rollback()
+                rejected.append(row["id"])
+                logger.warning(
+                    "Dropping stream session %d (user %d, track %s): the database refused it", row["id"], row["user_id"], row["track_id"]
+                )
+        return rejected
+
+    def _evict(self) -> None:
+        """Drop closed sessions once persisted; open ones stay until stopped or expired by the reaper."""
+        stale: Set[int] = {sid for sid, s in self._sessions.items() if s.persisted and not s.dirty and s.ended_at is not None}
+        for sid in stale:
+            del self._sessions[sid]
+
+    # PUBLIC_INTERFACE
+    def recover(self, db: Session) -> int:
+        """
+        Reconcile sessions left open by a crashed process: sessions whose heartbeats stopped
+        longer than the heartbeat timeout ago are closed at their last heartbeat.
+        Returns the number of sessions closed.
+        """
+        cutoff = datetime.utcnow() - self.heartbeat_timeout
+        t = StreamSession.__table__
+        closed = db.execute(
+            update(t)
+            .where(and_(t.c.ended_at.is_(None), t.c.last_heartbeat_at.is_not(None), t.c.last_heartbeat_at < cutoff))
+            .values(ended_at=t.c.last_heartbeat_at)
+        ).rowcount or 0
+        db.commit()
+        if closed:
+            logger.info("Closed %d stream sessions left open by a previous process", closed)
+        return closed
+
+    # PUBLIC_INTERFACE
+    def expire_local(self, db: Optional[Session] = None) -> int:
+        """
+        Close expired sessions held in memory (at their last sign of life). Returns how many were closed.
+        With db, candidates are first re-checked against their rows: heartbeats that reached other
+        workers are only in the DB, and a session stopped elsewhere is closed at its stored end.
+        """
+        now = datetime.utcnow()
+        with self._lock:
+            candidates = [s for s in self._sessions.values() if s.ended_at is None and self._is_expired(s, now)]
+        if not candidates:
+            return 0
+        stored: Dict[int, Tuple[Optional[datetime], Optional[datetime]]] = {}
+        if db is not None:
+            t = StreamSession.__table__
+            ids = [s.id for s in candidates if s.persisted]
+            for i in range(0, len(ids), 5000):
+                rows = db.execute(select(t.c.id, t.c.last_heartbeat_at, t.c.ended_at).where(t.c.id.in_(ids[i : i + 5000])))
+                stored.update((sid, (hb, ended)) for sid, hb, ended in rows)
+            db.commit()
+        closed = 0
+        with self._lock:
+            for s in candidates:
+                if s.ended_at is not None:
+                    continue
+                hb, ended = stored.get(s.id, (None, None))
+                if hb is not None and (s.last_heartbeat_at is None or hb > s.last_heartbeat_at):
+                    s.last_heartbeat_at = hb
+                if ended is not None:
+                    self._close(s, ended)
+                elif self._is_expired(s, now):
+                    self._close(s, s.last_seen())
+                else:
+                    continue
+                closed += 1
+        return closed
+
+    # PUBLIC_INTERFACE
+    def reap(self, db: Session, batch_size: int = 1000, max_batches: int = 100) -> int:
+        """
+        Close expired sessions: first the ones held in memory, then any left open in the DB
+        (other workers, crashed processes) with bulk UPDATEs of at most batch_size rows each.
+        Expired sessions are ended at their last heartbeat, or at their start if they never sent one.
+        Returns the number of DB rows closed.
+        """
+        self.expire_local(db)
+        now = datetime.utcnow()
+        t = StreamSession.__table__
+        expired = and_(
+            t.c.ended_at.is_(None),
+            or_(
+                and_(t.c.last_heartbeat_at.is_not(None), t.c.last_heartbeat_at < now - self.heartbeat_timeout),
+                and_(t.c.last_heartbeat_at.is_(None), t.c.started_at < now - self.max_age),
+            ),
+        )
+        total = 0
+        for _ in range(max_batches):
+            batch_ids = select(t.c.id).where(expired).limit(batch_size).scalar_subquery()
+            closed = db.execute(
+                update(t)
+                .where(t.c.id.in_(batch_ids))
+                .values(ended_at=func.coalesce(t.c.last_heartbeat_at, t.c.started_at))
+            ).rowcount or 0
+            db.commit()
+            total += closed
+            if closed < batch_size:
+                break
+        if total:
+            logger.info("Reaper closed %d expired stream sessions", total)
+        return total
+
+
+settings = get_settings()
+session_registry = SessionRegistry(
+    id_block_size=settings.STREAM_SESSION_ID_BLOCK,
+    heartbeat_timeout_seconds=settings.STREAM_HEARTBEAT_TIMEOUT_SECONDS,
+    max_age_hours=settings.STREAM_SESSION_MAX_AGE_HOURS,
+)
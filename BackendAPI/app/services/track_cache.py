@@ -0,0 +1,181 @@
+"""
+In-process cache of track metadata (the TrackInfo columns).
+
+Stream starts, playlist details/pages, playlist edits and recommendations read the same hot
+tracks over and over. They go through TrackCache.get_many, which answers from a size-bounded
+LRU of compact __slots__ records and loads every missing id with one IN query (per chunk of
+IN_CHUNK_SIZE ids).
+
+Writes go through the cache: create_music and the stream-start placeholder put the committed
+track, placeholders inserted by ensure_tracks are staged on the session and put once it
+commits (dropped on rollback), and the audio scanner invalidates the ids it updates. Changes
+made by other workers are picked up when an entry's TRACK_CACHE_TTL_SECONDS runs out.
+
+Only committed state is cached: misses loaded by a session that has already written in its
+open transaction may include its own uncommitted rows, so they are staged the same way.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app import metrics
+from app.config import get_settings
+from app.db.models import Track
+from app.serialization import TRACK_COLUMNS
+
+TRACK_FIELDS = tuple(c.key for c in TRACK_COLUMNS)
+IN_CHUNK_SIZE = 5000
+_STAGED_KEY = "track_cache_staged"
+_WROTE_KEY = "track_cache_wrote"
+
+
+class TrackRecord:
+    """Immutable-by-convention snapshot of one track's TrackInfo fields."""
+
+    __slots__ = TRACK_FIELDS + ("loaded_at",)
+
+    def __init__(self, id, title, artist, album, genre, duration, cover_image) -> None:  # noqa: A002
+        self.id = id
+        self.title = title
+        self.artist = artist
+        self.album = album
+        self.genre = genre
+        self.duration = duration
+        self.cover_image = cover_image
+        self.loaded_at = time.monotonic()
+
+    @classmethod
+    def from_track(cls, track: Track) -> "TrackRecord":
+        return cls(*(getattr(track, f) for f in TRACK_FIELDS))
+
+    @classmethod
+    def from_dict(cls, row: dict) -> "TrackRecord":
+        return cls(*(row.get(f) for f in TRACK_FIELDS))
+
+    # PUBLIC_INTERFACE
+    def as_dict(self) -> dict:
+        """TrackInfo-shaped dict."""
+        return {
+            "id": self.id,
+            "title": self.title,
+            "artist": self.artist,
+            "album": self.album,
+            "genre": self.genre,
+            "duration": self.duration,
+            "cover_image": self.cover_image,
+        }
+
+
+class TrackCache:
+    """Size-bounded LRU of TrackRecords keyed by track id, with batched loading of misses."""
+
+    def __init__(self, max_entries: int = 50_000, ttl_seconds: float = 60.0) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, TrackRecord]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # PUBLIC_INTERFACE
+    def get_many(self, db: Session, track_ids: Iterable[int]) -> Dict[int, TrackRecord]:
+        """Records for the ids that exist, loading all misses with one IN query per chunk."""
+        found: Dict[int, TrackRecord] = {}
+        missing: List[int] = []
+        oldest = time.monotonic() - self.ttl_seconds
+        with self._lock:
+            for tid in dict.fromkeys(track_ids):
+                record = self._entries.get(tid)
+                if record is not None and record.loaded_at >= oldest:
+                    self._entries.move_to_end(tid)
+                    found[tid] = record
+                else:
+                    missing.append(tid)
+        if found:
+            metrics.track_cache_lookups.labels("hit").inc(len(found))
+        if not missing:
+            return found
+        metrics.track_cache_lookups.labels("miss").inc(len(missing))
+        loaded = []
+        for i in range(0, len(missing), IN_CHUNK_SIZE):
+            chunk = missing[i : i + IN_CHUNK_SIZE]
+            loaded.extend(TrackRecord(*row) for row in db.execute(select(*TRACK_COLUMNS).where(Track.id.in_(chunk))))
+        if db.info.get(_WROTE_KEY):
+            db.info.setdefault(_STAGED_KEY, []).extend(loaded)
+        else:
+            self._store(loaded)
+        for record in loaded:
+            found[record.id] = record
+        return found
+
+    # PUBLIC_INTERFACE
+    def get(self, db: Session, track_id: int) -> Optional[TrackRecord]:
+        """One track's record, or None if the track does not exist."""
+        return self.get_many(db, (track_id,)).get(track_id)
+
+    # PUBLIC_INTERFACE
+    def put(self, tracks: Iterable[Track]) -> None:
+        """Write through committed tracks (ORM objects)."""
+        self._store([TrackRecord.from_track(t) for t in tracks])
+
+    # PUBLIC_INTERFACE
+    def stage(self, db: Session, rows: Iterable[dict]) -> None:
+        """Put track rows (TrackInfo-shaped dicts) into the cache once db commits; forget them on rollback."""
+        db.info.setdefault(_STAGED_KEY, []).extend(TrackRecord.from_dict(r) for r in rows)
+
+    # PUBLIC_INTERFACE
+    def invalidate(self, track_ids: Iterable[int]) -> None:
+        """Drop entries whose tracks changed."""
+        with self._lock:
+            for tid in track_ids:
+                self._entries.pop(tid, None)
+
+    # PUBLIC_INTERFACE
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def _store(self, records: List[TrackRecord]) -> None:
+        if not records:
+            return
+        with self._lock:
+            for record in records:
+                self._entries[record.id] = record
+                self._entries.move_to_end(record.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+settings = get_settings()
+track_cache = TrackCache(max_entries=settings.TRACK_CACHE_MAX_ENTRIES, ttl_seconds=settings.TRACK_CACHE_TTL_SECONDS)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_statement_write(state) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info[_WROTE_KEY] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _note_flush_write(session: Session, flush_context) -> None:
+    session.info[_WROTE_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _put_staged(session: Session) -> None:
+    session.info.pop(_WROTE_KEY, None)
+    staged = session.info.pop(_STAGED_KEY, None)
+    if staged:
+        track_cache._store(staged)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_staged(session: Session) -> None:
+    session.info.pop(_WROTE_KEY, None)
+    session.info.pop(_STAGED_KEY, None)
@@ -0,0 +1,286 @@
+"""
+In-memory "trending now" counters.
+
+Stream starts are counted per track in a ring buffer of fixed-width time buckets
+(default 60 x 1 minute). Window totals live in an indexed max-heap so that every
+increment/expiry is O(log n) and the top-N can be read without touching the DB.
+Buckets are checkpointed to the trending_buckets table so restarts keep the window.
+Checkpoints add this process's plays since the previous checkpoint onto the stored
+counts, so several workers can checkpoint the same buckets without overwriting each
+other, and a restarted worker restores the combined window. Plays of tracks deleted before
+their checkpoint are dropped from it.
+"""
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.db.models import Track, TrendingBucket
+from app.db.upsert import upsert_add
+
+logger = logging.getLogger(__name__)
+
+TRACK_FIELDS = ("title", "artist", "album", "genre", "duration", "cover_image")
+# Track ids per existence check when a checkpoint has to drop deleted tracks
+ID_CHUNK = 5000
+
+
+class _IndexedMaxHeap:
+    """Binary max-heap over (key, count) with a key -> position index for O(log n) updates."""
+
+    def __init__(self) -> None:
+        self._keys: List[int] = []
+        self._vals: List[int] = []
+        self._pos: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def get(self, key: int) -> int:
+        i = self._pos.get(key)
+        return 0 if i is None else self._vals[i]
+
+    def add(self, key: int, delta: int) -> int:
+        """Add delta to key's count; keys dropping to zero are removed. Returns the new count."""
+        i = self._pos.get(key)
+        if i is None:
+            if delta <= 0:
+                return 0
+            self._keys.append(key)
+            self._vals.append(delta)
+            self._pos[key] = len(self._keys) - 1
+            self._sift_up(len(self._keys) - 1)
+            return delta
+        value = self._vals[i] + delta
+        if value <= 0:
+            self._remove_at(i)
+            return 0
+        self._vals[i] = value
+        if delta > 0:
+            self._sift_up(i)
+        else:
+            self._sift_down(i)
+        return value
+
+    def top(self, n: int) -> List[Tuple[int, int]]:
+        """Return the n largest (key, count) pairs in O(n log n) via best-first heap traversal."""
+        out: List[Tuple[int, int]] = []
+        if not self._keys or n <= 0:
+            return out
+        frontier = [(-self._vals[0], 0)]
+        size = len(self._keys)
+        while frontier and len(out) < n:
+            neg, i = heapq.heappop(frontier)
+            out.append((self._keys[i], -neg))
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < size:
+                    heapq.heappush(frontier, (-self._vals[child], child))
+        return out
+
+    def _swap(self, i: int, j: int) -> None:
+        self._keys[i], self._keys[j] = self._keys[j], self._keys[i]
+        self._vals[i], self._vals[j] = self._vals[j], self._vals[i]
+        self._pos[self._keys[i]] = i
+        self._pos[self._keys[j]] = j
+
+    def _sift_up(self, i: int) -> None:
+        while i > 0:
+            parent = (i - 1) // 2
+            if self._vals[parent] >= self._vals[i]:
+                break
+            self._swap(i, parent)
+            i = parent
+
+    def _sift_down(self, i: int) -> None:
+        size = len(self._keys)
+        while True:
+            largest = i
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < size and self._vals[child] > self._vals[largest]:
+                    largest = child
+            if largest == i:
+                return
+            self._swap(i, largest)
+            i = largest
+
+    def _remove_at(self, i: int) -> None:
+        last = len(self._keys) - 1
+        if i != last:
+            self._swap(i, last)
+        del self._pos[self._keys[last]]
+        self._keys.pop()
+        self._vals.pop()
+        if i < last:
+            self._sift_up(i)
+            self._sift_down(i)
+
+
+class TrendingCounter:
+    """Sliding-window play counters with O(log n) updates and DB checkpointing."""
+
+    def __init__(self, window_buckets: int = 60, bucket_seconds: int = 60) -> None:
+        self.window_buckets = window_buckets
+        self.bucket_seconds = bucket_seconds
+        self._lock = threading.Lock()
+        self._slots: List[Dict[int, int]] = [{} for _ in range(window_buckets)]
+        self._slot_bucket: List[int] = [-1] * window_buckets
+        self._head = -1
+        self._heap = _IndexedMaxHeap()
+        self._meta: Dict[int, dict] = {}
+        # Plays recorded since the last checkpoint: bucket -> {track_id: count}
+        self._unsaved: Dict[int, Dict[int, int]] = {}
+
+    def _bucket_of(self, ts: float) -> int:
+        return int(ts // self.bucket_seconds)
+
+    def _advance(self, bucket: int) -> None:
+        """Expire slots that fell out of the window when moving the head to bucket."""
+        if bucket <= self._head:
+            return
+        first = max(self._head + 1, bucket - self.window_buckets + 1)
+        for b in range(first, bucket + 1):
+            slot = b % self.window_buckets
+            if self._slot_bucket[slot] != b:
+                self._expire_slot(slot)
+                self._slot_bucket[slot] = b
+        self._head = bucket
+
+    def _expire_slot(self, slot: int) -> None:
+        for track_id, count in self._slots[slot].items():
+            if self._heap.add(track_id, -count) == 0:
+                self._meta.pop(track_id, None)
+        self._slots[slot] = {}
+
+    # PUBLIC_INTERFACE
+    def record(self, track_id: int, meta: Optional[dict] = None, count: int = 1, now: Optional[float] = None) -> None:
+        """Count a stream start for track_id in the current bucket."""
+        bucket = self._bucket_of(time.time() if now is None else now)
+        with self._lock:
+            self._advance(bucket)
+            if bucket <= self._head - self.window_buckets:
+                return
+            slot = bucket % self.window_buckets
+            counts = self._slots[slot]
+            counts[track_id] = counts.get(track_id, 0) + count
+            self._heap.add(track_id, count)
+            if meta is not None:
+                self._meta[track_id] = meta
+            unsaved = self._unsaved.setdefault(bucket, {})
+            unsaved[track_id] = unsaved.get(track_id, 0) + count
+
+    # PUBLIC_INTERFACE
+    def top(self, n: int, now: Optional[float] = None) -> List[dict]:
+        """Return the n most played tracks in the window with their metadata and play counts."""
+        with self._lock:
+            self._advance(self._bucket_of(time.time() if now is None else now))
+            ranked = self._heap.top(n)
+            return [{"id": tid, **self._meta.get(tid, {}), "plays": plays} for tid, plays in ranked]
+
+    def _bucket_start(self, bucket: int) -> datetime:
+        return datetime.fromtimestamp(bucket * self.bucket_seconds, tz=timezone.utc).replace(tzinfo=None)
+
+    def _bucket_from_start(self, start: datetime) -> int:
+        return self._bucket_of(start.replace(tzinfo=timezone.utc).timestamp())
+
+    # PUBLIC_INTERFACE
+    def checkpoint(self, db: Session) -> int:
+        """Add plays recorded since the last checkpoint to the stored buckets and prune rows outside the window. Returns buckets written."""
+        with self._lock:
+            self._advance(self._bucket_of(time.time()))
+            oldest = self._head - self.window_buckets + 1
+            snapshot = {b: counts for b, counts in self._unsaved.items() if b >= oldest}
+            self._unsaved = {}
+        try:
+            try:
+                self._write(db, oldest, snapshot)
+            except IntegrityError:
+                # A track deleted since its plays were counted fails the foreign key for the whole batch;
+                # requeueing it would fail every later checkpoint too, so its plays are dropped
+                db.rollback()
+                snapshot = self._without_deleted_tracks(db, snapshot)
+                self._write(db, oldest, snapshot)
+        except Exception:
+            db.rollback()
+            with self._lock:
+                for bucket, counts in snapshot.items():
+                    unsaved = self._unsaved.setdefault(bucket, {})
+                    for tid, c in counts.items():
+                        unsaved[tid] = unsaved.get(tid, 0) + c
+            raise
+        return len(snapshot)
+
+    def _write(self, db: Session, oldest: int, snapshot: Dict[int, Dict[int, int]]) -> None:
+        db.execute(delete(TrendingBucket).where(TrendingBucket.bucket_start < self._bucket_start(oldest)))
+        upsert_add(
+            db, TrendingBucket, ("bucket_start", "track_id"), ("plays",),
+            [
+                {"bucket_start": self._bucket_start(bucket), "track_id": tid, "plays": c}
+                for bucket, counts in snapshot.items()
+                for tid, c in counts.items()
+            ],
+        )
+        db.commit()
+
+    def _without_deleted_tracks(self, db: Session, snapshot: Dict[int, Dict[int, int]]) -> Dict[int, Dict[int, int]]:
+        ids = sorted({tid for counts in snapshot.values() for tid in counts})
+        existing = set()
+        for start in range(0, len(ids), ID_CHUNK):
+            existing.update(db.scalars(select(Track.id).where(Track.id.in_(ids[start:start + ID_CHUNK]))))
+        deleted = set(ids) - existing
+        if deleted:
+            logger.warning("Trending checkpoint: dropping plays of %d deleted track(s)", len(deleted))
+        kept = {b: {tid: c for tid, c in counts.items() if tid in existing} for b, counts in snapshot.items()}
+        return {b: counts for b, counts in kept.items() if counts}
+
+    # PUBLIC_INTERFACE
+    def restore(self, db: Session) -> int:
+        """Load checkpointed buckets within the window (and their track metadata). Returns rows loaded."""
+        head = self._bucket_of(time.time())
+        oldest = head - self.window_buckets + 1
+        rows = db.execute(
+            select(TrendingBucket.bucket_start, TrendingBucket.track_id, TrendingBucket.plays).where(
+                TrendingBucket.bucket_start >= self._bucket_start(oldest)
+            )
+        ).all()
+        track_ids = {r.track_id for r in rows}
+        meta: Dict[int, dict] = {}
+        if track_ids:
+            cols = [getattr(Track, f) for f in TRACK_FIELDS]
+            for row in db.execute(select(Track.id, *cols).where(Track.id.in_(track_ids))):
+                meta[row.id] = {f: getattr(row, f) for f in TRACK_FIELDS}
+        with self._lock:
+            self._advance(head)
+            for r in rows:
+                bucket = self._bucket_from_start(r.bucket_start)
+                if bucket < oldest or bucket > head:
+                    continue
+                slot = bucket % self.window_buckets
+                if self._slot_bucket[slot] != bucket:
+                    continue
+                counts = self._slots[slot]
+                # Keep any plays recorded in this process before the restore
+                counts[r.track_id] = counts.get(r.track_id, 0) + r.plays
+                self._heap.add(r.track_id, r.plays)
+                if r.track_id in meta and r.track_id not in self._meta:
+                    self._meta[r.track_id] = meta[r.track_id]
+        return len(rows)
+
+
+# PUBLIC_INTERFACE
+def track_meta(t: Track) -> dict:
+    """Return the metadata snapshot kept alongside trending counts for a track."""
+    return {f: getattr(t, f) for f in TRACK_FIELDS}
+
+
+settings = get_settings()
+trending = TrendingCounter(
+    window_buckets=settings.TRENDING_WINDOW_MINUTES,
+    bucket_seconds=60,
+)
@@ -0,0 +1,19 @@
+"""
+Gunicorn worker class used by gunicorn.conf.py.
+
+Gunicorn sends SIGTERM to each worker on shutdown or rolling restart. This worker stops
+accepting connections and lets in-flight requests, long audio streams included, run for
+up to GRACEFUL_SHUTDOWN_SECONDS. After that it cancels whatever is left and runs the
+lifespan shutdown, which flushes stream sessions and trending counters.
+"""
+from uvicorn_worker import UvicornWorker
+
+from app.config import get_settings
+
+
+class DrainingUvicornWorker(UvicornWorker):
+    CONFIG_KWARGS = {
+        **UvicornWorker.CONFIG_KWARGS,
+        "lifespan": "on",
+        "timeout_graceful_shutdown": get_settings().GRACEFUL_SHUTDOWN_SECONDS,
+    }
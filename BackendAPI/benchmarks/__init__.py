@@ -0,0 +1,11 @@
+"""
+Load benchmarks for the API hot paths.
+
+- dataset.py: seeds a sized synthetic dataset (users, tracks, playlists, audio files)
+- scenarios.py: the request mixes (login, catalog search, playlist read/patch, stream start/stop,
+  ranged /static/audio reads), each run by concurrent virtual users
+- runner.py: drives a scenario for a request count or duration and collects latencies
+- baseline.py: JSON reports, baselines and regression comparison
+
+Run with `python -m benchmarks --help` from BackendAPI/.
+"""
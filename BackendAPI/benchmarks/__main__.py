@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for the API hot paths.
+
+Seeds a synthetic dataset into a throwaway SQLite database migrated with
+`alembic upgrade head` (or DATABASE_URL with --use-env-db), then drives the app with
+concurrent virtual users through each scenario and reports throughput and p50/p95/p99
+latency. By default the ASGI app runs in-process via httpx; --socket starts uvicorn in a
+subprocess and goes over a real TCP connection instead.
+
+Usage:
+  python -m benchmarks run [--concurrency 8] [--requests 500] [--scenarios catalog_search,playlist_read]
+  python -m benchmarks run --save benchmarks/baselines/local.json
+  python -m benchmarks run --compare benchmarks/baselines/local.json [--threshold 0.15]
+  python -m benchmarks compare BASELINE.json CURRENT.json [--threshold 0.15]
+
+Exits with status 1 when a comparison finds a regression.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(env: Dict[str, str], timeout: float = 60.0):
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            sys.exit(f"uvicorn exited during startup:\n{proc.stderr.read().decode()[-2000:]}")
+        try:
+            if httpx.get(f"{base_url}/", timeout=1).status_code == 200:
+                return proc, base_url
+        except httpx.HTTPError:
+            time.sleep(0.05)
+    proc.kill()
+    sys.exit(f"server did not answer within {timeout:.0f}s")
+
+
+def _stop_server(proc) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+async def _run_all(client: httpx.AsyncClient, dataset, args) -> Dict[str, dict]:
+    from benchmarks.runner import run_scenario
+    from benchmarks.scenarios import SCENARIOS, VirtualUser
+
+    results: Dict[str, dict] = {}
+    for name in args.scenarios:
+        scenario = SCENARIOS[name]
+        users = [VirtualUser(i, dataset.users[i % len(dataset.users)], dataset, args.seed) for i in range(args.concurrency)]
+        result = await run_scenario(client, scenario, users, args.requests, duration=args.duration, warmup=args.warmup)
+        summary = result.summary()
+        results[name] = summary
+        print(
+            f"{name:<20} {summary['requests']:7d} req {summary['errors']:4d} err {summary['throughput_rps']:9.1f} req/s"
+            f"  p50 {summary['p50_ms']:8.2f}  p95 {summary['p95_ms']:8.2f}  p99 {summary['p99_ms']:8.2f} ms",
+            flush=True,
+        )
+        if result.first_error:
+            print(f"{'':<20} first error: {result.first_error}", file=sys.stderr)
+    return results
+
+
+async def _in_process(dataset, args) -> Dict[str, dict]:
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await _run_all(client, dataset, args)
+
+
+async def _over_socket(base_url: str, dataset, args) -> Dict[str, dict]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        return await _run_all(client, dataset, args)
+
+
+def _compare(baseline_path: Path, current: dict, threshold: float, min_delta_ms: float) -> int:
+    from benchmarks import baseline
+
+    lines, regressions = baseline.compare(baseline.load(baseline_path), current, threshold, min_delta_ms)
+    print(f"\nComparison against {baseline_path} (threshold {threshold * 100:.0f}%):")
+    print("\n".join(lines))
+    if regressions:
+        print("\nRegressions:")
+        for r in regressions:
+            print(f"  {r}")
+        return 1
+    print("\nNo regressions.")
+    return 0
+
+
+def cmd_run(args) -> int:
+    tmpdir: Optional[str] = None
+    env = dict(os.environ, STARTUP_MODE="production", PYTHONPATH=str(ROOT))
+    if not args.use_env_db:
+        tmpdir = tempfile.mkdtemp(prefix="bench-load-")
+        env["DATABASE_URL"] = f"sqlite:///{tmpdir}/bench.db"
+        subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=ROOT, env=env, check=True, capture_output=True)
+    # The app reads its settings from the environment at import time
+    os.environ.update(env)
+
+    from app.db.session import SessionLocal
+    from benchmarks import baseline
+    from benchmarks.dataset import DatasetSpec, cleanup, seed
+    from benchmarks.scenarios import SCENARIOS
+
+    unknown = [s for s in args.scenarios if s not in SCENARIOS]
+    if unknown:
+        sys.exit(f"unknown scenarios: {', '.join(unknown)} (available: {', '.join(SCENARIOS)})")
+
+    spec = DatasetSpec(
+        users=max(args.users, args.concurrency),
+        tracks=args.tracks,
+        playlist_size=args.playlist_size,
+        audio_files=args.audio_files,
+        seed=args.seed,
+    )
+    t0 = time.perf_counter()
+    with SessionLocal() as db:
+        dataset = seed(db, spec)
+    print(f"Seeded {spec.tracks} tracks, {spec.users} users, {spec.users * spec.playlists_per_user} playlists in {time.perf_counter() - t0:.1f}s")
+    mode = "socket" if args.socket else "in-process"
+    print(f"Running {len(args.scenarios)} scenarios ({mode}, concurrency {args.concurrency})")
+
+    try:
+        if args.socket:
+            proc, base_url = _start_server(env)
+            try:
+                results = asyncio.run(_over_socket(base_url, dataset, args))
+            finally:
+                _stop_server(proc)
+        else:
+            results = asyncio.run(_in_process(dataset, args))
+    finally:
+        if args.use_env_db:
+            # Leave the real database as it was: the seeded rows and everything written for them go
+            with SessionLocal() as db:
+                cleanup(dataset, db)
+        else:
+            cleanup(dataset)
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    settings = {
+        "mode": mode,
+        "database": "env" if args.use_env_db else "sqlite-temp",
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "duration": args.duration,
+        "warmup": args.warmup,
+        "dataset": spec.as_dict(),
+    }
+    report = baseline.build_report(results, settings, ROOT)
+    if args.save:
+        baseline.save(report, Path(args.save))
+        print(f"Saved report to {args.save}")
+    if args.compare:
+        return _compare(Path(args.compare), report, args.threshold, args.min_delta_ms)
+    return 0
+
+
+def cmd_compare(args) -> int:
+    from benchmarks import baseline
+
+    return _compare(Path(args.baseline), baseline.load(Path(args.current)), args.threshold, args.min_delta_ms)
+
+
+def _scenario_list(value: str) -> List[str]:
+    return [s.strip() for s in value.split(",") if s.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_threshold_args(p: argparse.ArgumentParser) -> None:
+        p.add_argument("--threshold", type=float, default=0.15, help="Relative change counted as a regression (0.15 = 15%%)")
+        p.add_argument("--min-delta-ms", type=float, default=0.5, help="Ignore latency increases smaller than this")
+
+    run = sub.add_parser("run", help="Seed a dataset and run the scenarios")
+    run.add_argument(
+        "--scenarios", type=_scenario_list,
+        default=["login", "catalog_search", "playlist_read", "playlist_patch", "stream_start_stop", "audio_range"],
+        help="Comma-separated scenario names",
+    )
+    run.add_argument("--concurrency", type=int, default=8, help="Concurrent virtual users")
+    run.add_argument("--requests", type=int, default=500, help="Timed operations per scenario")
+    run.add_argument("--duration", type=float, default=None, help="Stop a scenario after this many seconds")
+    run.add_argument("--warmup", type=int, default=3, help="Untimed operations per virtual user before timing")
+    run.add_argument("--socket", action="store_true", help="Run uvicorn in a subprocess and benchmark over TCP")
+    run.add_argument("--use-env-db", action="store_true", help="Seed into DATABASE_URL instead of a temp SQLite file")
+    run.add_argument("--users", type=int, default=50, help="Seeded users (at least --concurrency)")
+    run.add_argument("--tracks", type=int, default=20000, help="Seeded tracks")
+    run.add_argument("--playlist-size", type=int, default=200, help="Tracks per seeded playlist")
+    run.add_argument("--audio-files", type=int, default=8, help="Tracks that get a 2 MiB audio file")
+    run.add_argument("--seed", type=int, default=1234, help="Random seed for the dataset and request mix")
+    run.add_argument("--save", help="Write the JSON report here (e.g. benchmarks/baselines/local.json)")
+    run.add_argument("--compare", help="Baseline report to compare against")
+    add_threshold_args(run)
+    run.set_defaults(func=cmd_run)
+
+    cmp = sub.add_parser("compare", help="Compare two saved reports")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    add_threshold_args(cmp)
+    cmp.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
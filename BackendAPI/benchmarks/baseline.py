@@ -0,0 +1,95 @@
+"""
+Benchmark reports, baselines and regression checks.
+
+A report is JSON: {"meta": {...}, "scenarios": {name: summary}}. A baseline is simply a
+saved report; compare() flags scenarios whose latency percentiles grew, or whose throughput
+fell, by more than a relative threshold. Latency changes smaller than min_delta_ms are
+ignored so sub-millisecond paths do not flap on scheduler noise.
+"""
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+THROUGHPUT_KEY = "throughput_rps"
+# Reports that differ in these settings measure different things
+COMPARABLE_KEYS = ("mode", "database", "concurrency", "dataset")
+
+
+def _git_revision(cwd: Path) -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=cwd, capture_output=True, text=True, check=False)
+        return out.stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+
+# PUBLIC_INTERFACE
+def build_report(scenarios: Dict[str, dict], settings: dict, root: Path) -> dict:
+    """Wrap scenario summaries with enough metadata to judge whether two reports are comparable."""
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_revision": _git_revision(root),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            **settings,
+        },
+        "scenarios": scenarios,
+    }
+
+
+# PUBLIC_INTERFACE
+def save(report: dict, path: Path) -> None:
+    """Write a report (or baseline) as indented JSON."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+# PUBLIC_INTERFACE
+def load(path: Path) -> dict:
+    """Read a report written by save()."""
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _change(old: float, new: float) -> float:
+    return (new - old) / old if old else 0.0
+
+
+# PUBLIC_INTERFACE
+def compare(baseline: dict, current: dict, threshold: float = 0.15, min_delta_ms: float = 0.5) -> Tuple[List[str], List[str]]:
+    """
+    Compare current against baseline scenario by scenario.
+    Returns (lines, regressions): a printable table and one message per regressed metric.
+    """
+    lines: List[str] = []
+    regressions: List[str] = []
+    for key in COMPARABLE_KEYS:
+        old, new = baseline.get("meta", {}).get(key), current.get("meta", {}).get(key)
+        if old != new:
+            lines.append(f"warning: {key} differs (baseline {old!r}, current {new!r})")
+    header = f"{'scenario':<20} {'metric':<15} {'baseline':>11} {'current':>11} {'change':>8}"
+    lines.append(header)
+    for name, now in current.get("scenarios", {}).items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            lines.append(f"{name:<20} (not in baseline)")
+            continue
+        for key in LATENCY_KEYS + (THROUGHPUT_KEY,):
+            old, new = float(before.get(key, 0.0)), float(now.get(key, 0.0))
+            change = _change(old, new)
+            if key == THROUGHPUT_KEY:
+                regressed = change < -threshold
+            else:
+                regressed = change > threshold and new - old >= min_delta_ms
+            flag = "  REGRESSION" if regressed else ""
+            lines.append(f"{name:<20} {key:<15} {old:11.2f} {new:11.2f} {change * 100:+7.1f}%{flag}")
+            if regressed:
+                regressions.append(f"{name}: {key} {old:.2f} -> {new:.2f} ({change * 100:+.1f}%)")
+        if now.get("errors"):
+            regressions.append(f"{name}: {now['errors']} failed requests ({now.get('first_error')})")
+    return lines, regressions
@@ -0,0 +1,206 @@
+"""
+Synthetic benchmark dataset.
+
+Rows are written with multi-row INSERTs (ids read back with RETURNING), so a dataset of
+hundreds of thousands of tracks seeds in seconds. All users share one password hash; the
+login scenario still pays for a full bcrypt verify per request. Audio files are written only
+for a handful of tracks, and only where no file of that name exists yet; cleanup() removes
+exactly the files (and directories) this run created and, given a session, the seeded rows
+together with what the benchmark wrote for them (stream sessions, events, rollups).
+"""
+import random
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from app.db.models import (
+    DailyTrackStats,
+    DailyUserStats,
+    Playlist,
+    RecommendationEvent,
+    StreamSession,
+    Track,
+    TrendingBucket,
+    User,
+    playlist_tracks_table,
+)
+from app.security.auth import create_access_token, hash_password
+from app.services.audio_scanner import DEFAULT_AUDIO_DIR
+
+PASSWORD = "bench-password"
+WORDS = (
+    "love", "night", "city", "dream", "fire", "blue", "summer", "heart", "river", "light",
+    "shadow", "gold", "rain", "echo", "wild", "storm", "star", "ocean", "road", "silver",
+)
+GENRES = ("Rock", "Pop", "Jazz", "Ambient", "Synthwave", "Hip-Hop", "Classical", "Folk")
+INSERT_CHUNK = 5000
+
+
+class DatasetSpec:
+    """Size of the synthetic dataset."""
+
+    def __init__(
+        self,
+        users: int = 50,
+        tracks: int = 20000,
+        playlists_per_user: int = 2,
+        playlist_size: int = 200,
+        audio_files: int = 8,
+        audio_bytes: int = 2 * 1024 * 1024,
+        seed: int = 1234,
+    ) -> None:
+        self.users = users
+        self.tracks = tracks
+        self.playlists_per_user = playlists_per_user
+        self.playlist_size = min(playlist_size, tracks)
+        self.audio_files = min(audio_files, tracks)
+        self.audio_bytes = audio_bytes
+        self.seed = seed
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+class BenchUser:
+    """A seeded user with a pre-issued token and its playlists."""
+
+    def __init__(self, user_id: int, email: str, playlist_ids: List[int]) -> None:
+        self.id = user_id
+        self.email = email
+        self.password = PASSWORD
+        self.token = create_access_token(subject=str(user_id))
+        self.playlist_ids = playlist_ids
+
+
+class Dataset:
+    """What the scenarios need to know about the seeded rows."""
+
+    def __init__(self, spec: DatasetSpec) -> None:
+        self.spec = spec
+        self.users: List[BenchUser] = []
+        self.track_ids: List[int] = []
+        self.playlist_tracks: Dict[int, Set[int]] = {}
+        self.audio_track_ids: List[int] = []
+        self.audio_size = spec.audio_bytes
+        self.search_terms = list(WORDS)
+        self.created_files: List[Path] = []
+        self.created_dirs: List[Path] = []
+
+
+def _insert_returning_ids(db: Session, model, rows: List[dict]) -> List[int]:
+    ids: List[int] = []
+    for start in range(0, len(rows), INSERT_CHUNK):
+        chunk = rows[start:start + INSERT_CHUNK]
+        ids.extend(db.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), chunk))
+    return ids
+
+
+def _write_audio(dataset: Dataset, audio_dir: Path, rng: random.Random) -> None:
+    missing = audio_dir
+    while not missing.exists():
+        dataset.created_dirs.append(missing)
+        missing = missing.parent
+    audio_dir.mkdir(parents=True, exist_ok=True)
+    spec = dataset.spec
+    for tid in dataset.track_ids[: spec.audio_files]:
+        path = audio_dir / f"{tid}.mp3"
+        if not path.exists():
+            path.write_bytes(rng.randbytes(spec.audio_bytes))
+            dataset.created_files.append(path)
+        elif path.stat().st_size < spec.audio_bytes:
+            # An existing (real) file smaller than the configured size would make ranged reads 416
+            continue
+        dataset.audio_track_ids.append(tid)
+
+
+# PUBLIC_INTERFACE
+def seed(db: Session, spec: DatasetSpec, audio_dir: Path = DEFAULT_AUDIO_DIR) -> Dataset:
+    """Insert the synthetic dataset described by spec and return the handles scenarios use."""
+    rng = random.Random(spec.seed)
+    dataset = Dataset(spec)
+    run_tag = rng.getrandbits(32)
+
+    track_rows = []
+    durations = []
+    for i in range(spec.tracks):
+        duration = float(rng.randint(90, 420))
+        durations.append(duration)
+        track_rows.append({
+            "title": f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}",
+            "artist": f"{rng.choice(WORDS).title()} Artist {i % 500}",
+            "album": f"{rng.choice(WORDS).title()} Album {i % 2000}",
+            "genre": rng.choice(GENRES),
+            "duration": duration,
+        })
+    dataset.track_ids = _insert_returning_ids(db, Track, track_rows)
+    duration_of = dict(zip(dataset.track_ids, durations))
+
+    password_hash = hash_password(PASSWORD)
+    emails = [f"bench-{run_tag:08x}-{i}@example.com" for i in range(spec.users)]
+    user_ids = _insert_returning_ids(
+        db, User, [{"email": e, "username": f"bench{i}", "password_hash": password_hash} for i, e in enumerate(emails)]
+    )
+
+    playlist_rows = []
+    contents = []
+    for uid in user_ids:
+        for p in range(spec.playlists_per_user):
+            tracks = rng.sample(dataset.track_ids, spec.playlist_size)
+            contents.append(tracks)
+            playlist_rows.append({
+                "name": f"Bench {uid}-{p}",
+                "owner_id": uid,
+                "track_count": len(tracks),
+                "total_duration": sum(duration_of[t] for t in tracks),
+            })
+    playlist_ids = _insert_returning_ids(db, Playlist, playlist_rows)
+    link_rows = [
+        {"playlist_id": pid, "track_id": tid, "position": pos}
+        for pid, tracks in zip(playlist_ids, contents)
+        for pos, tid in enumerate(tracks)
+    ]
+    for start in range(0, len(link_rows), INSERT_CHUNK):
+        db.execute(insert(playlist_tracks_table), link_rows[start:start + INSERT_CHUNK])
+    db.commit()
+
+    per_user = spec.playlists_per_user
+    for i, (uid, email) in enumerate(zip(user_ids, emails)):
+        owned = playlist_ids[i * per_user:(i + 1) * per_user]
+        dataset.users.append(BenchUser(uid, email, owned))
+    dataset.playlist_tracks = {pid: set(tracks) for pid, tracks in zip(playlist_ids, contents)}
+    _write_audio(dataset, audio_dir, rng)
+    return dataset
+
+
+def _delete_rows(db: Session, dataset: Dataset) -> None:
+    user_ids = [u.id for u in dataset.users]
+    playlist_ids = [pid for u in dataset.users for pid in u.playlist_ids]
+    pt = playlist_tracks_table
+    # Children first, so this does not depend on ON DELETE CASCADE being enforced (SQLite pragma)
+    by_user = (StreamSession.user_id, RecommendationEvent.user_id, DailyUserStats.user_id, Playlist.owner_id, User.id)
+    by_track = (pt.c.track_id, TrendingBucket.track_id, DailyTrackStats.track_id, Track.id)
+    for ids, columns in ((playlist_ids, (pt.c.playlist_id,)), (user_ids, by_user), (dataset.track_ids, by_track)):
+        for column in columns:
+            for start in range(0, len(ids), INSERT_CHUNK):
+                db.execute(delete(column.table).where(column.in_(ids[start:start + INSERT_CHUNK])))
+    db.commit()
+
+
+# PUBLIC_INTERFACE
+def cleanup(dataset: Dataset, db: Optional[Session] = None) -> None:
+    """Remove the audio files (and directories) created by seed() and, when db is given, the seeded rows."""
+    if db is not None:
+        _delete_rows(db, dataset)
+        dataset.users = []
+        dataset.track_ids = []
+    for path in dataset.created_files:
+        path.unlink(missing_ok=True)
+    for directory in dataset.created_dirs:
+        try:
+            directory.rmdir()
+        except OSError:
+            break  # not empty: something else was put there meanwhile
+    dataset.created_files = []
+    dataset.created_dirs = []
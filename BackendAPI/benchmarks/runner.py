@@ -0,0 +1,98 @@
+"""
+Scenario runner: concurrent virtual users on one event loop, one latency sample per operation.
+"""
+import asyncio
+import time
+from typing import List, Optional, Sequence
+
+import httpx
+
+from benchmarks.scenarios import Scenario, VirtualUser
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..100) of an ascending sequence."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), int(-(-q * len(sorted_values) // 100))))
+    return sorted_values[rank - 1]
+
+
+class ScenarioResult:
+    """Latency samples and error count of one scenario run."""
+
+    def __init__(self, name: str, concurrency: int) -> None:
+        self.name = name
+        self.concurrency = concurrency
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.first_error: Optional[str] = None
+        self.elapsed = 0.0
+
+    def error(self, exc: BaseException) -> None:
+        self.errors += 1
+        if self.first_error is None:
+            self.first_error = f"{type(exc).__name__}: {exc}"
+
+    def summary(self) -> dict:
+        ordered = sorted(self.latencies)
+        ms = 1000.0
+        return {
+            "requests": len(ordered),
+            "errors": self.errors,
+            "first_error": self.first_error,
+            "concurrency": self.concurrency,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "throughput_rps": round(len(ordered) / self.elapsed, 1) if self.elapsed > 0 else 0.0,
+            "mean_ms": round(sum(ordered) / len(ordered) * ms, 3) if ordered else 0.0,
+            "p50_ms": round(percentile(ordered, 50) * ms, 3),
+            "p95_ms": round(percentile(ordered, 95) * ms, 3),
+            "p99_ms": round(percentile(ordered, 99) * ms, 3),
+            "max_ms": round(ordered[-1] * ms, 3) if ordered else 0.0,
+        }
+
+
+# PUBLIC_INTERFACE
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    users: Sequence[VirtualUser],
+    requests: int,
+    duration: Optional[float] = None,
+    warmup: int = 0,
+) -> ScenarioResult:
+    """
+    Run scenario.op from every virtual user concurrently until `requests` operations completed
+    (or `duration` seconds passed, if given). Each user first runs prepare and `warmup` untimed ops.
+    """
+    result = ScenarioResult(scenario.name, len(users))
+    if scenario.max_requests is not None:
+        requests = min(requests, scenario.max_requests)
+    remaining = requests
+
+    async def setup(vu: VirtualUser) -> None:
+        if scenario.prepare is not None:
+            await scenario.prepare(client, vu)
+        for _ in range(warmup):
+            await scenario.op(client, vu)
+
+    await asyncio.gather(*(setup(vu) for vu in users))
+
+    started = time.perf_counter()
+    deadline = None if duration is None else started + duration
+
+    async def worker(vu: VirtualUser) -> None:
+        nonlocal remaining
+        while remaining > 0 and (deadline is None or time.perf_counter() < deadline):
+            remaining -= 1
+            t0 = time.perf_counter()
+            try:
+                await scenario.op(client, vu)
+            except Exception as exc:  # noqa: BLE001 - counted and reported, the run continues
+                result.error(exc)
+                continue
+            result.latencies.append(time.perf_counter() - t0)
+
+    await asyncio.gather(*(worker(vu) for vu in users))
+    result.elapsed = time.perf_counter() - started
+    return result
@@ -0,0 +1,118 @@
+"""
+Benchmark scenarios.
+
+Each scenario is one timed operation run repeatedly by every virtual user. A virtual user
+is bound to one seeded user (its own token and playlist), so concurrent users never patch
+the same playlist. Untimed setup (e.g. obtaining a signed stream URL) goes in prepare.
+"""
+import random
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+import httpx
+
+from benchmarks.dataset import BenchUser, Dataset
+
+RANGE_BYTES = 64 * 1024
+
+
+class BenchmarkError(Exception):
+    """A request returned an unexpected status."""
+
+
+def _check(resp: httpx.Response, *expected: int) -> httpx.Response:
+    if resp.status_code not in expected:
+        raise BenchmarkError(f"{resp.request.method} {resp.request.url.path}: HTTP {resp.status_code} {resp.text[:200]}")
+    return resp
+
+
+class VirtualUser:
+    """Per-worker state for one concurrent client."""
+
+    def __init__(self, index: int, user: BenchUser, dataset: Dataset, seed: int) -> None:
+        self.index = index
+        self.user = user
+        self.dataset = dataset
+        self.rng = random.Random(seed + index)
+        self.headers = {"Authorization": f"Bearer {user.token}"}
+        self.playlist_id = user.playlist_ids[0]
+        self.added: Deque[int] = deque()
+        self.stream_url: Optional[str] = None
+
+
+Operation = Callable[[httpx.AsyncClient, VirtualUser], Awaitable[None]]
+
+
+class Scenario:
+    """A named timed operation with optional untimed per-user setup."""
+
+    def __init__(self, name: str, op: Operation, prepare: Optional[Operation] = None, max_requests: Optional[int] = None, description: str = "") -> None:
+        self.name = name
+        self.op = op
+        self.prepare = prepare
+        self.max_requests = max_requests
+        self.description = description
+
+
+async def login(client: httpx.AsyncClient, vu: VirtualUser) -> None:
+    _check(await client.post("/api/auth/login", json={"email": vu.user.email, "password": vu.user.password}), 200)
+
+
+async def catalog_search(client: httpx.AsyncClient, vu: VirtualUser) -> None:
+    params = {"query": vu.rng.choice(vu.dataset.search_terms), "page": vu.rng.randint(1, 5), "page_size": 20}
+    _check(await client.get("/api/catalog/search", params=params, headers=vu.headers), 200)
+
+
+async def playlist_read(client: httpx.AsyncClient, vu: VirtualUser) -> None:
+    _check(await client.get(f"/api/playlists/{vu.playlist_id}", headers=vu.headers), 200)
+
+
+async def playlist_patch(client: httpx.AsyncClient, vu: VirtualUser) -> None:
+    # Alternate adding a track that is not in the playlist and removing it again,
+    # so the playlist keeps its seeded size however long the run is
+    if vu.added:
+        body = {"remove_tracks": [vu.added.popleft()]}
+    else:
+        present = vu.dataset.playlist_tracks[vu.playlist_id]
+        track_id = vu.rng.choice(vu.dataset.track_ids)
+        while track_id in present:
+            track_id = vu.rng.choice(vu.dataset.track_ids)
+        vu.added.append(track_id)
+        body = {"add_tracks": [track_id]}
+    _check(await client.patch(f"/api/playlists/{vu.playlist_id}", json=body, headers=vu.headers), 200)
+
+
+async def stream_start_stop(client: httpx.AsyncClient, vu: VirtualUser) -> None:
+    track_id = vu.rng.choice(vu.dataset.track_ids)
+    started = _check(await client.post("/api/stream/start", json={"trackId": str(track_id)}, headers=vu.headers), 200)
+    session_id = started.json()["session_id"]
+    _check(await client.post("/api/stream/stop", json={"sessionId": session_id}, headers=vu.headers), 200)
+
+
+async def _prepare_audio(client: httpx.AsyncClient, vu: VirtualUser) -> None:
+    if not vu.dataset.audio_track_ids:
+        raise BenchmarkError("no benchmark audio files available")
+    track_id = vu.dataset.audio_track_ids[vu.index % len(vu.dataset.audio_track_ids)]
+    started = _check(await client.post("/api/stream/start", json={"trackId": str(track_id)}, headers=vu.headers), 200)
+    vu.stream_url = started.json()["stream_url"]
+
+
+async def audio_range(client: httpx.AsyncClient, vu: VirtualUser) -> None:
+    start = vu.rng.randrange(0, vu.dataset.audio_size - RANGE_BYTES)
+    resp = _check(await client.get(vu.stream_url, headers={"Range": f"bytes={start}-{start + RANGE_BYTES - 1}"}), 206)
+    if len(resp.content) != RANGE_BYTES:
+        raise BenchmarkError(f"short range read: {len(resp.content)} bytes")
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    s.name: s
+    for s in (
+        # bcrypt verify dominates login; cap it so a default run stays short
+        Scenario("login", login, max_requests=100, description="POST /api/auth/login"),
+        Scenario("catalog_search", catalog_search, description="GET /api/catalog/search (20 per page)"),
+        Scenario("playlist_read", playlist_read, description="GET /api/playlists/{id}"),
+        Scenario("playlist_patch", playlist_patch, description="PATCH /api/playlists/{id} (add or remove one track)"),
+        Scenario("stream_start_stop", stream_start_stop, description="POST /api/stream/start then /api/stream/stop"),
+        Scenario("audio_range", audio_range, prepare=_prepare_audio, description="GET /static/audio/{id}.mp3 with a 64 KiB Range"),
+    )
+}
@@ -0,0 +1,61 @@
+"""
+Production server configuration.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+- One uvicorn worker per available CPU (WEB_CONCURRENCY overrides), honouring container
+  CPU quotas and affinity.
+- preload_app imports the application once in the master. Workers fork from it and share
+  the imported code copy-on-write instead of each importing it again.
+- Development-mode init (tables, demo seed) runs once in the master before forking.
+  Production mode (STARTUP_MODE=production) does none of it; migrate and seed as release steps.
+- On SIGTERM, workers drain in-flight requests for GRACEFUL_SHUTDOWN_SECONDS (see app/workers.py).
+  Gunicorn's graceful_timeout adds headroom for the lifespan shutdown flush before SIGKILL.
+"""
+import math
+import os
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+def _available_cpus() -> int:
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    # cgroup v2 CPU quota, e.g. "200000 100000" for 2 CPUs (or "max 100000" for no limit)
+    try:
+        with open("/sys/fs/cgroup/cpu.max", encoding="ascii") as fh:
+            quota, period = fh.read().split()[:2]
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+bind = f"0.0.0.0:{settings.PORT}"
+workers = settings.WEB_CONCURRENCY or _available_cpus()
+worker_class = "app.workers.DrainingUvicornWorker"
+preload_app = True
+graceful_timeout = settings.GRACEFUL_SHUTDOWN_SECONDS + 10
+timeout = 60
+keepalive = 5
+
+
+def on_starting(server):
+    # Runs in the master after the preloaded import and before any worker is forked
+    from app.db.session import engine
+    from app.main import run_startup_init
+
+    run_startup_init()
+    # Don't hand pooled connections opened by the init to forked workers
+    engine.dispose()
+
+
+def post_fork(server, worker):
+    from app.db.session import engine
+
+    engine.dispose(close=False)
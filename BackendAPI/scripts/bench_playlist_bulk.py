@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark bulk playlist track add/remove through PATCH /api/playlists/{id}.
+
+Runs against a throwaway SQLite database (or DATABASE_URL if --use-env-db is given):
+- adds 10k tracks to an empty playlist
+- adds 5k more tracks (half new, half already present) to the 10k-track playlist
+- removes 5k tracks from the resulting playlist
+
+Usage:
+  python -m scripts.bench_playlist_bulk [--tracks 10000] [--use-env-db]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tracks", type=int, default=10_000, help="Playlist size to benchmark with")
+    parser.add_argument("--use-env-db", action="store_true", help="Use DATABASE_URL instead of a temp SQLite file")
+    args = parser.parse_args()
+
+    if not args.use_env_db:
+        tmpdir = tempfile.mkdtemp(prefix="bench-playlists-")
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmpdir}/bench.db"
+
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.db.session import SessionLocal
+    from app.db.models import User
+    from app.security.auth import create_access_token, hash_password
+
+    n = args.tracks
+    with TestClient(app) as client:
+        # Tables exist once the app's startup has run (development mode) or after alembic upgrade head
+        with SessionLocal() as db:
+            user = User(email=f"bench-{time.time_ns()}@example.com", username="bench", password_hash=hash_password("bench"))
+            db.add(user)
+            db.commit()
+            token = create_access_token(subject=str(user.id))
+        headers = {"Authorization": f"Bearer {token}"}
+
+        pid = client.post("/api/playlists", json={"name": "bench"}, headers=headers).json()["id"]
+        base = 10_000_000
+
+        def timed(label: str, body: dict) -> None:
+            t0 = time.perf_counter()
+            r = client.patch(f"/api/playlists/{pid}", json=body, headers=headers)
+            elapsed = time.perf_counter() - t0
+            if r.status_code != 200:
+                print(f"{label}: HTTP {r.status_code} {r.text[:200]}", file=sys.stderr)
+                sys.exit(1)
+            print(f"{label:<56} {elapsed * 1000:9.1f} ms  (playlist size {len(r.json()['tracks'])})")
+
+        timed(f"add {n} new tracks to empty playlist", {"add_tracks": list(range(base, base + n))})
+        half = n // 4
+        timed(
+            f"add {2 * half} tracks ({half} present) to {n}-track playlist",
+            {"add_tracks": list(range(base + n - half, base + n + half))},
+        )
+        timed(f"remove {n // 2} tracks", {"remove_tracks": list(range(base, base + n // 2))})
+
+
+if __name__ == "__main__":
+    main()
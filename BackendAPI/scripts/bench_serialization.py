@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark response serialization cost of a 100-item catalog search page.
+
+Compares, per page and per item:
+- legacy: ORM Track objects -> hand-written dict -> response_model validation ->
+  jsonable_encoder -> json.dumps (what the routers did before app.serialization)
+- typed: pydantic CatalogSearchResponse.model_validate + model_dump_json
+- rows: column select -> dict(zip(keys, row)) -> orjson (what list endpoints do now)
+
+Each path is timed on pre-fetched data (serialization only) and including the query
+(fetch + serialize), against a throwaway SQLite database.
+
+Usage:
+  python -m scripts.bench_serialization [--items 100] [--iterations 2000]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import timeit
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100, help="Tracks on the page")
+    parser.add_argument("--iterations", type=int, default=2000, help="Pages per measurement")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench-serialization-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmpdir}/bench.db"
+
+    from fastapi.encoders import jsonable_encoder
+    from sqlalchemy import insert, select
+
+    from app.db.models import Base, Track
+    from app.db.session import SessionLocal, engine
+    from app.schemas.catalog import CatalogSearchResponse
+    from app.serialization import TRACK_COLUMNS, json_bytes, rows_to_dicts
+
+    Base.metadata.create_all(bind=engine)
+    n = args.items
+    with SessionLocal() as db:
+        db.execute(
+            insert(Track),
+            [
+                {"title": f"Track {i}", "artist": f"Artist {i % 17}", "album": f"Album {i % 9}", "genre": "Rock",
+                 "duration": 180.0 + i, "cover_image": f"https://img.example.com/{i}.jpg"}
+                for i in range(n)
+            ],
+        )
+        db.commit()
+
+    def to_dict(t: Track) -> dict:
+        return {
+            "id": t.id,
+            "title": t.title,
+            "artist": t.artist,
+            "album": t.album,
+            "genre": t.genre,
+            "duration": t.duration,
+            "cover_image": t.cover_image,
+        }
+
+    def legacy(tracks) -> bytes:
+        resp = CatalogSearchResponse(items=[to_dict(t) for t in tracks], total=n)
+        validated = CatalogSearchResponse.model_validate(resp.model_dump())
+        return json.dumps(jsonable_encoder(validated.model_dump(mode="json"))).encode("utf-8")
+
+    def typed(items) -> bytes:
+        return CatalogSearchResponse.model_validate({"items": items, "total": n}).model_dump_json().encode("utf-8")
+
+    def rows(items) -> bytes:
+        return json_bytes({"items": items, "total": n})
+
+    with SessionLocal() as db:
+        query = select(*TRACK_COLUMNS).order_by(Track.id).limit(n)
+        orm_tracks = db.query(Track).order_by(Track.id).limit(n).all()
+        dicts = rows_to_dicts(db.execute(query))
+        assert json.loads(legacy(orm_tracks)) == json.loads(typed(dicts)) == json.loads(rows(dicts))
+
+        def fetch_orm():
+            db.expunge_all()
+            return db.query(Track).order_by(Track.id).limit(n).all()
+
+        def fetch_rows():
+            return rows_to_dicts(db.execute(query))
+
+        cases = [
+            ("legacy (ORM -> dict -> model -> json)", lambda: legacy(orm_tracks), lambda: legacy(fetch_orm())),
+            ("typed (model_validate + dump_json)", lambda: typed(dicts), lambda: typed(fetch_rows())),
+            ("rows -> orjson", lambda: rows(dicts), lambda: rows(fetch_rows())),
+        ]
+        iterations = args.iterations
+        print(f"{n}-item page, best of 3 x {iterations} pages")
+        print(f"{'':<40} {'serialize only':>26} {'fetch + serialize':>26}")
+        for label, serialize, end_to_end in cases:
+            ser = min(timeit.repeat(serialize, number=iterations, repeat=3)) / iterations
+            e2e = min(timeit.repeat(end_to_end, number=max(1, iterations // 10), repeat=3)) / max(1, iterations // 10)
+            print(
+                f"{label:<40} {ser * 1e6:9.1f} us/page {ser / n * 1e6:6.2f} us/item"
+                f" {e2e * 1e6:9.1f} us/page {e2e / n * 1e6:6.2f} us/item"
+            )
+
+
+if __name__ == "__main__":
+    main()
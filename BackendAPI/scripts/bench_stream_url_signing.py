@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-request validation cost of signed stream URLs.
+
+Compares StreamUrlSigner.verify (what serve_audio runs on every Range request)
+against decoding the JWT access token, which is what per-request bearer auth would cost
+before even touching the DB.
+
+Usage:
+  python -m scripts.bench_stream_url_signing [--iterations 200000]
+"""
+from __future__ import annotations
+
+import argparse
+import timeit
+from urllib.parse import parse_qsl
+
+from app.security.auth import create_access_token, verify_token
+from app.security.stream_urls import get_stream_url_signer
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200_000, help="Validations per measurement")
+    args = parser.parse_args()
+
+    signer = get_stream_url_signer()
+    filename = "12345.mp3"
+    params = dict(parse_qsl(signer.sign(filename, 42)))
+    sig = params["sig"]
+    tampered = {**params, "sig": ("B" if sig[0] == "A" else "A") + sig[1:]}
+    token = create_access_token(subject="42")
+
+    assert signer.verify(filename, params) and not signer.verify(filename, tampered)
+
+    n = args.iterations
+    cases = [
+        ("signed URL verify (valid)", lambda: signer.verify(filename, params), n),
+        ("signed URL verify (bad signature)", lambda: signer.verify(filename, tampered), n),
+        ("signed URL sign", lambda: signer.sign(filename, 42), n),
+        ("JWT verify_token (for comparison)", lambda: verify_token(token), max(1, n // 20)),
+    ]
+    for label, fn, iterations in cases:
+        best = min(timeit.repeat(fn, number=iterations, repeat=3))
+        print(f"{label:<36} {best / iterations * 1e6:8.2f} us/op")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Bulk-load a track catalog from a CSV (with header) or NDJSON file.
+
+Columns/keys: title, artist (required), album, genre, duration, cover_image.
+Rows are validated one at a time and inserted in chunked multi-row INSERTs;
+invalid rows are reported with their line number and skipped.
+
+Usage:
+  python -m scripts.ingest_catalog catalog.csv
+  python -m scripts.ingest_catalog catalog.ndjson --chunk-size 5000
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+
+from app.db.session import SessionLocal
+from app.services.catalog_ingest import FORMATS, IngestProgress, ingest_file
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="CSV or NDJSON file")
+    parser.add_argument("--format", choices=FORMATS, help="Input format (default: from file extension)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows per multi-row INSERT")
+    parser.add_argument("--quiet", action="store_true", help="Only print the final summary")
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+
+    def on_chunk(progress: IngestProgress) -> None:
+        if not args.quiet:
+            p = progress.as_dict()
+            print(f"\r{p['inserted']:>12,} inserted  {p['failed']:>8,} failed  {p['rows_per_second']:>10,.0f} rows/s", end="", file=sys.stderr)
+
+    with SessionLocal() as db:
+        progress = ingest_file(db, args.path, fmt, chunk_size=args.chunk_size, on_chunk=on_chunk)
+    if not args.quiet:
+        print(file=sys.stderr)
+    report = progress.as_dict()
+    for err in report["errors"]:
+        print(f"line {err['line']}: {err['error']}")
+    if report["failed"] > len(report["errors"]):
+        print(f"... and {report['failed'] - len(report['errors'])} more rejected rows")
+    print(
+        f"{report['status']}: {report['rows_seen']:,} rows, {report['inserted']:,} inserted, {report['failed']:,} failed "
+        f"in {report['elapsed_seconds']:.1f}s ({report['rows_per_second']:,.0f} rows/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Measure worker startup cost and check it against a budget.
+
+- Import time: runs `python -X importtime -c "import app.main"` and reports the total,
+  the slowest first-party modules (cumulative) and the heaviest packages (self time).
+- Time to first request: starts uvicorn in a subprocess and polls GET / until it answers,
+  so interpreter start, imports and the lifespan startup are all included.
+
+By default runs in STARTUP_MODE=production against a throwaway SQLite database migrated
+with `alembic upgrade head` (use --use-env-db to measure against DATABASE_URL instead).
+Exits with status 1 if the median of either measurement exceeds its budget.
+
+Usage:
+  python -m scripts.measure_startup
+  python -m scripts.measure_startup --runs 5 --budget-import-ms 1500 --budget-first-request-ms 2000
+  python -m scripts.measure_startup --mode development
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def import_profile(env: Dict[str, str]) -> Tuple[float, List[Tuple[str, int, int]]]:
+    """Return (total ms, [(module, self_us, cumulative_us), ...]) for `import app.main`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=False,
+    )
+    if proc.returncode != 0:
+        sys.exit(f"import app.main failed:\n{proc.stderr[-2000:]}")
+    modules = []
+    for line in proc.stderr.splitlines():
+        m = IMPORT_LINE.match(line)
+        if m:
+            modules.append((m.group(4), int(m.group(1)), int(m.group(2))))
+    total = next((cum for name, _, cum in modules if name == "app.main"), 0)
+    return total / 1000, modules
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_first_request(env: Dict[str, str], timeout: float = 60.0) -> float:
+    """Start uvicorn and return ms until GET / succeeds."""
+    port = _free_port()
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    try:
+        while time.perf_counter() - t0 < timeout:
+            if proc.poll() is not None:
+                sys.exit(f"uvicorn exited during startup:\n{proc.stderr.read().decode()[-2000:]}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as resp:
+                    if resp.status == 200:
+                        return (time.perf_counter() - t0) * 1000
+            except OSError:
+                time.sleep(0.01)
+        sys.exit(f"no response within {timeout:.0f}s")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="Repetitions; medians are compared to the budgets")
+    parser.add_argument("--mode", choices=("production", "development"), default="production", help="STARTUP_MODE to measure")
+    parser.add_argument("--use-env-db", action="store_true", help="Use DATABASE_URL instead of a temp migrated SQLite file")
+    parser.add_argument("--budget-import-ms", type=float, default=2000.0, help="Budget for `import app.main`")
+    parser.add_argument("--budget-first-request-ms", type=float, default=3000.0, help="Budget for process start to first response")
+    parser.add_argument("--top", type=int, default=10, help="Modules to list")
+    args = parser.parse_args()
+
+    env = dict(os.environ, STARTUP_MODE=args.mode, PYTHONPATH=str(ROOT))
+    if not args.use_env_db:
+        tmpdir = tempfile.mkdtemp(prefix="measure-startup-")
+        env["DATABASE_URL"] = f"sqlite:///{tmpdir}/startup.db"
+        if args.mode == "production":
+            subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=ROOT, env=env, check=True, capture_output=True)
+
+    import_runs: List[float] = []
+    first_request_runs: List[float] = []
+    modules: List[Tuple[str, int, int]] = []
+    for _ in range(args.runs):
+        total, modules = import_profile(env)
+        import_runs.append(total)
+        first_request_runs.append(time_to_first_request(env))
+
+    print(f"Slowest first-party modules (cumulative, last run, mode={args.mode}):")
+    ours = sorted((m for m in modules if m[0].split(".")[0] == "app"), key=lambda m: -m[2])
+    for name, _, cum in ours[: args.top]:
+        print(f"  {cum / 1000:9.1f} ms  {name}")
+    by_package: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in modules:
+        by_package[name.split(".")[0]] += self_us
+    print("Heaviest packages (self time, last run):")
+    for pkg, self_us in sorted(by_package.items(), key=lambda kv: -kv[1])[: args.top]:
+        print(f"  {self_us / 1000:9.1f} ms  {pkg}")
+
+    import_ms = statistics.median(import_runs)
+    first_ms = statistics.median(first_request_runs)
+    failed = False
+    for label, value, budget in (
+        ("import app.main", import_ms, args.budget_import_ms),
+        ("time to first request", first_ms, args.budget_first_request_ms),
+    ):
+        ok = value <= budget
+        failed |= not ok
+        print(f"{label:<24} {value:9.1f} ms  (budget {budget:.0f} ms) {'ok' if ok else 'OVER BUDGET'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Query the archived stream_sessions / recommendation_events rows written by the retention job.
+
+Reads the monthly manifests under RETENTION_ARCHIVE_DIR, opens only the files whose time range
+overlaps --from/--to, and prints matching rows as NDJSON or CSV (or just their count). --run first
+performs one retention pass, the same as the background job (needs RETENTION_DAYS > 0).
+
+Usage:
+  python -m scripts.query_archive stream_sessions --list
+  python -m scripts.query_archive stream_sessions --from 2025-01-01 --to 2025-02-01 --where user_id=42
+  python -m scripts.query_archive recommendation_events --where event_type=click --count
+  python -m scripts.query_archive stream_sessions --columns id,user_id,track_id,started_at --format csv
+  python -m scripts.query_archive stream_sessions --run --list
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import sys
+from datetime import datetime
+
+import orjson
+
+from app.config import get_settings
+from app.db.session import engine
+from app.services.retention import RETAINED, archived_months, iter_archive, retention
+
+
+def _where(expr: str):
+    column, sep, value = expr.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected column=value, got {expr!r}")
+    return column, value
+
+
+def _matches(row: dict, filters) -> bool:
+    for column, value in filters:
+        actual = row.get(column)
+        if (actual is None and value != "null") or (actual is not None and str(actual) != value):
+            return False
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("table", choices=[rt.name for rt in RETAINED])
+    parser.add_argument("--dir", default=get_settings().RETENTION_ARCHIVE_DIR, help="Archive directory (default: RETENTION_ARCHIVE_DIR)")
+    parser.add_argument("--from", dest="start", type=datetime.fromisoformat, help="Inclusive start (ISO date/time, UTC)")
+    parser.add_argument("--to", dest="end", type=datetime.fromisoformat, help="Exclusive end (ISO date/time, UTC)")
+    parser.add_argument("--where", type=_where, action="append", default=[], help="column=value filter (repeatable; value null matches NULL)")
+    parser.add_argument("--columns", help="Comma-separated output columns (default: all)")
+    parser.add_argument("--format", choices=("ndjson", "csv"), default="ndjson")
+    parser.add_argument("--count", action="store_true", help="Print only the number of matching rows")
+    parser.add_argument("--list", action="store_true", help="List archived months (rows, files, time range) and exit")
+    parser.add_argument("--run", action="store_true", help="Run one retention pass against the database first")
+    args = parser.parse_args()
+
+    if args.run:
+        for table, r in retention.run(engine).items():
+            print(f"{table}: {r['archived']:,} rows archived, {r['months']} months completed, {r['dropped']} partitions dropped", file=sys.stderr)
+
+    if args.list:
+        for manifest in archived_months(args.dir, args.table):
+            files = manifest["files"]
+            rows = sum(f["rows"] for f in files)
+            span = f"{files[0]['min_ts']} .. {files[-1]['max_ts']}" if files else "-"
+            state = "complete" if manifest["complete"] else "partial"
+            print(f"{manifest['month']}  {rows:>12,} rows  {len(files):>5} files  {state:<8}  {span}")
+        return
+
+    rows = (r for r in iter_archive(args.dir, args.table, args.start, args.end) if _matches(r, args.where))
+    if args.count:
+        print(sum(1 for _ in rows))
+        return
+    columns = args.columns.split(",") if args.columns else None
+    out = sys.stdout
+    if args.format == "csv":
+        writer = None
+        for row in rows:
+            if writer is None:
+                writer = csv.DictWriter(out, fieldnames=columns or list(row), extrasaction="ignore")
+                writer.writeheader()
+            writer.writerow(row)
+        return
+    for row in rows:
+        if columns:
+            row = {c: row.get(c) for c in columns}
+        out.write(orjson.dumps(row).decode())
+        out.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Scan the audio directory and fill in track duration, bitrate and sample rate.
+
+Parses {track_id}.mp3 files (ID3 tags, MPEG frame header, Xing/VBRI VBR headers) in a
+process pool and upserts the results into tracks in batches. Tracks missing from the
+database are created from the file's ID3 tags. Files unchanged since the previous scan
+(same size and mtime) are skipped unless --full is given.
+
+Usage:
+  python -m scripts.scan_audio_library
+  python -m scripts.scan_audio_library --dir /srv/audio --workers 8 --full
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+
+from app.db.session import SessionLocal
+from app.services.audio_scanner import DEFAULT_AUDIO_DIR, ScanReport, scan_library
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=str(DEFAULT_AUDIO_DIR), help="Audio directory (default: the served static/audio)")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Tracks per UPDATE/commit")
+    parser.add_argument("--full", action="store_true", help="Re-parse every file, not just changed ones")
+    args = parser.parse_args()
+
+    def on_batch(report: ScanReport) -> None:
+        print(f"\r{report.scanned:>10,} parsed  {report.failed:>6,} failed", end="", file=sys.stderr)
+
+    with SessionLocal() as db:
+        report = scan_library(db, args.dir, workers=args.workers, batch_size=args.batch_size, full=args.full, on_batch=on_batch)
+    r = report.as_dict()
+    if r["scanned"]:
+        print(file=sys.stderr)
+    for err in r["errors"]:
+        print(f"{err['file']}: {err['error']}")
+    print(
+        f"{r['files_seen']:,} files: {r['scanned']:,} parsed ({r['updated']:,} updated, {r['created']:,} created, "
+        f"{r['failed']:,} failed), {r['skipped_unchanged']:,} unchanged, {r['unlinked']:,} not named {{track_id}}.mp3"
+    )
+    print(f"{r['elapsed_seconds']:.2f}s  {r['files_per_second']:,.1f} files/s  {r['mb_per_second']:,.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
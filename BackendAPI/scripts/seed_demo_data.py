@@ -1,24 +1,63 @@
 #!/usr/bin/env python3
 """
-Seed demo data for local development.
+Seed demo data for local development, or generate a large synthetic dataset.
 
+Default mode:
 - Creates admin user if not present:
   email: admin@example.com
   password: 'adminadmin' (bcrypt hashed)
 - Inserts a few demo tracks if the tracks table is empty.
 
+Generate mode (`generate`) adds users, tracks, playlists with their tracks, recommendation
+events and closed stream sessions at any scale:
+- Popularity is Zipfian: tracks are drawn with exponent --track-skew and users (who plays,
+  who owns playlists) with --user-skew, so a few tracks and users dominate like in real
+  traffic. Popular tracks are spread over the id range rather than being the lowest ids.
+- Work is split into fixed blocks of ids. Each block is generated from its own RNG seeded
+  from (--seed, table, block), so the rows do not depend on --workers or on timing; the
+  output is identical for the same --seed, sizes and --end on an empty database.
+- Blocks run in --workers processes. Each builds its rows in memory and loads them in one
+  transaction: multi-row executemany on SQLite, COPY on Postgres. SQLite writers take turns
+  on the database lock while the others keep generating.
+- New ids start after the current maximum of each table. Postgres id sequences and the
+  stream session id counter are moved past the generated ids afterwards.
+
+All generated users share one password (--password), hashed once with a seed-derived salt. Run it before starting the
+app: analytics rollups start from the oldest raw row only when they have no watermark yet.
+
 Usage:
   python -m scripts.seed_demo_data
+  python -m scripts.seed_demo_data generate --users 100000 --tracks 500000 --playlists 200000 \\
+      --events 10000000 --sessions 2000000 --workers 8 --seed 42
 or
-  PYTHONPATH=. python scripts/seed_demo_data.py
+  PYTHONPATH=. python scripts/seed_demo_data.py [generate ...]
 """
 from __future__ import annotations
 
+import argparse
+import bisect
+import csv
+import io
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import bcrypt
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.config import get_settings
 from app.db.session import session_scope
-from app.db.models import User, Track
+from app.db.models import Playlist, RecommendationEvent, StreamSession, User, Track
 from app.security.auth import hash_password
+from app.services.stream_sessions import ID_BLOCK_NAME
 
 
 def ensure_admin(db: Session) -> None:
@@ -32,7 +71,11 @@ def ensure_admin(db: Session) -> None:
         is_admin=True,
     )
     db.add(admin)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Created concurrently (e.g. by another instance's seed); nothing to do
+        db.rollback()
 
 
 def ensure_demo_tracks(db: Session) -> None:
@@ -48,7 +91,399 @@ def ensure_demo_tracks(db: Session) -> None:
     db.commit()
 
 
+# --- Synthetic dataset generator ---
+
+WORDS = (
+    "love", "night", "city", "dream", "fire", "blue", "summer", "heart", "river", "light",
+    "shadow", "gold", "rain", "echo", "wild", "storm", "star", "ocean", "road", "silver",
+    "neon", "glass", "morning", "velvet", "ghost", "paper", "electric", "honey", "winter", "static",
+)
+GENRES = ("Rock", "Pop", "Jazz", "Ambient", "Synthwave", "Hip-Hop", "Classical", "Folk", "Electronic", "Lo-fi")
+EVENT_TYPES = ("play", "like", "skip")
+EVENT_WEIGHTS = (0.75, 0.1, 0.15)
+# Relative activity per UTC hour (quiet nights, evening peak)
+HOURLY_ACTIVITY = (2, 1, 1, 1, 1, 2, 3, 5, 6, 6, 6, 7, 8, 7, 7, 7, 8, 9, 10, 11, 11, 9, 6, 4)
+# Rows generated and loaded per task (one transaction)
+BLOCK_ROWS = {"users": 50_000, "tracks": 50_000, "playlists": 2_000, "recommendation_events": 100_000, "stream_sessions": 100_000}
+COLUMNS = {
+    "users": ("id", "email", "username", "password_hash", "is_admin", "created_at"),
+    "tracks": ("id", "title", "artist", "album", "genre", "duration", "cover_image", "created_at"),
+    "playlists": (
+        "id", "name", "description", "cover_image", "owner_id", "created_at", "updated_at",
+        "track_count", "total_duration", "version",
+    ),
+    "playlist_tracks": ("playlist_id", "track_id", "position"),
+    "recommendation_events": ("id", "user_id", "track_id", "event_type", "created_at"),
+    "stream_sessions": ("id", "user_id", "track_id", "started_at", "last_heartbeat_at", "ended_at"),
+}
+_EPOCH = datetime(1970, 1, 1)
+
+
+class Zipf:
+    """
+    Bounded Zipf(s) sampler over n items by inverse transform of the continuous power law,
+    O(1) per draw and no tables. Ranks map onto ids first..first+n-1 through a fixed stride
+    permutation, so rank 0 (the most popular item) is not simply the lowest id.
+    """
+
+    def __init__(self, first: int, n: int, s: float) -> None:
+        self.first = first
+        self.n = n
+        self.s = s
+        self._top = math.log(n + 1) if s == 1.0 else (n + 1) ** (1.0 - s) - 1.0
+        stride = 2654435761 % n or 1
+        while math.gcd(stride, n) != 1:
+            stride += 1
+        self.stride = stride
+
+    def rank(self, u: float) -> int:
+        if self.s == 1.0:
+            x = math.exp(u * self._top)
+        else:
+            x = (1.0 + u * self._top) ** (1.0 / (1.0 - self.s))
+        return min(int(x) - 1, self.n - 1)
+
+    def draw(self, rng: random.Random) -> int:
+        return self.first + (self.rank(rng.random()) * self.stride) % self.n
+
+
+class GenSpec:
+    """Sizes, skews and id offsets shared by every generator task."""
+
+    def __init__(self, args: argparse.Namespace, first_ids: Dict[str, int], password_hash: str) -> None:
+        self.seed = args.seed
+        self.users = args.users
+        self.tracks = args.tracks
+        self.playlists = args.playlists
+        self.playlist_size = args.playlist_size
+        self.max_playlist_size = args.max_playlist_size
+        self.events = args.events
+        self.sessions = args.sessions
+        self.user_skew = args.user_skew
+        self.track_skew = args.track_skew
+        self.end = args.end
+        self.days = args.days
+        self.first_ids = first_ids
+        self.password_hash = password_hash
+
+    @property
+    def start_ts(self) -> float:
+        return (self.end - _EPOCH).total_seconds() - self.days * 86400
+
+
+def seeded_password_hash(seed: int, password: str) -> str:
+    """bcrypt hash with a salt derived from the seed, so generated users are reproducible too."""
+    alphabet = "./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+    rng = random.Random(f"{seed}:password")
+    # 22 bcrypt-base64 chars; only 2 bits of the last one are used
+    salt = "".join(rng.choice(alphabet) for _ in range(21)) + rng.choice(".Oeu")
+    return bcrypt.hashpw(password.encode("utf-8"), f"$2b$12${salt}".encode("ascii")).decode("ascii")
+
+
+def track_duration(seed: int, track_id: int) -> float:
+    """Deterministic duration of a generated track (90..420 s), computable from its id alone."""
+    return float(90 + (track_id * 2654435761 + seed * 40503) % 331)
+
+
+class _Clock:
+    """Random timestamps inside the generation window with a daily activity curve."""
+
+    def __init__(self, spec: GenSpec) -> None:
+        self.start = spec.start_ts
+        self.days = spec.days
+        total = 0
+        self.cum = []
+        for weight in HOURLY_ACTIVITY:
+            total += weight
+            self.cum.append(total)
+        self.total = total
+
+    def ts(self, rng: random.Random) -> float:
+        hour = bisect.bisect_right(self.cum, rng.random() * self.total)
+        return self.start + rng.randrange(self.days) * 86400 + hour * 3600 + rng.random() * 3600
+
+
+def _fmt(ts: float) -> str:
+    # Same text form SQLAlchemy stores for DateTime on SQLite; Postgres parses it too
+    return (_EPOCH + timedelta(seconds=ts)).isoformat(" ", "microseconds")
+
+
+def _rng(spec: GenSpec, table: str, block: int) -> random.Random:
+    return random.Random(f"{spec.seed}:{table}:{block}")
+
+
+def gen_users(spec: GenSpec, block: int, start: int, end: int) -> Dict[str, List[tuple]]:
+    rng = _rng(spec, "users", block)
+    window = spec.days * 86400
+    base = spec.start_ts
+    rows = []
+    for uid in range(start, end):
+        rows.append((uid, f"user{uid}@seed.example", f"user{uid}", spec.password_hash, False, _fmt(base + rng.random() * window)))
+    return {"users": rows}
+
+
+def gen_tracks(spec: GenSpec, block: int, start: int, end: int) -> Dict[str, List[tuple]]:
+    rng = _rng(spec, "tracks", block)
+    artists = max(1, spec.tracks // 12)
+    window = spec.days * 86400
+    base = spec.start_ts
+    rows = []
+    for tid in range(start, end):
+        artist_no = rng.randrange(artists)
+        title = f"{rng.choice(WORDS).title()} {rng.choice(WORDS)}"
+        if rng.random() < 0.3:
+            title += f" {rng.choice(WORDS)}"
+        rows.append((
+            tid,
+            title,
+            f"Artist {artist_no}",
+            f"{WORDS[artist_no % len(WORDS)].title()} Sessions Vol. {1 + rng.randrange(4)}",
+            GENRES[(artist_no * 7 + rng.randrange(2)) % len(GENRES)],
+            track_duration(spec.seed, tid),
+            None,
+            _fmt(base + rng.random() * window),
+        ))
+    return {"tracks": rows}
+
+
+def gen_playlists(spec: GenSpec, block: int, start: int, end: int) -> Dict[str, List[tuple]]:
+    rng = _rng(spec, "playlists", block)
+    users = Zipf(spec.first_ids["users"], spec.users, spec.user_skew)
+    tracks = Zipf(spec.first_ids["tracks"], spec.tracks, spec.track_skew)
+    clock = _Clock(spec)
+    cap = min(spec.max_playlist_size, spec.tracks)
+    playlists = []
+    links = []
+    for pid in range(start, end):
+        size = min(cap, 1 + int(rng.expovariate(1.0 / max(spec.playlist_size - 1, 1))))
+        chosen: Dict[int, None] = {}
+        for _ in range(size * 3):
+            chosen[tracks.draw(rng)] = None
+            if len(chosen) >= size:
+                break
+        total = 0.0
+        for position, tid in enumerate(chosen):
+            links.append((pid, tid, position))
+            total += track_duration(spec.seed, tid)
+        created = _fmt(clock.ts(rng))
+        playlists.append((
+            pid, f"{rng.choice(WORDS).title()} mix {pid}", None, None, users.draw(rng), created, created, len(chosen), total, 1,
+        ))
+    return {"playlists": playlists, "playlist_tracks": links}
+
+
+def gen_events(spec: GenSpec, block: int, start: int, end: int) -> Dict[str, List[tuple]]:
+    rng = _rng(spec, "recommendation_events", block)
+    users = Zipf(spec.first_ids["users"], spec.users, spec.user_skew)
+    tracks = Zipf(spec.first_ids["tracks"], spec.tracks, spec.track_skew)
+    clock = _Clock(spec)
+    cum_weights = list(EVENT_WEIGHTS)
+    for i in range(1, len(cum_weights)):
+        cum_weights[i] += cum_weights[i - 1]
+    rows = []
+    for eid in range(start, end):
+        event_type = EVENT_TYPES[bisect.bisect_right(cum_weights, rng.random() * cum_weights[-1])]
+        rows.append((eid, users.draw(rng), tracks.draw(rng), event_type, _fmt(clock.ts(rng))))
+    return {"recommendation_events": rows}
+
+
+def gen_sessions(spec: GenSpec, block: int, start: int, end: int) -> Dict[str, List[tuple]]:
+    rng = _rng(spec, "stream_sessions", block)
+    users = Zipf(spec.first_ids["users"], spec.users, spec.user_skew)
+    tracks = Zipf(spec.first_ids["tracks"], spec.tracks, spec.track_skew)
+    clock = _Clock(spec)
+    rows = []
+    for sid in range(start, end):
+        tid = tracks.draw(rng)
+        started = clock.ts(rng)
+        # Most plays run to the end, the rest stop somewhere in the track
+        listened = track_duration(spec.seed, tid) * (1.0 if rng.random() < 0.6 else rng.random())
+        ended = _fmt(started + listened)
+        rows.append((sid, users.draw(rng), tid, _fmt(started), ended, ended))
+    return {"stream_sessions": rows}
+
+
+GENERATORS: Dict[str, Callable[[GenSpec, int, int, int], Dict[str, List[tuple]]]] = {
+    "users": gen_users,
+    "tracks": gen_tracks,
+    "playlists": gen_playlists,
+    "recommendation_events": gen_events,
+    "stream_sessions": gen_sessions,
+}
+
+
+def _load_sqlite(conn: Connection, table: str, rows: List[tuple]) -> None:
+    cols = COLUMNS[table]
+    sql = f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})"
+    conn.exec_driver_sql(sql, rows)
+
+
+def _load_postgres(conn: Connection, table: str, rows: List[tuple]) -> None:
+    buf = io.StringIO()
+    # Empty unquoted fields are NULL in COPY's csv format
+    csv.writer(buf).writerows(rows)
+    buf.seek(0)
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table} ({', '.join(COLUMNS[table])}) FROM STDIN WITH (FORMAT csv)", buf)
+    finally:
+        cursor.close()
+
+
+_worker_engine: Optional[Engine] = None
+_worker_spec: Optional[GenSpec] = None
+
+
+def _make_engine(url: str) -> Engine:
+    if url.startswith("sqlite"):
+        # Writers queue on the database lock instead of failing with "database is locked"
+        return create_engine(url, connect_args={"timeout": 600})
+    return create_engine(url)
+
+
+def _init_worker(url: str, spec: GenSpec) -> None:
+    global _worker_engine, _worker_spec
+    _worker_engine = _make_engine(url)
+    _worker_spec = spec
+
+
+def _run_block(task: Tuple[str, int, int, int]) -> Tuple[str, int, float]:
+    """Generate one block and load it in a single transaction. Returns (table, rows, seconds)."""
+    table, block, start, end = task
+    t0 = time.perf_counter()
+    batches = GENERATORS[table](_worker_spec, block, start, end)
+    load = _load_postgres if _worker_engine.dialect.name == "postgresql" else _load_sqlite
+    with _worker_engine.begin() as conn:
+        # Parents first (playlists before playlist_tracks)
+        for name, rows in batches.items():
+            if rows:
+                load(conn, name, rows)
+    return table, sum(len(r) for r in batches.values()), time.perf_counter() - t0
+
+
+def _tasks(table: str, first: int, count: int) -> List[Tuple[str, int, int, int]]:
+    size = BLOCK_ROWS[table]
+    return [(table, i, first + i * size, first + min((i + 1) * size, count)) for i in range(math.ceil(count / size))]
+
+
+def _run_phase(name: str, tasks: Sequence[Tuple[str, int, int, int]], workers: int, url: str, spec: GenSpec) -> None:
+    if not tasks:
+        return
+    t0 = time.perf_counter()
+    done = 0
+    rows = 0
+
+    def report(result: Tuple[str, int, float]) -> None:
+        nonlocal done, rows
+        done += 1
+        rows += result[1]
+        elapsed = time.perf_counter() - t0
+        print(f"\r{name}: {done}/{len(tasks)} blocks, {rows:,} rows, {rows / elapsed:,.0f} rows/s", end="", file=sys.stderr)
+
+    if workers <= 1:
+        _init_worker(url, spec)
+        for task in tasks:
+            report(_run_block(task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(url, spec)) as pool:
+            for future in as_completed([pool.submit(_run_block, task) for task in tasks]):
+                report(future.result())
+    print(file=sys.stderr)
+
+
+def _first_ids(engine: Engine) -> Dict[str, int]:
+    with engine.connect() as conn:
+        return {
+            model.__tablename__: (conn.scalar(select(func.max(model.id))) or 0) + 1
+            for model in (User, Track, Playlist, RecommendationEvent, StreamSession)
+        }
+
+
+def _finish(engine: Engine, spec: GenSpec) -> None:
+    """Move id sequences and the stream session id counter past the generated ids."""
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            for table in ("users", "tracks", "playlists", "recommendation_events", "stream_sessions"):
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT COALESCE(MAX(id), 1) FROM {table}))"
+                ))
+        next_session = spec.first_ids["stream_sessions"] + spec.sessions
+        conn.execute(
+            text("UPDATE id_blocks SET next_value = :v WHERE name = :name AND next_value < :v"),
+            {"v": next_session, "name": ID_BLOCK_NAME},
+        )
+
+
+def generate(args: argparse.Namespace) -> None:
+    url = get_settings().DATABASE_URL
+    engine = _make_engine(url)
+    if engine.dialect.name not in ("sqlite", "postgresql"):
+        raise SystemExit(f"generate supports SQLite and Postgres (got {engine.dialect.name})")
+    if (args.playlists or args.events or args.sessions) and not (args.users and args.tracks):
+        raise SystemExit("playlists, events and sessions need --users and --tracks > 0")
+    spec = GenSpec(args, _first_ids(engine), seeded_password_hash(args.seed, args.password))
+    first = spec.first_ids
+    print(
+        f"Generating into {engine.url.render_as_string(hide_password=True)} with seed {spec.seed}, "
+        f"{args.workers} worker(s), window {spec.days} days up to {spec.end:%Y-%m-%d}",
+        file=sys.stderr,
+    )
+    t0 = time.perf_counter()
+    # Phase 1 has no dependencies; phase 2 references users and tracks
+    _run_phase(
+        "users+tracks",
+        _tasks("users", first["users"], spec.users) + _tasks("tracks", first["tracks"], spec.tracks),
+        args.workers, url, spec,
+    )
+    _run_phase(
+        "playlists+events+sessions",
+        _tasks("playlists", first["playlists"], spec.playlists)
+        + _tasks("recommendation_events", first["recommendation_events"], spec.events)
+        + _tasks("stream_sessions", first["stream_sessions"], spec.sessions),
+        args.workers, url, spec,
+    )
+    _finish(engine, spec)
+    engine.dispose()
+    print(
+        f"Generated {spec.users:,} users, {spec.tracks:,} tracks, {spec.playlists:,} playlists, "
+        f"{spec.events:,} events, {spec.sessions:,} sessions in {time.perf_counter() - t0:.1f}s."
+    )
+
+
+def _utc_day(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%d")
+
+
 def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command")
+    gen = sub.add_parser("generate", help="Generate a large synthetic dataset")
+    gen.add_argument("--users", type=int, default=10_000)
+    gen.add_argument("--tracks", type=int, default=100_000)
+    gen.add_argument("--playlists", type=int, default=20_000)
+    gen.add_argument("--playlist-size", type=int, default=40, help="Mean tracks per playlist (exponentially distributed)")
+    gen.add_argument("--max-playlist-size", type=int, default=2_000)
+    gen.add_argument("--events", type=int, default=1_000_000, help="recommendation_events rows")
+    gen.add_argument("--sessions", type=int, default=200_000, help="Closed stream_sessions rows")
+    gen.add_argument("--track-skew", type=float, default=1.1, help="Zipf exponent of track popularity")
+    gen.add_argument("--user-skew", type=float, default=0.8, help="Zipf exponent of user activity")
+    gen.add_argument("--days", type=int, default=90, help="History length ending at --end")
+    gen.add_argument(
+        "--end", type=_utc_day, default=None,
+        help="End of the history (UTC date, exclusive; default: today). Fix it for reproducible output",
+    )
+    gen.add_argument("--seed", type=int, default=1)
+    gen.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    gen.add_argument("--password", default="password", help="Password of every generated user")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        if args.end is None:
+            args.end = datetime.now(timezone.utc).replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+        args.days = max(args.days, 1)
+        generate(args)
+        return
+
     with session_scope() as db:
         ensure_admin(db)
         ensure_demo_tracks(db)